@@ -0,0 +1,35 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db.base import Base
+from app.db.session import DATABASE_URL, build_engine
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True,
+                      render_as_batch=DATABASE_URL.startswith("sqlite"))
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # Same engine settings (PRAGMAs, statement_timeout) as the app, but no pool to keep around
+    engine = build_engine(DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            context.configure(connection=connection, target_metadata=target_metadata,
+                              render_as_batch=DATABASE_URL.startswith("sqlite"))
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        engine.dispose()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
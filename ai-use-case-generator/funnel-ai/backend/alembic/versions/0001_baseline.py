@@ -0,0 +1,711 @@
+"""Baseline schema
+
+Replaces the create_all() + run_migration() calls that used to run on every
+import of app.main. The schema is frozen here as of this revision; later
+model changes belong in their own revisions. Databases created by those old
+calls are adopted instead: tables and indexes they already have are kept,
+and the columns that were added by hand-written ALTERs are added only where
+absent.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Columns added after their tables first shipped (formerly run_migration in app/main.py).
+# Foreign keys are left to fresh databases; SQLite cannot add them with ALTER.
+LATE_COLUMNS = {
+    "users": [
+        sa.Column("usage_leads_weekly", sa.Integer, server_default="0"),
+        sa.Column("usage_reset_at", sa.DateTime(timezone=True)),
+        sa.Column("hashed_password", sa.String),
+        sa.Column("business_type", sa.String, server_default="b2b"),
+        sa.Column("email_opt_in", sa.Boolean, server_default=sa.true()),
+    ],
+    "leads": [
+        sa.Column("company_id", sa.Integer),
+        sa.Column("bucket", sa.String, server_default="review"),
+        sa.Column("last_enriched_at", sa.DateTime(timezone=True)),
+        sa.Column("campaign_id", sa.Integer),
+        # Dedupe match keys; filled by _backfill_match_keys
+        sa.Column("email_key", sa.String),
+        sa.Column("name_key", sa.String),
+        sa.Column("phone_key", sa.String),
+        # Cached score components
+        *[sa.Column(name, sa.Integer) for name in (
+            "score_stage", "score_icp", "score_seniority", "score_intent_website", "score_intent_pricing",
+            "score_intent_demo", "score_intent_content", "score_intent_social", "score_intent_email")],
+    ],
+    "brand_settings_v4": [
+        sa.Column("settings_version", sa.Integer, server_default="1"),
+    ],
+}
+
+# Tables found when the baseline runs: a database from the old create_all()
+_legacy_tables = set()
+
+
+def _create_table(name, *elements):
+    if name not in _legacy_tables:
+        op.create_table(name, *elements)
+        return
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns(name)}
+    for column in LATE_COLUMNS.get(name, []):
+        if column.name not in existing:
+            op.add_column(name, column)
+
+
+def _create_index(name, table, columns, unique=False):
+    if table in _legacy_tables and name in {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}:
+        return
+    op.create_index(name, table, columns, unique=unique)
+
+
+# Leads per batched UPDATE in _backfill_match_keys
+BACKFILL_CHUNK_SIZE = 500
+
+
+def _backfill_match_keys():
+    """
+    Computes email_key / name_key / phone_key for existing leads before the
+    unique email_key index is built, in keyset-paged executemany UPDATEs.
+    Emails that only differ by case keep the key on the oldest lead; later
+    ones get no email_key and are flagged with meta_data.duplicate_of, like
+    scripts/backfill_lead_match_keys.py (still usable for re-runs).
+    """
+    from app.services.dedupe import compute_match_keys
+
+    bind = op.get_bind()
+    leads = sa.table(
+        'leads', sa.column('id', sa.Integer), sa.column('first_name', sa.String), sa.column('last_name', sa.String),
+        sa.column('company', sa.String), sa.column('email', sa.String), sa.column('phone', sa.String),
+        sa.column('meta_data', sa.JSON), sa.column('email_key', sa.String), sa.column('name_key', sa.String),
+        sa.column('phone_key', sa.String),
+    )
+    never_keyed = sa.and_(leads.c.email_key.is_(None), leads.c.name_key.is_(None), leads.c.phone_key.is_(None))
+    set_keys = sa.update(leads).where(leads.c.id == sa.bindparam('lead_id')).values(
+        email_key=sa.bindparam('new_email_key'), name_key=sa.bindparam('new_name_key'),
+        phone_key=sa.bindparam('new_phone_key'))
+    flag = sa.update(leads).where(leads.c.id == sa.bindparam('lead_id')).values(meta_data=sa.bindparam('new_meta_data'))
+
+    taken = dict(bind.execute(sa.select(leads.c.email_key, leads.c.id).where(leads.c.email_key.isnot(None))).all())
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(leads).where(never_keyed, leads.c.id > last_id).order_by(leads.c.id).limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        keyed, flagged = [], []
+        for row in rows:
+            keys = compute_match_keys(row.first_name, row.last_name, row.company, row.email, row.phone)
+            if keys["email_key"] in taken:
+                flagged.append({"lead_id": row.id,
+                                "new_meta_data": dict(row.meta_data or {}, duplicate_of=taken[keys["email_key"]])})
+                keys["email_key"] = None
+            elif keys["email_key"]:
+                taken[keys["email_key"]] = row.id
+            keyed.append({"lead_id": row.id, **{f"new_{key}": value for key, value in keys.items()}})
+        bind.execute(set_keys, keyed)
+        if flagged:
+            bind.execute(flag, flagged)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    _legacy_tables.clear()
+    _legacy_tables.update(sa.inspect(op.get_bind()).get_table_names())
+
+    _create_table('access_log_minutes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('minute', sa.DateTime(timezone=True)),
+        sa.Column('method', sa.String()),
+        sa.Column('path', sa.String()),
+        sa.Column('status_code', sa.Integer()),
+        sa.Column('count', sa.Integer()),
+        sa.Column('sum_ms', sa.Float()),
+        sa.Column('max_ms', sa.Float()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_access_log_minutes_id', 'access_log_minutes', ['id'])
+    _create_index('ix_access_log_minutes_minute', 'access_log_minutes', ['minute'])
+    _create_index('ix_access_log_minutes_path', 'access_log_minutes', ['path'])
+
+    _create_table('access_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('method', sa.String()),
+        sa.Column('path', sa.String()),
+        sa.Column('status_code', sa.Integer()),
+        sa.Column('duration_ms', sa.Float()),
+        sa.Column('ip_address', sa.String()),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_access_logs_id', 'access_logs', ['id'])
+    _create_index('ix_access_logs_method', 'access_logs', ['method'])
+    _create_index('ix_access_logs_path', 'access_logs', ['path'])
+    _create_index('ix_access_logs_status_code', 'access_logs', ['status_code'])
+    _create_index('ix_access_logs_timestamp', 'access_logs', ['timestamp'])
+
+    _create_table('campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String()),
+        sa.Column('status', sa.String()),
+        sa.Column('type', sa.String()),
+        sa.Column('workflow_type', sa.String()),
+        sa.Column('aggression_level', sa.String()),
+        sa.Column('schedule_config', sa.JSON()),
+        sa.Column('sent_count', sa.Integer()),
+        sa.Column('open_count', sa.Integer()),
+        sa.Column('reply_count', sa.Integer()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_campaigns_id', 'campaigns', ['id'])
+    _create_index('ix_campaigns_name', 'campaigns', ['name'])
+
+    _create_table('message_templates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer()),
+        sa.Column('name', sa.String()),
+        sa.Column('type', sa.String()),
+        sa.Column('subject', sa.String()),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('variables', sa.JSON()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_message_templates_id', 'message_templates', ['id'])
+    _create_index('ix_message_templates_name', 'message_templates', ['name'])
+
+    _create_table('notifications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String()),
+        sa.Column('title', sa.String()),
+        sa.Column('message', sa.String()),
+        sa.Column('read', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_notifications_id', 'notifications', ['id'])
+
+    _create_table('plans',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String()),
+        sa.Column('description', sa.String()),
+        sa.Column('price', sa.Float()),
+        sa.Column('interval', sa.String()),
+        sa.Column('features', sa.JSON()),
+        sa.Column('weekly_limit', sa.Integer()),
+        sa.Column('is_active', sa.Boolean()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_plans_id', 'plans', ['id'])
+    _create_index('ix_plans_name', 'plans', ['name'], unique=True)
+
+    _create_table('route_latency_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('bucket_end', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('method', sa.String(), nullable=False),
+        sa.Column('route', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer()),
+        sa.Column('error_count', sa.Integer()),
+        sa.Column('sum_ms', sa.Float()),
+        sa.Column('max_ms', sa.Float()),
+        sa.Column('status_codes', sa.JSON()),
+        sa.Column('histogram', sa.JSON()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_route_latency_rollups_bucket_route', 'route_latency_rollups', ['bucket_start', 'route'])
+    _create_index('ix_route_latency_rollups_id', 'route_latency_rollups', ['id'])
+
+    _create_table('stages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String()),
+        sa.Column('order', sa.Integer()),
+        sa.Column('color', sa.String()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_stages_id', 'stages', ['id'])
+    _create_index('ix_stages_name', 'stages', ['name'], unique=True)
+
+    _create_table('subscription_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer()),
+        sa.Column('from_tier', sa.String()),
+        sa.Column('to_tier', sa.String()),
+        sa.Column('action_type', sa.String()),
+        sa.Column('client_timestamp', sa.DateTime(timezone=True)),
+        sa.Column('server_timestamp', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('authorized', sa.Boolean()),
+        sa.Column('authorization_text', sa.String()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_subscription_history_id', 'subscription_history', ['id'])
+    _create_index('ix_subscription_history_user_id', 'subscription_history', ['user_id'])
+
+    _create_table('tenants',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_tenants_id', 'tenants', ['id'])
+
+    _create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String()),
+        sa.Column('full_name', sa.String()),
+        sa.Column('hashed_password', sa.String()),
+        sa.Column('phone', sa.String()),
+        sa.Column('address_line1', sa.String()),
+        sa.Column('address_line2', sa.String()),
+        sa.Column('city', sa.String()),
+        sa.Column('state', sa.String()),
+        sa.Column('zip_code', sa.String()),
+        sa.Column('country', sa.String()),
+        sa.Column('sms_opt_in', sa.Boolean()),
+        sa.Column('email_opt_in', sa.Boolean()),
+        sa.Column('ebilling_opt_in', sa.Boolean()),
+        sa.Column('business_type', sa.String()),
+        sa.Column('plan_tier', sa.String()),
+        sa.Column('billing_info', sa.JSON()),
+        sa.Column('subscription_status', sa.String()),
+        sa.Column('usage_leads_weekly', sa.Integer()),
+        sa.Column('usage_reset_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_users_email', 'users', ['email'], unique=True)
+    _create_index('ix_users_id', 'users', ['id'])
+
+    _create_table('brand_settings_v4',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer()),
+        sa.Column('tone_value', sa.Integer()),
+        sa.Column('length_value', sa.Integer()),
+        sa.Column('creativity_value', sa.Integer()),
+        sa.Column('complexity_value', sa.Integer()),
+        sa.Column('persuasiveness_value', sa.Integer()),
+        sa.Column('brand_voice', sa.Text()),
+        sa.Column('key_terms', sa.Text()),
+        sa.Column('website_url', sa.String()),
+        sa.Column('brand_colors', sa.JSON()),
+        sa.Column('documents', sa.JSON()),
+        sa.Column('weight_icp', sa.Integer()),
+        sa.Column('weight_seniority', sa.Integer()),
+        sa.Column('weight_intent_website', sa.Integer()),
+        sa.Column('weight_intent_pricing', sa.Integer()),
+        sa.Column('weight_intent_demo', sa.Integer()),
+        sa.Column('weight_intent_content', sa.Integer()),
+        sa.Column('weight_intent_social', sa.Integer()),
+        sa.Column('weight_intent_email', sa.Integer()),
+        sa.Column('weight_engagement', sa.Integer()),
+        sa.Column('weight_intent', sa.Integer()),
+        sa.Column('settings_version', sa.Integer()),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_brand_settings_v4_id', 'brand_settings_v4', ['id'])
+
+    _create_table('campaign_steps',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer()),
+        sa.Column('order', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String()),
+        sa.Column('step_type', sa.String(), nullable=False),
+        sa.Column('template_id', sa.Integer()),
+        sa.Column('wait_days', sa.Integer()),
+        sa.Column('branch_config', sa.JSON()),
+        sa.Column('content_instruction', sa.Text()),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['template_id'], ['message_templates.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_campaign_steps_id', 'campaign_steps', ['id'])
+
+    _create_table('companies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('domain', sa.String()),
+        sa.Column('domain_root', sa.String()),
+        sa.Column('website_url', sa.Text()),
+        sa.Column('primary_phone', sa.String()),
+        sa.Column('primary_city', sa.String()),
+        sa.Column('primary_state', sa.String()),
+        sa.Column('primary_country', sa.String()),
+        sa.Column('categories', sa.JSON()),
+        sa.Column('notes', sa.Text()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_companies_domain', 'companies', ['domain'])
+    _create_index('ix_companies_id', 'companies', ['id'])
+    _create_index('ix_companies_name', 'companies', ['name'])
+
+    _create_table('crm_integrations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer()),
+        sa.Column('crm_type', sa.String()),
+        sa.Column('is_connected', sa.Boolean()),
+        sa.Column('access_token', sa.String()),
+        sa.Column('refresh_token', sa.String()),
+        sa.Column('api_key', sa.String()),
+        sa.Column('api_secret', sa.String()),
+        sa.Column('endpoint', sa.String()),
+        sa.Column('settings', sa.JSON()),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_crm_integrations_id', 'crm_integrations', ['id'])
+
+    _create_table('workspaces',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_workspaces_id', 'workspaces', ['id'])
+
+    _create_table('company_contacts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('value', sa.String(), nullable=False),
+        sa.Column('label', sa.String()),
+        sa.Column('source_url', sa.Text()),
+        sa.Column('source_type', sa.String()),
+        sa.Column('confidence', sa.Integer()),
+        sa.Column('first_seen_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_company_contacts_id', 'company_contacts', ['id'])
+
+    _create_table('leads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer()),
+        sa.Column('company_id', sa.Integer()),
+        sa.Column('bucket', sa.String()),
+        sa.Column('last_enriched_at', sa.DateTime(timezone=True)),
+        sa.Column('first_name', sa.String()),
+        sa.Column('last_name', sa.String()),
+        sa.Column('email', sa.String()),
+        sa.Column('phone', sa.String()),
+        sa.Column('secondary_email', sa.String()),
+        sa.Column('secondary_phone', sa.String()),
+        sa.Column('email_key', sa.String()),
+        sa.Column('name_key', sa.String()),
+        sa.Column('phone_key', sa.String()),
+        sa.Column('title', sa.String()),
+        sa.Column('company', sa.String()),
+        sa.Column('industry', sa.String()),
+        sa.Column('location', sa.String()),
+        sa.Column('score', sa.Integer()),
+        sa.Column('status', sa.String()),
+        sa.Column('source', sa.String()),
+        sa.Column('score_stage', sa.Integer()),
+        sa.Column('score_icp', sa.Integer()),
+        sa.Column('score_seniority', sa.Integer()),
+        sa.Column('score_intent_website', sa.Integer()),
+        sa.Column('score_intent_pricing', sa.Integer()),
+        sa.Column('score_intent_demo', sa.Integer()),
+        sa.Column('score_intent_content', sa.Integer()),
+        sa.Column('score_intent_social', sa.Integer()),
+        sa.Column('score_intent_email', sa.Integer()),
+        sa.Column('social_profiles', sa.JSON()),
+        sa.Column('meta_data', sa.JSON()),
+        sa.Column('last_contacted_at', sa.DateTime(timezone=True)),
+        sa.Column('last_contact_method', sa.String()),
+        sa.Column('next_scheduled_action', sa.DateTime(timezone=True)),
+        sa.Column('revenue_last_year', sa.Float()),
+        sa.Column('contract_signed_date', sa.DateTime()),
+        sa.Column('last_service_usage', sa.DateTime()),
+        sa.Column('sentiment', sa.String()),
+        sa.Column('customer_tier', sa.String()),
+        sa.Column('lifecycle_stage', sa.String()),
+        sa.Column('services_used', sa.String()),
+        sa.Column('disqualification_reason', sa.String()),
+        sa.Column('disqualified_at', sa.DateTime(timezone=True)),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    if 'leads' in _legacy_tables:
+        _backfill_match_keys()
+    _create_index('ix_leads_company', 'leads', ['company'])
+    _create_index('ix_leads_email', 'leads', ['email'], unique=True)
+    _create_index('ix_leads_email_key', 'leads', ['email_key'], unique=True)
+    _create_index('ix_leads_first_name', 'leads', ['first_name'])
+    _create_index('ix_leads_id', 'leads', ['id'])
+    _create_index('ix_leads_last_name', 'leads', ['last_name'])
+    _create_index('ix_leads_name_key', 'leads', ['name_key'])
+    _create_index('ix_leads_phone_key', 'leads', ['phone_key'])
+    _create_index('ix_leads_title', 'leads', ['title'])
+
+    _create_table('workspace_actions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('workspace_id', sa.Integer(), nullable=False),
+        sa.Column('action_type', sa.String(), nullable=False),
+        sa.Column('status', sa.String()),
+        sa.Column('requested_by_user_id', sa.String()),
+        sa.Column('payload', sa.JSON()),
+        sa.Column('progress', sa.JSON()),
+        sa.Column('error', sa.Text()),
+        sa.Column('started_at', sa.DateTime(timezone=True)),
+        sa.Column('finished_at', sa.DateTime(timezone=True)),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_workspace_actions_id', 'workspace_actions', ['id'])
+
+    _create_table('workspace_presets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('workspace_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('config_blob', sa.JSON(), nullable=False),
+        sa.Column('is_default', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_workspace_presets_id', 'workspace_presets', ['id'])
+
+    _create_table('campaign_leads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer()),
+        sa.Column('lead_id', sa.Integer()),
+        sa.Column('status', sa.String()),
+        sa.Column('current_step_id', sa.Integer()),
+        sa.Column('last_run_at', sa.DateTime(timezone=True)),
+        sa.Column('next_run_at', sa.DateTime(timezone=True)),
+        sa.Column('history', sa.JSON()),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['current_step_id'], ['campaign_steps.id']),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_campaign_leads_id', 'campaign_leads', ['id'])
+
+    _create_table('deals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String()),
+        sa.Column('value', sa.Float()),
+        sa.Column('currency', sa.String()),
+        sa.Column('stage_id', sa.Integer()),
+        sa.Column('lead_id', sa.Integer()),
+        sa.Column('expected_close_date', sa.DateTime(timezone=True)),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id']),
+        sa.ForeignKeyConstraint(['stage_id'], ['stages.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_deals_id', 'deals', ['id'])
+    _create_index('ix_deals_title', 'deals', ['title'])
+
+    _create_table('follow_ups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('lead_id', sa.Integer()),
+        sa.Column('title', sa.String()),
+        sa.Column('type', sa.String()),
+        sa.Column('scheduled_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('notes', sa.Text()),
+        sa.Column('status', sa.String()),
+        sa.Column('is_dismissed', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_follow_ups_id', 'follow_ups', ['id'])
+
+    _create_table('lead_notes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('lead_id', sa.Integer()),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_lead_notes_id', 'lead_notes', ['id'])
+
+    _create_table('lead_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('workspace_id', sa.Integer(), nullable=False),
+        sa.Column('preset_id', sa.Integer()),
+        sa.Column('config_blob', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String()),
+        sa.Column('created_by_user_id', sa.String()),
+        sa.Column('started_at', sa.DateTime(timezone=True)),
+        sa.Column('finished_at', sa.DateTime(timezone=True)),
+        sa.Column('stats', sa.JSON()),
+        sa.Column('error', sa.Text()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['preset_id'], ['workspace_presets.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_lead_runs_id', 'lead_runs', ['id'])
+
+    _create_table('crawl_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('workspace_id', sa.Integer()),
+        sa.Column('lead_run_id', sa.Integer()),
+        sa.Column('company_id', sa.Integer()),
+        sa.Column('domain_root', sa.String(), nullable=False),
+        sa.Column('requested_url', sa.Text()),
+        sa.Column('status', sa.String()),
+        sa.Column('priority', sa.Integer()),
+        sa.Column('attempt_count', sa.Integer()),
+        sa.Column('last_crawled_at', sa.DateTime(timezone=True)),
+        sa.Column('next_crawl_at', sa.DateTime(timezone=True)),
+        sa.Column('error', sa.Text()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['lead_run_id'], ['lead_runs.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_crawl_jobs_id', 'crawl_jobs', ['id'])
+
+    _create_table('intent_signals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('workspace_id', sa.Integer()),
+        sa.Column('lead_run_id', sa.Integer()),
+        sa.Column('company_id', sa.Integer()),
+        sa.Column('source_type', sa.String(), nullable=False),
+        sa.Column('source_url', sa.Text(), nullable=False),
+        sa.Column('job_title', sa.String()),
+        sa.Column('job_location', sa.String()),
+        sa.Column('posted_date', sa.DateTime(timezone=True)),
+        sa.Column('matched_skills', sa.JSON()),
+        sa.Column('matched_titles', sa.JSON()),
+        sa.Column('payload', sa.JSON()),
+        sa.Column('first_seen_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['lead_run_id'], ['lead_runs.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_intent_signals_id', 'intent_signals', ['id'])
+
+    _create_table('lead_run_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('lead_run_id', sa.Integer(), nullable=False),
+        sa.Column('lead_id', sa.Integer(), nullable=False),
+        sa.Column('source_type', sa.String()),
+        sa.Column('source_url', sa.Text()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['lead_run_id'], ['lead_runs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_lead_run_items_id', 'lead_run_items', ['id'])
+
+    _create_table('proposals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String()),
+        sa.Column('status', sa.String()),
+        sa.Column('content', sa.Text()),
+        sa.Column('total_amount', sa.Float()),
+        sa.Column('deal_id', sa.Integer()),
+        sa.Column('lead_id', sa.Integer()),
+        sa.Column('pdf_path', sa.String()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['deal_id'], ['deals.id']),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_proposals_id', 'proposals', ['id'])
+    _create_index('ix_proposals_title', 'proposals', ['title'])
+
+    _create_table('sources',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.Integer(), nullable=False),
+        sa.Column('workspace_id', sa.Integer()),
+        sa.Column('lead_run_id', sa.Integer()),
+        sa.Column('company_id', sa.Integer()),
+        sa.Column('source_type', sa.String(), nullable=False),
+        sa.Column('source_url', sa.Text(), nullable=False),
+        sa.Column('external_id', sa.String()),
+        sa.Column('payload', sa.JSON()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['company_id'], ['companies.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['lead_run_id'], ['lead_runs.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_sources_id', 'sources', ['id'])
+
+    _create_table('tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String()),
+        sa.Column('type', sa.String()),
+        sa.Column('description', sa.String()),
+        sa.Column('is_completed', sa.Boolean()),
+        sa.Column('due_date', sa.DateTime(timezone=True)),
+        sa.Column('priority', sa.String()),
+        sa.Column('deal_id', sa.Integer()),
+        sa.Column('lead_id', sa.Integer()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+        sa.ForeignKeyConstraint(['deal_id'], ['deals.id']),
+        sa.ForeignKeyConstraint(['lead_id'], ['leads.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_tasks_id', 'tasks', ['id'])
+    _create_index('ix_tasks_title', 'tasks', ['title'])
+
+    _create_table('crawl_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('crawl_job_id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('http_status', sa.Integer()),
+        sa.Column('fetched_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('content_type', sa.String()),
+        sa.Column('content_hash', sa.String()),
+        sa.Column('extracted', sa.JSON()),
+        sa.ForeignKeyConstraint(['crawl_job_id'], ['crawl_jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    _create_index('ix_crawl_pages_id', 'crawl_pages', ['id'])
+
+
+def downgrade() -> None:
+    # Baseline: nothing earlier to return to
+    pass
@@ -0,0 +1,33 @@
+"""Revoked access tokens
+
+Revision ID: 0002_revoked_tokens
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002_revoked_tokens'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("token_hash", sa.String),
+        sa.Column("email", sa.String),
+        sa.Column("expires_at", sa.DateTime(timezone=True)),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_revoked_tokens_id", "revoked_tokens", ["id"])
+    op.create_index("ix_revoked_tokens_token_hash", "revoked_tokens", ["token_hash"], unique=True)
+    op.create_index("ix_revoked_tokens_email", "revoked_tokens", ["email"])
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,22 @@
+"""Follow-up schedule index
+
+Revision ID: 0003_follow_ups_schedule_index
+Revises: 0002_revoked_tokens
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_follow_ups_schedule_index'
+down_revision = '0002_revoked_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_follow_ups_scheduled_at_status", "follow_ups", ["scheduled_at", "status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_follow_ups_scheduled_at_status", table_name="follow_ups")
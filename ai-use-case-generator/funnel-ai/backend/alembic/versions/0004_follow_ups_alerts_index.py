@@ -0,0 +1,22 @@
+"""Follow-up due-alert index
+
+Revision ID: 0004_follow_ups_alerts_index
+Revises: 0003_follow_ups_schedule_index
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_follow_ups_alerts_index'
+down_revision = '0003_follow_ups_schedule_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_follow_ups_alerts", "follow_ups", ["status", "is_dismissed", "scheduled_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_follow_ups_alerts", table_name="follow_ups")
@@ -0,0 +1,40 @@
+"""Dashboard summary and daily series
+
+Revision ID: 0005_dashboard_rollups
+Revises: 0004_follow_ups_alerts_index
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005_dashboard_rollups'
+down_revision = '0004_follow_ups_alerts_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dashboard_summary",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("total_leads", sa.Integer),
+        sa.Column("pipeline_value", sa.Float),
+        sa.Column("pending_tasks", sa.Integer),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True)),
+    )
+    op.create_table(
+        "dashboard_daily",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("day", sa.Date, nullable=False),
+        sa.Column("metric", sa.String, nullable=False),
+        sa.Column("dimension", sa.String, nullable=False),
+        sa.Column("value", sa.Float),
+    )
+    op.create_index("ix_dashboard_daily_id", "dashboard_daily", ["id"])
+    op.create_index("ix_dashboard_daily_metric_day", "dashboard_daily", ["metric", "day", "dimension"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table("dashboard_daily")
+    op.drop_table("dashboard_summary")
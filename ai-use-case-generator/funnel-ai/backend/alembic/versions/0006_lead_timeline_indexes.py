@@ -0,0 +1,30 @@
+"""Lead timeline indexes
+
+Revision ID: 0006_lead_timeline_indexes
+Revises: 0005_dashboard_rollups
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_lead_timeline_indexes'
+down_revision = '0005_dashboard_rollups'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_lead_notes_lead_id_created_at", "lead_notes", ["lead_id", "created_at"]),
+    ("ix_follow_ups_lead_id_scheduled_at", "follow_ups", ["lead_id", "scheduled_at"]),
+    ("ix_deals_lead_id_created_at", "deals", ["lead_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,22 @@
+"""Pipeline board index on deals
+
+Revision ID: 0007_deals_stage_index
+Revises: 0006_lead_timeline_indexes
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007_deals_stage_index'
+down_revision = '0006_lead_timeline_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_deals_stage_id_id", "deals", ["stage_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_deals_stage_id_id", table_name="deals")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 import traceback
 from sqlalchemy.orm import Session
 from datetime import datetime
@@ -8,8 +8,14 @@ from ..models.crm import FollowUp, LeadNote
 from ..models.pipeline import Deal, Stage
 from ..schemas.actions import (
     ActionResponse, EmailRequest, SMSRequest, LinkedInRequest, 
-    PipelineAddRequest, FollowUpRequest, NoteRequest
+    PipelineAddRequest, FollowUpRequest, NoteRequest,
+    LeadSelection, BulkEmailRequest, BulkSMSRequest, BulkLinkedInRequest,
+    BulkPipelineAddRequest, BulkFollowUpRequest, BulkNoteRequest
 )
+from ..services.bulk_actions import BulkActionRunner, BULK_ACTION_MAX_IDS
+from ..services.job_heartbeat import claim_for_resume
+from ..services.scoring import apply_lead_score
+from .brand import get_cached_brand_settings
 
 router = APIRouter()
 
@@ -174,6 +180,7 @@ def add_note(request: NoteRequest, db: Session = Depends(get_db)):
 def mark_contacted(lead_id: int, db: Session = Depends(get_db)):
     lead = get_lead_or_404(db, lead_id)
     lead.status = "contacted"
+    apply_lead_score(lead, get_cached_brand_settings(db))
     
     # Update Contact Info
     lead.last_contacted_at = datetime.now()
@@ -188,3 +195,88 @@ def get_lead_details(lead_id: int, db: Session = Depends(get_db)):
     lead = get_lead_or_404(db, lead_id)
     # Could join with notes, followups etc here
     return lead
+
+# --- Bulk actions ---
+
+def _bulk_job_status(job):
+    progress = job.progress or {}
+    return {
+        "job_id": job.id,
+        "action": job.action_type,
+        "status": job.status,
+        "total": progress.get("total", 0),
+        "processed": progress.get("processed", 0),
+        "affected": progress.get("affected", progress.get("sent", 0)),
+        "error": job.error,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+def _selection(request: LeadSelection) -> dict:
+    if request.lead_ids is not None and len(request.lead_ids) > BULK_ACTION_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_ACTION_MAX_IDS} lead_ids per request; use a filter")
+    return request.model_dump(include={"lead_ids", "filter"}, exclude_none=True)
+
+def _queue_messages(channel: str, request: LeadSelection, params: dict, background_tasks: BackgroundTasks, db: Session):
+    runner = BulkActionRunner(db, user_id="system") # MVP user
+    job = runner.queue_messages(channel, _selection(request), params)
+    background_tasks.add_task(runner.process_job, job.id)
+    return _bulk_job_status(job)
+
+@router.post("/bulk/email")
+def bulk_send_email(request: BulkEmailRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Queue an email to every selected lead with an address; returns the job to poll."""
+    return _queue_messages("email", request, {"subject": request.subject, "body": request.body}, background_tasks, db)
+
+@router.post("/bulk/sms")
+def bulk_send_sms(request: BulkSMSRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Queue an SMS to every selected lead with a phone number."""
+    return _queue_messages("sms", request, {"message": request.message}, background_tasks, db)
+
+@router.post("/bulk/linkedin_dm")
+def bulk_send_linkedin_dm(request: BulkLinkedInRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    return _queue_messages("linkedin_dm", request, {"message": request.message}, background_tasks, db)
+
+@router.post("/bulk/pipeline/add")
+def bulk_add_to_pipeline(request: BulkPipelineAddRequest, db: Session = Depends(get_db)):
+    """One deal per selected lead without an open deal, in a single INSERT ... SELECT."""
+    job = BulkActionRunner(db, user_id="system").add_to_pipeline(_selection(request), request.stage_id)
+    if job is None:
+        raise HTTPException(status_code=400, detail="No pipeline stages defined")
+    return _bulk_job_status(job)
+
+@router.post("/bulk/followup/schedule")
+def bulk_schedule_followup(request: BulkFollowUpRequest, db: Session = Depends(get_db)):
+    params = request.model_dump(include={"scheduled_at", "notes", "title", "type"})
+    return _bulk_job_status(BulkActionRunner(db, user_id="system").schedule_followups(_selection(request), params))
+
+@router.post("/bulk/note/add")
+def bulk_add_note(request: BulkNoteRequest, db: Session = Depends(get_db)):
+    return _bulk_job_status(BulkActionRunner(db, user_id="system").add_notes(_selection(request), request.content))
+
+@router.post("/bulk/contacted")
+def bulk_mark_contacted(request: LeadSelection, db: Session = Depends(get_db)):
+    weights = get_cached_brand_settings(db)
+    return _bulk_job_status(BulkActionRunner(db, user_id="system").mark_contacted(_selection(request), weights))
+
+@router.get("/bulk/jobs/{job_id}")
+def get_bulk_job(job_id: int, db: Session = Depends(get_db)):
+    job = BulkActionRunner(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk action job not found")
+    return _bulk_job_status(job)
+
+@router.post("/bulk/jobs/{job_id}/resume")
+def resume_bulk_job(job_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Continue a failed send, or one whose worker died mid-run (no progress
+    for JOB_STALE_SECONDS), from its last committed chunk.
+    """
+    runner = BulkActionRunner(db, user_id="system")
+    job = runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk action job not found")
+    if not claim_for_resume(db, job):
+        raise HTTPException(status_code=409, detail=f"Bulk action job is {job.status}; only failed or stalled jobs can be resumed")
+    background_tasks.add_task(runner.process_job, job.id)
+    return _bulk_job_status(job)
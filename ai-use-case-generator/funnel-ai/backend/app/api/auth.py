@@ -1,10 +1,14 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..db.session import get_db
+from ..db.async_session import get_async_db
 from ..models.user import User
-from ..core.security import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..core.security import verify_password_async, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from .users import oauth2_scheme, revoke_token, invalidate_user
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -14,9 +18,9 @@ class Token(BaseModel):
     token_type: str
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    # ... (existing login logic) ...
-    user = db.query(User).filter(User.email == form_data.username).first()
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # bcrypt runs on its own bounded pool (core/security.py); a full pool answers 503
+    user = (await db.execute(select(User).where(User.email == form_data.username))).scalars().first()
     if not user or not user.hashed_password:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,7 +28,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(form_data.password, user.hashed_password):
+    if not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -37,15 +41,20 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.post("/logout")
+def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    revoke_token(db, token)
+    return {"message": "Logged out"}
+
 from pydantic import EmailStr
 class ForgotPasswordRequest(BaseModel):
     email: EmailStr
 
 @router.post("/forgot-password")
-async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(get_db)):
+async def forgot_password(request: ForgotPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         print(f"DEBUG: Processing forgot password for {request.email}")
-        user = db.query(User).filter(User.email == request.email).first()
+        user = (await db.execute(select(User).where(User.email == request.email))).scalars().first()
         if not user:
             print("DEBUG: User not found")
             return {"message": "If this email exists, a reset link has been sent."}
@@ -72,10 +81,10 @@ class ResetPasswordRequest(BaseModel):
     new_password: str
 
 from jose import JWTError, jwt
-from ..core.security import SECRET_KEY, ALGORITHM, get_password_hash
+from ..core.security import SECRET_KEY, ALGORITHM, get_password_hash_async
 
 @router.post("/reset-password")
-async def reset_password(request: ResetPasswordRequest, db: Session = Depends(get_db)):
+async def reset_password(request: ResetPasswordRequest, db: AsyncSession = Depends(get_async_db)):
     try:
         payload = jwt.decode(request.token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -87,11 +96,12 @@ async def reset_password(request: ResetPasswordRequest, db: Session = Depends(ge
     except JWTError:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
         
-    user = db.query(User).filter(User.email == email).first()
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    user.hashed_password = get_password_hash(request.new_password)
-    db.commit()
+    user.hashed_password = await get_password_hash_async(request.new_password)
+    await db.commit()
+    invalidate_user(user.email)
     
     return {"message": "Password updated successfully"}
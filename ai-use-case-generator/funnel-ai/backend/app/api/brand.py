@@ -4,16 +4,21 @@ from typing import List, Optional
 from ..db.session import get_db
 from ..models.brand import BrandSettings
 from ..models.user import User
+from ..services.scoring import WEIGHT_FIELDS, rescore_leads
 from pydantic import BaseModel
 import shutil
 import os
-import requests
-from bs4 import BeautifulSoup
 from collections import Counter
 import re
+import threading
+import time
+from types import SimpleNamespace
 
 router = APIRouter()
 
+# Seconds a worker trusts its cached settings before re-checking the version stamp
+BRAND_CACHE_TTL_SECONDS = float(os.getenv("BRAND_CACHE_TTL_SECONDS", "5"))
+
 class BrandBase(BaseModel):
     tone_value: int = 50
     length_value: int = 50
@@ -46,6 +51,7 @@ class DocumentRead(BaseModel):
 
 class BrandRead(BrandBase):
     id: int
+    settings_version: Optional[int] = None
     documents: List[DocumentRead] = []
     class Config:
         from_attributes = True
@@ -68,9 +74,7 @@ def ensure_default_user_exists(db: Session):
     return user
 
 def get_current_brand_settings(db: Session):
-    # MVP: Assume single user (ID 1)
-    ensure_default_user_exists(db)
-    
+    # MVP: Assume single user (ID 1), bootstrapped on startup (see main.py)
     settings = db.query(BrandSettings).filter(BrandSettings.user_id == 1).first()
     if not settings:
         # Create default if not exists
@@ -80,6 +84,45 @@ def get_current_brand_settings(db: Session):
         db.refresh(settings)
     return settings
 
+_settings_cache = {"snapshot": None, "version": None, "checked_at": 0.0}
+_settings_lock = threading.Lock()
+
+def _snapshot(settings: BrandSettings) -> SimpleNamespace:
+    # Detached copy so it can be shared across sessions and threads
+    return SimpleNamespace(**{c.name: getattr(settings, c.name) for c in BrandSettings.__table__.columns})
+
+def get_cached_brand_settings(db: Session) -> SimpleNamespace:
+    """
+    Read-only brand settings for hot paths (lead creation, import, scoring).
+    Served from memory; after BRAND_CACHE_TTL_SECONDS the settings_version
+    stamp is re-checked so edits made by other workers are picked up.
+    """
+    now = time.monotonic()
+    with _settings_lock:
+        snapshot = _settings_cache["snapshot"]
+        if snapshot is not None and now - _settings_cache["checked_at"] < BRAND_CACHE_TTL_SECONDS:
+            return snapshot
+        cached_version = _settings_cache["version"]
+
+    if snapshot is not None:
+        version = db.query(BrandSettings.settings_version).filter(BrandSettings.user_id == 1).scalar()
+        if version is not None and version == cached_version:
+            with _settings_lock:
+                _settings_cache["checked_at"] = now
+            return snapshot
+
+    snapshot = _snapshot(get_current_brand_settings(db))
+    with _settings_lock:
+        _settings_cache.update(snapshot=snapshot, version=snapshot.settings_version, checked_at=now)
+    return snapshot
+
+def invalidate_brand_settings_cache():
+    with _settings_lock:
+        _settings_cache.update(snapshot=None, version=None, checked_at=0.0)
+
+def _bump_version(settings: BrandSettings):
+    settings.settings_version = (settings.settings_version or 1) + 1
+
 @router.get("/me", response_model=BrandRead)
 def read_brand_settings(db: Session = Depends(get_db)):
     return get_current_brand_settings(db)
@@ -89,11 +132,22 @@ def update_brand_settings(details: BrandUpdate, db: Session = Depends(get_db)):
     settings = get_current_brand_settings(db)
     
     data = details.model_dump(exclude_unset=True)
+    weights_changed = any(
+        key in WEIGHT_FIELDS and getattr(settings, key) != value
+        for key, value in data.items()
+    )
     for key, value in data.items():
         setattr(settings, key, value)
+    _bump_version(settings)
     
     db.commit()
     db.refresh(settings)
+    invalidate_brand_settings_cache()
+
+    # Weight edits only recombine cached score components (single UPDATE)
+    if weights_changed:
+        rescore_leads(db, settings)
+        db.refresh(settings)
     return settings
 
 @router.post("/me/documents")
@@ -116,8 +170,10 @@ def upload_document(file: UploadFile = File(...), db: Session = Depends(get_db))
         "type": file.content_type
     })
     settings.documents = current_docs
+    _bump_version(settings)
     
     db.commit()
+    invalidate_brand_settings_cache()
     return {"status": "success", "file": file.filename}
 
 @router.delete("/me/documents/{filename}")
@@ -132,7 +188,9 @@ def delete_document(filename: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="File not found")
         
     settings.documents = updated_docs
+    _bump_version(settings)
     db.commit()
+    invalidate_brand_settings_cache()
     return {"status": "success"}
 
 @router.post("/extract-colors")
@@ -145,6 +203,9 @@ def extract_colors(item: dict):
         if not url.startswith('http'):
             url = 'https://' + url
             
+        # Imported here to keep requests/bs4 off the app import path
+        import requests
+        from bs4 import BeautifulSoup
         response = requests.get(url, timeout=10)
         soup = BeautifulSoup(response.content, 'html.parser')
         
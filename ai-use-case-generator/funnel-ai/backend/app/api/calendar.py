@@ -1,14 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from ..db.session import get_db
+from ..db.async_session import get_async_read_db, is_replica
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.crm import FollowUp
 from ..models.lead import Lead
+from ..core.cache import TTLCache
+from ..core.db_metrics import query_budget
+from ..services import followup_feed
+from ..services.ical_feed import ical_feed
+from ..models.user import User
+from ..core.security import create_access_token, SECRET_KEY, ALGORITHM
+from .users import get_current_user
+from fastapi.responses import StreamingResponse
+from email.utils import format_datetime, parsedate_to_datetime
+from jose import jwt, JWTError
 from pydantic import BaseModel
+from pydantic_core import to_json
+import hashlib
+import os
 
 router = APIRouter()
 
+# Longest window /events will serve (the month view asks for ~3 months)
+CALENDAR_MAX_WINDOW_DAYS = int(os.getenv("CALENDAR_MAX_WINDOW_DAYS", "100"))
+# Per-window response cache; entries also drop as soon as a follow-up changes in this worker
+CALENDAR_CACHE_SIZE = int(os.getenv("CALENDAR_CACHE_SIZE", "256"))
+CALENDAR_CACHE_TTL_SECONDS = float(os.getenv("CALENDAR_CACHE_TTL_SECONDS", "60"))
+
+# (start, end) -> (feed version, etag, JSON body)
+_events_cache = TTLCache(CALENDAR_CACHE_SIZE, CALENDAR_CACHE_TTL_SECONDS)
+
+# Lifetime of the signed per-user iCal URLs from /sync/ical/link
+ICAL_FEED_TOKEN_DAYS = int(os.getenv("ICAL_FEED_TOKEN_DAYS", "365"))
+ICAL_TOKEN_TYPE = "ical"
+
 class CalendarEvent(BaseModel):
     id: int
     title: str
@@ -110,76 +139,121 @@ def delete_event(event_id: int, db: Session = Depends(get_db)):
     return {"status": "success", "message": "Event deleted"}
 
 @router.get("/events", response_model=List[CalendarEvent])
-def read_events(
-    start: Optional[datetime] = None, 
-    end: Optional[datetime] = None, 
-    db: Session = Depends(get_db)
+@query_budget(1)
+async def read_events(
+    request: Request,
+    start: datetime = Query(..., description="Window start (inclusive)"),
+    end: datetime = Query(..., description=f"Window end (inclusive), at most {CALENDAR_MAX_WINDOW_DAYS} days after start"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    query = db.query(FollowUp).options(joinedload(FollowUp.lead))
-    
-    # Filter by date range if provided
-    if start:
-        query = query.filter(FollowUp.scheduled_at >= start)
-    if end:
-        query = query.filter(FollowUp.scheduled_at <= end)
-        
-    # Exclude dismissed? Maybe user wants to see them but marked done?
-    # query = query.filter(FollowUp.is_dismissed == False) 
-    
-    followups = query.all()
-    
+    """
+    Follow-ups scheduled inside [start, end]. Responses are cached per window
+    until a follow-up changes (services/followup_feed.py) and carry an ETag,
+    so an unchanged re-fetch with If-None-Match is a 304 without a query.
+    Bodies read from a replica are served but not cached: the feed version
+    is the primary's, and a lagging replica may not have caught up to it.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if end - start > timedelta(days=CALENDAR_MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window is limited to {CALENDAR_MAX_WINDOW_DAYS} days")
+
+    key = (start.isoformat(), end.isoformat())
+    cached = _events_cache.get(key)
+    if cached is None or cached[0] != followup_feed.version():
+        version = followup_feed.version()
+        body = await _render_events(db, start, end)
+        cached = (version, f'"{hashlib.sha1(body).hexdigest()}"', body)
+        if not is_replica(db):
+            _events_cache.set(key, cached)
+
+    _, etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def _render_events(db: AsyncSession, start: datetime, end: datetime) -> bytes:
+    # Only the columns the calendar shows; served by ix_follow_ups_scheduled_at_status
+    query = (
+        select(FollowUp.id, FollowUp.title, FollowUp.type, FollowUp.scheduled_at, FollowUp.status,
+               FollowUp.lead_id, func.substr(FollowUp.notes, 1, 20).label("notes_head"),
+               Lead.id.label("lead_pk"), Lead.first_name, Lead.last_name)
+        .outerjoin(Lead, Lead.id == FollowUp.lead_id)
+        .where(FollowUp.scheduled_at >= start, FollowUp.scheduled_at <= end)
+        .order_by(FollowUp.scheduled_at)
+    )
     events = []
-    for f in followups:
-        # Default title if missing
-        default_title = f"{f.type.capitalize()} with {f.lead.first_name} {f.lead.last_name}" if f.lead else f"{f.type.capitalize()}: {f.notes[:20] if f.notes else 'No details'}"
-        evt_title = f.title if f.title else default_title
-        
-        events.append(CalendarEvent(
-            id=f.id,
-            title=evt_title,
-            start=f.scheduled_at,
-            type=f.type or 'task',
-            status=f.status,
-            lead_id=f.lead_id,
-            lead_name=f"{f.lead.first_name} {f.lead.last_name}" if f.lead else "General Task"
-        ))
-        
-    return events
+    for row in await db.execute(query):
+        kind = row.type or "task"
+        if row.lead_pk is not None:
+            lead_name = f"{row.first_name} {row.last_name}"
+            default_title = f"{kind.capitalize()} with {lead_name}"
+        else:
+            lead_name = "General Task"
+            default_title = f"{kind.capitalize()}: {row.notes_head or 'No details'}"
+        events.append({
+            "id": row.id,
+            "title": row.title or default_title,
+            "start": row.scheduled_at,
+            "end": None,
+            "allDay": False,
+            "type": kind,
+            "status": row.status,
+            "lead_id": row.lead_id,
+            "lead_name": lead_name,
+        })
+    # Same JSON encoding FastAPI/pydantic would produce for List[CalendarEvent]
+    return to_json(events)
+
+def _ical_response(request: Request, db: Session, filename: str):
+    chunks, etag, last_modified = ical_feed.snapshot(db)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match == etag:
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since"):
+        try:
+            if last_modified <= parsedate_to_datetime(request.headers["if-modified-since"]):
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return StreamingResponse(iter(chunks), media_type="text/calendar", headers=headers)
 
 @router.get("/sync/ical")
-def download_ical(db: Session = Depends(get_db)):
+@query_budget(1)
+def download_ical(request: Request, db: Session = Depends(get_db)):
     """
-    Generate iCal feed for all pending tasks
+    Generate iCal feed for all pending tasks.
+    Served from services/ical_feed.py; unchanged polls get a 304 without a query.
     """
-    from fastapi.responses import Response
-    
-    followups = db.query(FollowUp).options(joinedload(FollowUp.lead)).filter(FollowUp.status == 'pending').all()
-    
-    ical_content = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//Funnel.ai//Calendar//EN",
-        "CALSCALE:GREGORIAN",
-    ]
-    
-    for f in followups:
-        dt_start = f.scheduled_at.strftime('%Y%m%dT%H%M%SZ') # UTC
-        # Assume 1 hour duration
-        # dt_end = ... 
-        
-        summary = f.title if f.title else (f"{f.type.capitalize() or 'Task'}: {f.lead.first_name} {f.lead.last_name}" if f.lead else f"{f.type.capitalize()}: General Task")
-        description = f.notes or ""
-        
-        ical_content.extend([
-            "BEGIN:VEVENT",
-            f"UID:funnel-task-{f.id}@funnel.ai",
-            f"DTSTAMP:{dt_start}",
-            f"DTSTART:{dt_start}",
-            f"SUMMARY:{summary}",
-            f"DESCRIPTION:{description}",
-            "END:VEVENT"
-        ])
-        
-    ical_content.append("END:VCALENDAR")
-    
-    return Response(content="\r\n".join(ical_content), media_type="text/calendar", headers={"Content-Disposition": "attachment; filename=tasks.ics"})
+    return _ical_response(request, db, "tasks.ics")
+
+@router.get("/sync/ical/link")
+def ical_feed_link(current_user: User = Depends(get_current_user)):
+    """Personal feed URL for calendar apps, which cannot send a bearer token."""
+    token = create_access_token(data={"sub": current_user.email, "type": ICAL_TOKEN_TYPE},
+                                expires_delta=timedelta(days=ICAL_FEED_TOKEN_DAYS))
+    return {"url": f"/api/calendar/sync/ical/{token}.ics", "expires_in_days": ICAL_FEED_TOKEN_DAYS}
+
+@router.get("/sync/ical/{feed_token}.ics")
+@query_budget(1)
+def download_user_ical(feed_token: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Per-user feed. The signed token is checked without a database lookup;
+    follow-ups are not owned per user yet, so every user's feed is the
+    shared cached calendar.
+    """
+    try:
+        payload = jwt.decode(feed_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    if payload.get("type") != ICAL_TOKEN_TYPE or not payload.get("sub"):
+        raise HTTPException(status_code=404, detail="Feed not found")
+    return _ical_response(request, db, "tasks.ics")
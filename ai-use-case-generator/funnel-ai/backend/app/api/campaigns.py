@@ -7,6 +7,7 @@ from ..models.lead import Lead as LeadModel
 from ..schemas.campaign import Campaign, CampaignCreate, CampaignUpdate, CampaignStepCreate, CampaignStep, CampaignLeadCreate, CampaignStepUpdate
 from ..schemas.campaign import Campaign, CampaignCreate, CampaignUpdate, CampaignStepCreate, CampaignStep, CampaignLeadCreate, CampaignStepUpdate
 from ..services.campaign_runner import CampaignRunner
+from ..core.db_metrics import query_budget
 import traceback
 
 router = APIRouter()
@@ -92,6 +93,7 @@ def update_step(campaign_id: int, step_id: int, step_update: CampaignStepUpdate,
 # --- Leads Management ---
 
 @router.post("/{campaign_id}/leads", response_model=int)
+@query_budget(6)
 def search_and_add_leads(campaign_id: int, lead_ids: List[int], db: Session = Depends(get_db)):
     """
     Adds multiple leads to a campaign. Returns count of added leads.
@@ -105,11 +107,15 @@ def search_and_add_leads(campaign_id: int, lead_ids: List[int], db: Session = De
     steps = sorted(campaign.steps, key=lambda s: s.order)
     first_step_id = steps[0].id if steps else None
 
+    # One lookup for leads already enrolled instead of one per id
+    enrolled = {lid for (lid,) in db.query(CampaignLeadModel.lead_id).filter(
+        CampaignLeadModel.campaign_id == campaign_id,
+        CampaignLeadModel.lead_id.in_(lead_ids)
+    )} if lead_ids else set()
+
     count = 0
-    for lid in lead_ids:
-        # Check if already exists
-        exists = db.query(CampaignLeadModel).filter(CampaignLeadModel.campaign_id == campaign_id, CampaignLeadModel.lead_id == lid).first()
-        if not exists:
+    for lid in dict.fromkeys(lead_ids):
+        if lid not in enrolled:
             # Create new CampaignLead entry
             # In a real system, we'd calculate 'next_run_at' based on schedule. For now, immediate.
             cl = CampaignLeadModel(
@@ -1,26 +1,79 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..db.session import get_db
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from datetime import datetime, timedelta, timezone
+from ..db.async_session import get_async_read_db
 from ..models.lead import Lead
-from ..models.pipeline import Deal
+from ..models.pipeline import Deal, Stage
 from ..models.crm import FollowUp
+from ..models.metrics import DashboardSummary, DashboardDaily
+from ..core.db_metrics import query_budget
+from ..services.dashboard_rollup import METRICS, PIPELINE_VALUE
 
 router = APIRouter()
 
 @router.get("/stats")
-def get_dashboard_stats(db: Session = Depends(get_db)):
+@query_budget(4) # 1 once the summary row exists
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Headline counters from the dashboard_summary row, kept fresh by the
+    dashboard-rollup worker; one primary-key read however big the tables get.
+    """
+    summary = await db.get(DashboardSummary, 1)
+    if summary is None:
+        # Before the worker's first refresh (fresh deploy): compute live once
+        return await _live_stats(db)
+    return {
+        "total_leads": summary.total_leads,
+        "pipeline_value": summary.pipeline_value,
+        "pending_tasks": summary.pending_tasks,
+        "refreshed_at": summary.refreshed_at,
+    }
+
+async def _live_stats(db: AsyncSession):
     # 1. Total Leads
-    total_leads = db.query(func.count(Lead.id)).scalar()
+    total_leads = await db.scalar(select(func.count(Lead.id)))
 
     # 2. Pipeline Value (Sum of all deal values)
-    pipeline_value = db.query(func.sum(Deal.value)).scalar() or 0.0
+    pipeline_value = await db.scalar(select(func.sum(Deal.value))) or 0.0
 
     # 3. Pending Tasks
-    pending_tasks = db.query(func.count(FollowUp.id)).filter(FollowUp.status == 'pending').scalar()
+    pending_tasks = await db.scalar(select(func.count(FollowUp.id)).where(FollowUp.status == 'pending'))
 
     return {
         "total_leads": total_leads,
         "pipeline_value": pipeline_value,
-        "pending_tasks": pending_tasks
+        "pending_tasks": pending_tasks,
+        "refreshed_at": None,
+    }
+
+@router.get("/timeseries")
+@query_budget(2)
+async def get_dashboard_timeseries(
+    metric: str = Query(..., pattern=f"^({'|'.join(METRICS)})$"),
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Daily series from dashboard_daily: leads created per day, or pipeline
+    value per stage (snapshots taken by the rollup worker, so stage history
+    starts when the worker first ran).
+    """
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    rows = (await db.execute(
+        select(DashboardDaily.day, DashboardDaily.dimension, DashboardDaily.value)
+        .where(DashboardDaily.metric == metric, DashboardDaily.day >= since)
+        .order_by(DashboardDaily.day, DashboardDaily.dimension)
+    )).all()
+
+    labels = {}
+    if metric == PIPELINE_VALUE:
+        labels = {str(stage_id): name for stage_id, name in await db.execute(select(Stage.id, Stage.name))}
+    return {
+        "metric": metric,
+        "since": since,
+        "points": [
+            {"day": day, "value": value, **({"stage_id": dimension, "stage": labels.get(dimension)} if metric == PIPELINE_VALUE else {})}
+            for day, dimension, value in rows
+        ],
     }
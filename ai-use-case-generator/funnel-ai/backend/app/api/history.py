@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Any
+from typing import Optional
 from datetime import datetime
-from ..db.session import get_db
-from ..models.crm import FollowUp, LeadNote
-from ..models.pipeline import Deal
+from ..db.session import get_read_db
+from ..core.db_metrics import query_budget
+from ..services.lead_timeline import KINDS, fetch_page, to_activity
 from enum import Enum
+import os
+
+HISTORY_MAX_LIMIT = int(os.getenv("HISTORY_MAX_LIMIT", "200"))
 
 router = APIRouter()
 
@@ -14,55 +17,46 @@ class ActivityType(str, Enum):
     FollowUp = "followup"
     DEAL = "deal"
 
+def _parse_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        date, kind, activity_id = cursor.rsplit("|", 2)
+        if kind not in KINDS:
+            raise ValueError(kind)
+        return datetime.fromisoformat(date), kind, int(activity_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _parse_kinds(kinds: Optional[str]):
+    if not kinds:
+        return KINDS
+    requested = {kind.strip() for kind in kinds.split(",") if kind.strip()}
+    unknown = requested - set(KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown activity kinds: {', '.join(sorted(unknown))}")
+    return requested
+
 @router.get("/{lead_id}")
-def get_lead_history(lead_id: int, db: Session = Depends(get_db)):
+@query_budget(1)
+def get_lead_history(
+    lead_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    kinds: Optional[str] = Query(None, description="Comma-separated subset of note,followup,deal"),
+    db: Session = Depends(get_read_db),
+):
     """
     Fetch aggregated history for a lead:
     - Notes (including auto-logged emails/SMS)
     - Follow-ups
     - Pipeline Deals
-    Sorted by date desc.
+    Sorted by date desc, one page at a time; the next page's cursor comes
+    back in the X-Next-Cursor header.
     """
-    history = []
-
-    # 1. Fetch Notes
-    notes = db.query(LeadNote).filter(LeadNote.lead_id == lead_id).all()
-    for n in notes:
-        history.append({
-            "id": n.id,
-            "type": "note",
-            "content": n.content,
-            "date": n.created_at,
-            "icon": "FileEdit"
-        })
-
-    # 2. Fetch Follow-ups
-    followups = db.query(FollowUp).filter(FollowUp.lead_id == lead_id).all()
-    for f in followups:
-        # Use title if available, else standard fallback
-        desc = f.title if f.title else (f.notes or "Scheduled Follow-up")
-        
-        history.append({
-            "id": f.id,
-            "type": f.type or "followup", # use specific type like 'call', 'meeting'
-            "content": f"{f.status.capitalize()} {f.type.capitalize()}: {desc}",
-            "date": f.scheduled_at, 
-            "status": f.status,
-            "icon": "Calendar"
-        })
-        
-    # 3. Fetch Deals
-    deals = db.query(Deal).filter(Deal.lead_id == lead_id).all()
-    for d in deals:
-         history.append({
-            "id": d.id,
-            "type": "deal",
-            "content": f"Deal created: {d.title} (${d.value})",
-            "date": d.created_at,
-            "icon": "Briefcase"
-        })
-
-    # Sort by date descending (newest first)
-    history.sort(key=lambda x: x['date'] or datetime.min, reverse=True)
-    
-    return history
+    page, next_cursor = fetch_page(db, lead_id, limit, _parse_cursor(cursor), _parse_kinds(kinds))
+    if next_cursor is not None:
+        date, kind, activity_id = next_cursor
+        response.headers["X-Next-Cursor"] = f"{date.isoformat()}|{kind}|{activity_id}"
+    return [to_activity(row) for row in page]
@@ -1,17 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from ..db.session import get_db
+from ..db.async_session import get_async_db
 from ..models.lead import Lead as LeadModel
 from ..models.crm import LeadNote as LeadNoteModel
-from ..schemas.lead import Lead, LeadCreate, LeadUpdate, LeadNote, LeadNoteCreate
-from ..services.scoring import calculate_lead_score
+from ..schemas.lead import Lead, LeadCreate, LeadUpdate, LeadNote, LeadNoteCreate, DedupeCandidate, DedupeMatch
+from ..services.scoring import apply_lead_score, SCORE_INPUT_FIELDS
+from ..services.dedupe import compute_match_keys, apply_match_keys, find_existing, BLOCKING_KEYS, email_owner, drop_taken_emails
 from ..models.brand import BrandSettings
-from .brand import get_current_brand_settings
-from .users import get_current_user
+from .brand import get_cached_brand_settings
+from .users import get_current_user, get_current_user_async, invalidate_user
 from ..models.user import User as UserModel
+from ..core.db_metrics import query_budget
+from ..services.dashboard_rollup import mark_dirty
 
 router = APIRouter()
 
@@ -21,7 +26,8 @@ from datetime import datetime, date
 from typing import Optional
 
 @router.get("/", response_model=List[Lead])
-def read_leads(
+@query_budget(5)
+async def read_leads(
     skip: int = 0, 
     limit: int = 100, 
     status: Optional[str] = None,
@@ -31,21 +37,21 @@ def read_leads(
     sort_by: str = "created_at",
     sort_order: str = "desc",
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: UserModel = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserModel = Depends(get_current_user_async)
 ):
-    query = db.query(LeadModel)
+    query = select(LeadModel)
     
     if status:
-        query = query.filter(LeadModel.status == status)
+        query = query.where(LeadModel.status == status)
     if source:
-        query = query.filter(LeadModel.source == source)
+        query = query.where(LeadModel.source == source)
     if min_score is not None:
-        query = query.filter(LeadModel.score >= min_score)
+        query = query.where(LeadModel.score >= min_score)
     if search:
         # Simple search across name and company
         search_term = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             (LeadModel.first_name.ilike(search_term)) |
             (LeadModel.last_name.ilike(search_term)) |
             (LeadModel.company.ilike(search_term))
@@ -53,7 +59,7 @@ def read_leads(
 
     if next_action_before:
         # Leads with pending followups due on or before date
-        query = query.join(FollowUp).filter(
+        query = query.join(FollowUp).where(
             FollowUp.status == 'pending',
             FollowUp.scheduled_at <= datetime.combine(next_action_before, datetime.max.time())
         ).distinct()
@@ -69,19 +75,21 @@ def read_leads(
         # Fallback default
         query = query.order_by(LeadModel.created_at.desc())
         
-    leads = query.offset(skip).limit(limit).all()
+    leads = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
     
-    # Populate next_scheduled_action manually for each lead
-    # Efficient approach would be a join, but simple loop is fine for MVP limit=100
-    for lead in leads:
-        next_followup = db.query(FollowUp).filter(
-            FollowUp.lead_id == lead.id, 
-            FollowUp.status == 'pending',
-            FollowUp.scheduled_at >= datetime.now()
-        ).order_by(FollowUp.scheduled_at.asc()).first()
+    # Populate next_scheduled_action: one grouped query for the whole page
+    if leads:
+        next_actions = dict((await db.execute(
+            select(FollowUp.lead_id, func.min(FollowUp.scheduled_at)).where(
+                FollowUp.lead_id.in_([lead.id for lead in leads]),
+                FollowUp.status == 'pending',
+                FollowUp.scheduled_at >= datetime.now()
+            ).group_by(FollowUp.lead_id)
+        )).all())
         
-        if next_followup:
-            lead.next_scheduled_action = next_followup.scheduled_at
+        for lead in leads:
+            if lead.id in next_actions:
+                lead.next_scheduled_action = next_actions[lead.id]
             
     return leads
 
@@ -89,45 +97,34 @@ def read_leads(
 @router.post("/", response_model=Lead)
 def create_lead(lead: LeadCreate, force: bool = False, db: Session = Depends(get_db), current_user: UserModel = Depends(get_current_user)):
     try:
-        # 1. Fetch current user (MVP: ID=1)
+        # 1. Current user: a cached read-only snapshot; usage writes below go straight to the row
         user = current_user
+        usage_leads_weekly = user.usage_leads_weekly or 0
         business_type = user.business_type if user else "b2b"
         
         # 2. Validation Logic
-        # Check for duplicate email
-        if lead.email:
-            existing_lead = db.query(LeadModel).filter(LeadModel.email == lead.email).first()
-            if existing_lead:
-                if existing_lead.disqualification_reason:
-                    if force:
-                        # Reactivate lead
-                        existing_lead.status = "new"
-                        existing_lead.disqualification_reason = None
-                        existing_lead.disqualified_at = None
-                        existing_lead.lifecycle_stage = "Prospect - Cold" # Reset stage
-                        db.commit()
-                        db.refresh(existing_lead)
-                        return existing_lead
-                    else:
-                        raise HTTPException(
-                            status_code=409, 
-                            detail=f"Lead previously disqualified on {existing_lead.disqualified_at.date() if existing_lead.disqualified_at else 'unknown date'}: {existing_lead.disqualification_reason}"
-                        )
+        # Duplicate check (email, then name + company) via the match-key index
+        match = find_existing(db, [compute_match_keys(lead.first_name, lead.last_name, lead.company, lead.email, lead.phone)])[0]
+        if match:
+            existing_lead, matched_on = match
+            if existing_lead.disqualification_reason:
+                if force and matched_on == "email_key":
+                    # Reactivate lead
+                    existing_lead.status = "new"
+                    existing_lead.disqualification_reason = None
+                    existing_lead.disqualified_at = None
+                    existing_lead.lifecycle_stage = "Prospect - Cold" # Reset stage
+                    apply_lead_score(existing_lead, get_cached_brand_settings(db))
+                    db.commit()
+                    db.refresh(existing_lead)
+                    return existing_lead
+                raise HTTPException(
+                    status_code=409, 
+                    detail=f"Lead previously disqualified on {existing_lead.disqualified_at.date() if existing_lead.disqualified_at else 'unknown date'}: {existing_lead.disqualification_reason}"
+                )
+            if matched_on == "email_key":
                 raise HTTPException(status_code=400, detail=f"A lead with email {lead.email} already exists.")
-                
-        # Check for duplicate name (First + Last)
-        if lead.first_name and lead.last_name:
-            existing_name = db.query(LeadModel).filter(
-                LeadModel.first_name == lead.first_name, 
-                LeadModel.last_name == lead.last_name
-            ).first()
-            if existing_name:
-                if existing_name.disqualification_reason:
-                    raise HTTPException(
-                        status_code=409, 
-                        detail=f"Lead previously disqualified on {existing_name.disqualified_at.date() if existing_name.disqualified_at else 'unknown date'}: {existing_name.disqualification_reason}"
-                    )
-                raise HTTPException(status_code=400, detail=f"A lead with name {lead.first_name} {lead.last_name} already exists.")
+            raise HTTPException(status_code=400, detail=f"A lead with name {lead.first_name} {lead.last_name} already exists.")
 
         if business_type == "b2b":
             if not lead.company or not lead.title:
@@ -151,9 +148,11 @@ def create_lead(lead: LeadCreate, force: bool = False, db: Session = Depends(get
              # Assuming UTC/Server time consistency
              days_diff = (datetime.now() - user.usage_reset_at).days
              if days_diff >= 7:
-                 user.usage_leads_weekly = 0
-                 user.usage_reset_at = datetime.now()
+                 db.query(UserModel).filter(UserModel.id == user.id).update(
+                     {"usage_leads_weekly": 0, "usage_reset_at": datetime.now()}, synchronize_session=False)
                  db.commit()
+                 invalidate_user(user.email)
+                 usage_leads_weekly = 0
                  
         # Get Weekly Limit logic
         user_tier = (user.plan_tier or "free").lower().strip()
@@ -164,7 +163,7 @@ def create_lead(lead: LeadCreate, force: bool = False, db: Session = Depends(get
         
         # Only count 'sourced' leads towards limit (scraper or maybe csv?)
         # Let's count ALL new leads for simplicity as per "1000 leads/run/week" implies volume constraint
-        if user.usage_leads_weekly >= weekly_limit:
+        if usage_leads_weekly >= weekly_limit:
              raise HTTPException(
                 status_code=402, # Payment Required/Limit Exceeded
                 detail=f"Weekly lead limit of {weekly_limit} reached. Upgrade your plan to add more leads."
@@ -173,28 +172,33 @@ def create_lead(lead: LeadCreate, force: bool = False, db: Session = Depends(get
         db_lead = LeadModel(**lead.model_dump())
         
         # Apply scoring
-        weights = get_current_brand_settings(db)
-        db_lead.score = calculate_lead_score(db_lead, weights)
+        weights = get_cached_brand_settings(db)
+        apply_lead_score(db_lead, weights)
         
         db.add(db_lead)
         
         # AUTO-ENRICHMENT for Scraper Leads
         # "Enrich -> fill emails/phones/contact pages"
         if lead.source and lead.source.startswith("scraper_"):
-            from ..services.enrichment import enrich_lead_service
+            from ..services.enrichment import enrich_lead_service, apply_enrichment
             # Need to commit first to get ID? usually not for object-level changes but safe to flush
             db.flush() 
             updates = enrich_lead_service(db_lead)
-            for key, value in updates.items():
-                setattr(db_lead, key, value)
+            if updates is not None:
+                drop_taken_emails(db, [(db_lead, updates)])
+                apply_enrichment(db_lead, updates)
+                db_lead.last_enriched_at = datetime.now()
                 
-            # Recalculate score after enrichment?
-            db_lead.score = calculate_lead_score(db_lead, weights)
+                # Recalculate score after enrichment?
+                apply_lead_score(db_lead, weights)
         
-        # Increment Usage
-        user.usage_leads_weekly += 1
+        # Increment Usage (in SQL, so concurrent creates don't lose counts)
+        db.query(UserModel).filter(UserModel.id == user.id).update(
+            {"usage_leads_weekly": func.coalesce(UserModel.usage_leads_weekly, 0) + 1}, synchronize_session=False)
         
         db.commit()
+        # The limit check above must see the new count on the next request
+        invalidate_user(user.email)
         db.refresh(db_lead)
         return db_lead
     except HTTPException:
@@ -207,13 +211,28 @@ def create_lead(lead: LeadCreate, force: bool = False, db: Session = Depends(get
 
 @router.post("/recalculate")
 def recalculate_scores(db: Session = Depends(get_db)):
-    weights = get_current_brand_settings(db)
+    weights = get_cached_brand_settings(db)
     leads = db.query(LeadModel).all()
     for lead in leads:
-        lead.score = calculate_lead_score(lead, weights)
+        apply_lead_score(lead, weights)
     db.commit()
     return {"status": "success", "count": len(leads)}
 
+@router.post("/dedupe/check", response_model=List[DedupeMatch])
+def check_duplicates(candidates: List[DedupeCandidate], match_phone: bool = False, db: Session = Depends(get_db)):
+    """Which of these candidates already exist? Answered with a single query."""
+    keys = [compute_match_keys(c.first_name, c.last_name, c.company, c.email, c.phone) for c in candidates]
+    matches = find_existing(db, keys, BLOCKING_KEYS + (("phone_key",) if match_phone else ()))
+    return [
+        DedupeMatch(
+            index=i,
+            exists=match is not None,
+            lead_id=match[0].id if match else None,
+            matched_on=match[1] if match else None
+        )
+        for i, match in enumerate(matches)
+    ]
+
 @router.get("/{lead_id}", response_model=Lead)
 def read_lead(lead_id: int, db: Session = Depends(get_db)):
     lead = db.query(LeadModel).filter(LeadModel.id == lead_id).first()
@@ -228,9 +247,15 @@ def update_lead(lead_id: int, lead_update: LeadUpdate, db: Session = Depends(get
         raise HTTPException(status_code=404, detail="Lead not found")
         
     update_data = lead_update.model_dump(exclude_unset=True)
+    if update_data.get("email"):
+        owner = email_owner(db, update_data["email"], exclude_id=lead_id)
+        if owner is not None:
+            raise HTTPException(status_code=409, detail=f"Lead {owner} already has email {update_data['email']}.")
     
     for key, value in update_data.items():
         setattr(db_lead, key, value)
+    if SCORE_INPUT_FIELDS & update_data.keys():
+        apply_lead_score(db_lead, get_cached_brand_settings(db))
         
     db.add(db_lead)
     db.commit()
@@ -250,6 +275,7 @@ def disqualify_lead(lead_id: int, request: DisqualifyRequest, db: Session = Depe
     lead.lifecycle_stage = "Disqualified"
     lead.disqualification_reason = request.reason
     lead.disqualified_at = datetime.now()
+    apply_lead_score(lead, get_cached_brand_settings(db))
     
     db.commit()
     db.refresh(lead)
@@ -274,6 +300,7 @@ def create_lead_note(lead_id: int, note: LeadNoteCreate, db: Session = Depends(g
     return db_note
 
 @router.post("/import")
+@query_budget(10)
 async def import_leads_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """
     Import leads from CSV file.
@@ -289,9 +316,10 @@ async def import_leads_csv(file: UploadFile = File(...), db: Session = Depends(g
     decoded = contents.decode('utf-8')
     csv_reader = csv.DictReader(io.StringIO(decoded))
     
-    weights = get_current_brand_settings(db)
+    weights = get_cached_brand_settings(db)
     imported_count = 0
     errors = []
+    rows = []
     
     for row_num, row in enumerate(csv_reader, start=2):
         try:
@@ -338,38 +366,57 @@ async def import_leads_csv(file: UploadFile = File(...), db: Session = Depends(g
             if not lead_data['first_name'] and not lead_data['last_name']:
                 continue
                 
-            # Deduplication Check (CSV Import)
-            first_name = lead_data['first_name']
-            last_name = lead_data['last_name']
-            email = lead_data['email']
-            
-            duplicate_found = False
+            rows.append((row_num, lead_data))
             
-            # Check Email
-            if email:
-                 if db.query(LeadModel).filter(LeadModel.email == email).first():
-                     errors.append(f"Row {row_num}: Duplicate email ({email}) - Skipped")
-                     duplicate_found = True
-            
-            # Check Name if not already found duplicate by email
-            if not duplicate_found and first_name and last_name:
-                if db.query(LeadModel).filter(LeadModel.first_name == first_name, LeadModel.last_name == last_name).first():
-                    errors.append(f"Row {row_num}: Duplicate name ({first_name} {last_name}) - Skipped")
-                    duplicate_found = True
-                    
-            if duplicate_found:
+        except Exception as e:
+            errors.append(f"Row {row_num}: {str(e)}")
+    
+    # Deduplication Check (CSV Import): one lookup for the whole file,
+    # plus in-file duplicates tracked by the same match keys
+    candidates = [
+        compute_match_keys(d['first_name'], d['last_name'], d['company'], d['email'], d['phone'])
+        for _, d in rows
+    ]
+    matches = find_existing(db, candidates)
+    seen = {key: set() for key in BLOCKING_KEYS}
+    new_leads = []
+    
+    for (row_num, lead_data), keys, match in zip(rows, candidates, matches):
+        try:
+            matched_on = match[1] if match else next(
+                (key for key in BLOCKING_KEYS if keys[key] and keys[key] in seen[key]), None
+            )
+            if matched_on == "email_key":
+                errors.append(f"Row {row_num}: Duplicate email ({lead_data['email']}) - Skipped")
+                continue
+            if matched_on == "name_key":
+                errors.append(f"Row {row_num}: Duplicate name ({lead_data['first_name']} {lead_data['last_name']}) - Skipped")
                 continue
                 
+            linkedin_url = lead_data.pop('linkedin_url', None)
             db_lead = LeadModel(**lead_data)
-            db_lead.score = calculate_lead_score(db_lead, weights)
+            if linkedin_url:
+                db_lead.social_profiles = {"linkedin": linkedin_url}
+            apply_lead_score(db_lead, weights)
+            # bulk_save_objects skips ORM events, so set the match keys here
+            apply_match_keys(db_lead)
             
-            db.add(db_lead)
+            new_leads.append(db_lead)
             imported_count += 1
+            for key in BLOCKING_KEYS:
+                if keys[key]:
+                    seen[key].add(keys[key])
             
         except Exception as e:
             errors.append(f"Row {row_num}: {str(e)}")
     
     try:
+        # One executemany instead of an INSERT per row (no generated ids needed here).
+        # Runs of rows with the same non-null columns share a statement, so group them.
+        new_leads.sort(key=lambda lead: sorted(k for k, v in vars(lead).items() if v is not None and not k.startswith("_")))
+        db.bulk_save_objects(new_leads)
+        # bulk_save_objects skips mapper events, which is how the dashboard notices new leads
+        mark_dirty(db)
         db.commit()
     except Exception as e:
         db.rollback()
@@ -381,7 +428,10 @@ async def import_leads_csv(file: UploadFile = File(...), db: Session = Depends(g
         "errors": errors
     }
 
-from ..services.enrichment import enrich_lead_service
+from ..services.enrichment import enrich_lead_service, apply_enrichment
+from ..services.enrichment_jobs import EnrichmentJobRunner
+from ..services.job_heartbeat import claim_for_resume
+from fastapi import BackgroundTasks
 
 @router.post("/{lead_id}/enrich", response_model=Lead)
 def enrich_single_lead(lead_id: int, db: Session = Depends(get_db)):
@@ -391,40 +441,58 @@ def enrich_single_lead(lead_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Lead not found")
         
     updates = enrich_lead_service(lead)
-    
-    if not updates:
-        return lead # No changes
-        
-    for key, value in updates.items():
-        setattr(lead, key, value)
+    if updates is None:
+        raise HTTPException(status_code=502, detail="Enrichment provider unavailable, try again later")
+    lead.last_enriched_at = datetime.now()
+    drop_taken_emails(db, [(lead, updates)])
+    apply_enrichment(lead, updates)
+    if SCORE_INPUT_FIELDS & updates.keys():
+        apply_lead_score(lead, get_cached_brand_settings(db))
         
     db.commit()
     db.refresh(lead)
     return lead
 
-@router.post("/enrich/all")
-def enrich_all_leads(db: Session = Depends(get_db)):
-    """Bulk enrich all leads (Demo version)."""
-    leads = db.query(LeadModel).all()
-    count = 0
-    stats = {"emails": 0, "phones": 0, "linkedin": 0}
-    
-    for lead in leads:
-        updates = enrich_lead_service(lead)
-        if updates:
-            count += 1
-            if "email" in updates: stats["emails"] += 1
-            if "phone" in updates: stats["phones"] += 1
-            if "linkedin_url" in updates: stats["linkedin"] += 1
-            
-            for key, value in updates.items():
-                setattr(lead, key, value)
-    
-    if count > 0:
-        db.commit()
-        
+def _enrichment_job_status(job):
+    progress = job.progress or {}
     return {
-        "status": "success",
-        "enriched_count": count,
-        "details": stats
+        "job_id": job.id,
+        "status": job.status,
+        "total": progress.get("total", 0),
+        "processed": progress.get("processed", 0),
+        "enriched_count": progress.get("enriched", 0),
+        "details": progress.get("details", {"emails": 0, "phones": 0, "linkedin": 0}),
+        "error": job.error,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
     }
+
+@router.post("/enrich/all")
+def enrich_all_leads(background_tasks: BackgroundTasks, stale_days: Optional[int] = None, db: Session = Depends(get_db)):
+    """Start a background job enriching every lead not enriched in the last `stale_days`."""
+    runner = EnrichmentJobRunner(db, user_id="system") # MVP user
+    job = runner.start_job(stale_days=stale_days)
+    background_tasks.add_task(runner.process_job, job.id)
+    return _enrichment_job_status(job)
+
+@router.get("/enrich/jobs/{job_id}")
+def get_enrichment_job(job_id: int, db: Session = Depends(get_db)):
+    job = EnrichmentJobRunner(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Enrichment job not found")
+    return _enrichment_job_status(job)
+
+@router.post("/enrich/jobs/{job_id}/resume")
+def resume_enrichment_job(job_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Continue a failed job, or one whose worker died mid-run (no progress
+    for JOB_STALE_SECONDS), from its last committed chunk.
+    """
+    runner = EnrichmentJobRunner(db, user_id="system")
+    job = runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Enrichment job not found")
+    if not claim_for_resume(db, job):
+        raise HTTPException(status_code=409, detail=f"Enrichment job is {job.status}; only failed or stalled jobs can be resumed")
+    background_tasks.add_task(runner.process_job, job.id)
+    return _enrichment_job_status(job)
@@ -1,50 +1,95 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+from typing import Optional
 from ..db.session import get_db
-from ..models.crm import FollowUp, LeadNote
-from ..models.lead import Lead
+from ..db.async_session import get_async_read_db, AsyncSessionLocal
+from ..models.crm import FollowUp
+from ..core.db_metrics import query_budget
+from ..services.due_alerts import alerts_query, after_cursor, to_alert, unread_counter, broadcaster
+import asyncio
+import json
+import os
+
+NOTIFICATIONS_MAX_LIMIT = int(os.getenv("NOTIFICATIONS_MAX_LIMIT", "200"))
+# SSE: re-check the count at least this often (due-soon alerts appear as time passes)
+NOTIFICATIONS_STREAM_REFRESH_SECONDS = float(os.getenv("NOTIFICATIONS_STREAM_REFRESH_SECONDS", "30"))
 
 router = APIRouter()
 
+def _parse_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        scheduled_at, follow_up_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(scheduled_at), int(follow_up_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/")
-def get_notifications(db: Session = Depends(get_db)):
+@query_budget(2)
+async def get_notifications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=NOTIFICATIONS_MAX_LIMIT),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
     """
     Get system notifications/alerts, primarily due follow-ups.
+    Overdue and due-soon follow-ups, oldest first, one page at a time.
+    The next page's cursor and the total alert count come back as
+    X-Next-Cursor / X-Unread-Count headers; clients that keep
+    /notifications/stream open only need to call this when it fires.
     """
-    alerts = []
-    
-    # Check for overdue or due today follow-ups
     now = datetime.now()
-    pending_followups = db.query(FollowUp).join(Lead).filter(
-        FollowUp.status == 'pending',
-        FollowUp.is_dismissed == False
-    ).all()
-    
-    for f in pending_followups:
-        time_diff = (f.scheduled_at - now).total_seconds()
-        
-        # If overdue (negative time_diff) or due within next 24 hours
-        if time_diff < 0:
-            alerts.append({
-                "id": f.id,
-                "type": "overdue_task",
-                "severity": "high",
-                "message": f"Overdue: Follow up with {f.lead.first_name} {f.lead.last_name}",
-                "context_id": f.lead_id,
-                "timestamp": f.scheduled_at
-            })
-        elif time_diff < 86400: # 24 hours
-            alerts.append({
-                "id": f.id,
-                "type": "due_soon",
-                "severity": "medium",
-                "message": f"Due Today: Follow up with {f.lead.first_name} {f.lead.last_name}",
-                "context_id": f.lead_id,
-                "timestamp": f.scheduled_at
-            })
-            
-    return alerts
+    query = after_cursor(alerts_query(now), _parse_cursor(cursor)).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    page = rows[:limit]
+    if len(rows) > limit:
+        last = page[-1]
+        response.headers["X-Next-Cursor"] = f"{last.scheduled_at.isoformat()}|{last.id}"
+    response.headers["X-Unread-Count"] = str(await unread_counter.get(db))
+    return [to_alert(row, now) for row in page]
+
+@router.get("/unread-count")
+@query_budget(1)
+async def get_unread_count(db: AsyncSession = Depends(get_async_read_db)):
+    return {"count": await unread_counter.get(db)}
+
+async def _alert_events(request: Request):
+    entry = broadcaster.subscribe()
+    _, queue = entry
+    try:
+        last_sent = None
+        while True:
+            count = unread_counter.cached()
+            if count is None:
+                async with AsyncSessionLocal() as db:
+                    count = await unread_counter.get(db)
+            if count != last_sent:
+                yield f"event: alerts\ndata: {json.dumps({'unread': count})}\n\n"
+                last_sent = count
+            try:
+                await asyncio.wait_for(queue.get(), NOTIFICATIONS_STREAM_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+            if await request.is_disconnected():
+                return
+    finally:
+        broadcaster.unsubscribe(entry)
+
+@router.get("/stream")
+async def stream_notifications(request: Request):
+    """
+    Server-sent events: an `alerts` event with the unread count on connect
+    and whenever it changes (follow-up commits, or time passing). Replaces
+    polling GET /notifications.
+    """
+    return StreamingResponse(_alert_events(request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.post("/{notification_id}/dismiss")
 def dismiss_notification(notification_id: int, db: Session = Depends(get_db)):
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List, Any
-from ..db.session import get_db
-from ..models.log import AccessLog
+from typing import List, Any, Optional
+from ..db.session import get_db, get_read_db
+from ..models.log import AccessLog, AccessLogMinute
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter()
 
@@ -20,23 +21,100 @@ class LogRead(BaseModel):
         from_attributes = True
 
 @router.get("/logs", response_model=List[LogRead])
-def read_logs(limit: int = 100, db: Session = Depends(get_db)):
+def read_logs(limit: int = 100, db: Session = Depends(get_read_db)):
     return db.query(AccessLog).order_by(AccessLog.timestamp.desc()).limit(limit).all()
 
+class LogMinuteRead(BaseModel):
+    minute: datetime
+    method: str
+    path: str
+    status_code: int
+    count: int
+    sum_ms: float
+    max_ms: float
+    class Config:
+        from_attributes = True
+
+@router.get("/logs/minutes", response_model=List[LogMinuteRead])
+def read_log_minutes(path: Optional[str] = None, limit: int = 100, db: Session = Depends(get_read_db)):
+    """Downsampled access logs older than the raw retention window."""
+    query = db.query(AccessLogMinute)
+    if path:
+        query = query.filter(AccessLogMinute.path == path)
+    return query.order_by(AccessLogMinute.minute.desc()).limit(min(limit, 1000)).all()
+
 @router.get("/stats")
-def read_stats(db: Session = Depends(get_db)):
-    # Total Requests
-    total = db.query(func.count(AccessLog.id)).scalar()
-    
-    # Average Latency
-    avg_latency = db.query(func.avg(AccessLog.duration_ms)).scalar() or 0
-    
-    # Error Rate (Status >= 400)
-    errors = db.query(func.count(AccessLog.id)).filter(AccessLog.status_code >= 400).scalar()
-    
-    return {
-        "total_requests": total,
-        "avg_latency_ms": round(avg_latency, 2),
-        "error_count": errors,
-        "error_rate": round((errors / total * 100) if total > 0 else 0, 2)
-    }
+def read_stats(route: Optional[str] = None, window_minutes: int = 60, db: Session = Depends(get_read_db)):
+    """
+    Latency percentiles, error rate and throughput over the last
+    `window_minutes`, optionally for one route template
+    (e.g. "/api/leads/{lead_id}"). Reads pre-aggregated rollups, not raw logs.
+    """
+    from ..services.metrics_rollup import latency_stats
+    window_minutes = max(1, min(window_minutes, 60 * 24 * 30))
+    since = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
+    return latency_stats(db, since, route=route)
+
+@router.get("/access-log")
+def read_access_log_pipeline():
+    """Queue depth and write/drop counters of the batched access-log writer."""
+    from ..services.access_log import access_log_writer
+    return access_log_writer.stats()
+
+@router.get("/retention")
+def read_retention():
+    from ..services.log_retention import retention_status
+    return retention_status()
+
+@router.post("/retention/run")
+def run_log_retention(db: Session = Depends(get_db)):
+    """Runs the retention pass now instead of waiting for the hourly worker."""
+    from ..services.log_retention import run_retention
+    return run_retention(db)
+
+class ProfilerUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    threshold_ms: Optional[float] = None
+
+@router.get("/profiler")
+def read_profiler():
+    from ..core.profiler import profiler
+    return profiler.status()
+
+@router.put("/profiler")
+def update_profiler(update: ProfilerUpdate):
+    """Turns sampling on/off or changes the slow threshold without a restart (per worker process)."""
+    from ..core.profiler import profiler
+    profiler.configure(enabled=update.enabled, threshold_ms=update.threshold_ms)
+    return profiler.status()
+
+@router.get("/profiles")
+def read_profiles(key: Optional[str] = None):
+    """Slow requests/jobs with a stored profile, newest first. `key` is e.g. "GET /api/leads/" or "lead_run:12"."""
+    from ..core.profiler import profiler
+    return profiler.list_profiles(key)
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def read_profile(profile_id: int):
+    """Collapsed stacks ("frame;frame;frame count"), ready for flamegraph.pl or speedscope."""
+    from ..core.profiler import profiler, collapsed_text
+    profile = profiler.get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(collapsed_text(profile))
+
+@router.delete("/profiles")
+def clear_profiles():
+    from ..core.profiler import profiler
+    profiler.profiles.clear()
+    return {"status": "success"}
+
+@router.get("/pool")
+def read_pool():
+    """Connection pool usage for this worker process, plus the read replica if configured."""
+    from ..db.session import pool_status, replica_engine, replica_available, replica_health
+    status = pool_status()
+    if replica_engine is not None:
+        replica_available()
+        status["replica"] = {**pool_status(replica_engine), **replica_health.status()}
+    return status
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Response
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..db.session import get_db
+from ..db.session import get_db, get_read_db
 from ..models.pipeline import Stage, Deal
 from ..schemas.lead import Lead  # Import Lead schema
+from ..core.db_metrics import query_budget
+from ..services.dashboard_rollup import mark_dirty as mark_dashboard_dirty
+from ..services.pipeline_board import stage_totals_query, first_deals_query, stage_deals_query, to_card
 from pydantic import BaseModel
 from datetime import datetime
+import os
+import time
+
+# Cards per column on the first board load; more come from /stages/{id}/deals
+PIPELINE_BOARD_PER_STAGE = int(os.getenv("PIPELINE_BOARD_PER_STAGE", "20"))
+PIPELINE_BOARD_MAX_PER_STAGE = int(os.getenv("PIPELINE_BOARD_MAX_PER_STAGE", "200"))
 
 router = APIRouter()
 
@@ -41,61 +51,108 @@ class DealRead(DealBase):
     class Config:
         from_attributes = True
 
+class LeadCard(BaseModel):
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    company: Optional[str] = None
+    title: Optional[str] = None
+    score: Optional[int] = None
+    status: Optional[str] = None
+    last_contacted_at: Optional[datetime] = None
+    next_scheduled_action: Optional[datetime] = None
+
+class DealCard(DealBase):
+    id: int
+    currency: Optional[str] = None
+    created_at: Optional[datetime] = None
+    stage_id: Optional[int] = None
+    lead: Optional[LeadCard] = None  # Slim projection; full lead via /api/leads/{id}
+
+class BoardStage(StageRead):
+    deal_count: int
+    total_value: float
+    deals: List[DealCard]
+    next_cursor: Optional[str] = None  # pass to /stages/{id}/deals for the rest of the column
+
+class Board(BaseModel):
+    stages: List[BoardStage]
+
 # --- Routes ---
 
+# New Standard Flow
+DEFAULT_STAGES = [
+    {"name": "Cold", "order": 0, "color": "slate"},
+    {"name": "Qualified", "order": 1, "color": "blue"},
+    {"name": "Meeting Scheduled", "order": 2, "color": "indigo"},
+    {"name": "Initial Meeting", "order": 3, "color": "purple"},
+    {"name": "Proposal", "order": 4, "color": "orange"},
+    {"name": "Negotiation", "order": 5, "color": "yellow"},
+    {"name": "Deal Won", "order": 6, "color": "green"},
+    {"name": "Deal Lost", "order": 7, "color": "red"},
+]
+
+def _upsert_stages(db: Session, rows: List[dict]):
+    """INSERT ... ON CONFLICT (name) DO UPDATE for all rows in one statement."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for row in rows:
+            stage = db.query(Stage).filter(Stage.name == row["name"]).first() or Stage(name=row["name"])
+            stage.order, stage.color = row["order"], row["color"]
+            db.add(stage)
+        db.flush()
+        return
+    stmt = dialect_insert(Stage).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[Stage.name],
+        set_={"order": stmt.excluded.order, "color": stmt.excluded.color},
+    ))
+
 @router.post("/stages/init")
+@query_budget(4)
 def init_default_stages(db: Session = Depends(get_db)):
-    """Initialize default stages from spec and cleanup old ones"""
-    # New Standard Flow
-    defaults = [
-        {"name": "Cold", "order": 0, "color": "slate"},
-        {"name": "Qualified", "order": 1, "color": "blue"},
-        {"name": "Meeting Scheduled", "order": 2, "color": "indigo"},
-        {"name": "Initial Meeting", "order": 3, "color": "purple"},
-        {"name": "Proposal", "order": 4, "color": "orange"},
-        {"name": "Negotiation", "order": 5, "color": "yellow"},
-        {"name": "Deal Won", "order": 6, "color": "green"},
-        {"name": "Deal Lost", "order": 7, "color": "red"},
-    ]
-    
-    # 1. Ensure "Cold" exists first as fallback
-    cold_stage = db.query(Stage).filter(Stage.name == "Cold").first()
-    if not cold_stage:
-        cold_stage = Stage(name="Cold", order=0, color="slate")
-        db.add(cold_stage)
-        db.commit()
-        db.refresh(cold_stage)
-
-    # 2. Create/Update desired stages
-    valid_names = [d["name"] for d in defaults]
-    for d in defaults:
-        stage = db.query(Stage).filter(Stage.name == d["name"]).first()
-        if not stage:
-            stage = Stage(**d)
-            db.add(stage)
-        else:
-            # Update attributes if needed (order/color)
-            stage.order = d["order"]
-            stage.color = d["color"]
-    db.commit()
+    """
+    Initialize default stages from spec and cleanup old ones.
+    Four set-based statements in one transaction: upsert the defaults,
+    move deals off obsolete stages to Cold, delete the obsolete stages.
+    """
+    started = time.perf_counter()
+    valid_names = [d["name"] for d in DEFAULT_STAGES]
+    try:
+        # 1. Create/Update desired stages ("Cold" is among them, the fallback below)
+        _upsert_stages(db, DEFAULT_STAGES)
+        cold_stage_id = db.scalar(select(Stage.id).where(Stage.name == "Cold"))
 
-    # 3. Cleanup: Move deals from invalid stages to Cold, then delete invalid stages
-    all_stages = db.query(Stage).all()
-    deleted_count = 0
-    
-    for stage in all_stages:
-        if stage.name not in valid_names:
-            # Move deals to Cold
-            deals_to_move = db.query(Deal).filter(Deal.stage_id == stage.id).all()
-            for deal in deals_to_move:
-                deal.stage_id = cold_stage.id
-            
-            # Delete stage
-            db.delete(stage)
-            deleted_count += 1
-            
-    db.commit()
-    return {"message": f"Pipeline updated. {deleted_count} old stages removed. Deals moved to 'Cold'."}
+        # 2. Cleanup: Move deals from invalid stages to Cold, then delete invalid stages
+        obsolete = select(Stage.id).where(Stage.name.notin_(valid_names))
+        moved = db.execute(
+            update(Deal).where(Deal.stage_id.in_(obsolete)).values(stage_id=cold_stage_id),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        deleted_count = db.execute(
+            delete(Stage).where(Stage.name.notin_(valid_names)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if moved:
+            # Bulk UPDATE skips the ORM events the dashboard rollup listens to
+            mark_dashboard_dirty(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    return {
+        "message": f"Pipeline updated. {deleted_count} old stages removed. Deals moved to 'Cold'.",
+        "stages_removed": deleted_count,
+        "deals_moved": moved,
+        "duration_ms": duration_ms,
+    }
 
 @router.get("/stages", response_model=List[StageRead])
 def read_stages(db: Session = Depends(get_db)):
@@ -108,6 +165,49 @@ def read_deals(db: Session = Depends(get_db)):
     # Join with Lead to ensure efficient loading
     return db.query(Deal).options(joinedload(Deal.lead)).all()
 
+@router.get("/board", response_model=Board)
+@query_budget(2)
+def read_board(
+    per_stage: int = Query(PIPELINE_BOARD_PER_STAGE, ge=1, le=PIPELINE_BOARD_MAX_PER_STAGE),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Kanban board in two queries: every stage with its deal count and value
+    sum, then the first `per_stage` deals of each stage with a slim lead.
+    Columns with more deals carry a next_cursor for /stages/{id}/deals.
+    """
+    stages = {row.id: {**row._mapping, "deals": [], "next_cursor": None} for row in db.execute(stage_totals_query())}
+    # One extra row per stage tells whether the column continues
+    for row in db.execute(first_deals_query(per_stage + 1)):
+        stage = stages.get(row.stage_id)
+        if stage is None:
+            continue
+        if len(stage["deals"]) == per_stage:
+            stage["next_cursor"] = str(stage["deals"][-1]["id"])
+        else:
+            stage["deals"].append(to_card(row))
+    return {"stages": list(stages.values())}
+
+@router.get("/stages/{stage_id}/deals", response_model=List[DealCard])
+@query_budget(1)
+def read_stage_deals(
+    stage_id: int,
+    response: Response,
+    limit: int = Query(PIPELINE_BOARD_PER_STAGE, ge=1, le=PIPELINE_BOARD_MAX_PER_STAGE),
+    cursor: Optional[str] = Query(None, description="next_cursor / X-Next-Cursor from the previous page"),
+    db: Session = Depends(get_read_db),
+):
+    """Next page of one board column; the cursor for the page after comes back as X-Next-Cursor."""
+    try:
+        after_id = int(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = db.execute(stage_deals_query(stage_id, limit + 1, after_id)).all()
+    page = rows[:limit]
+    if len(rows) > limit:
+        response.headers["X-Next-Cursor"] = str(page[-1].id)
+    return [to_card(row) for row in page]
+
 @router.post("/deals", response_model=DealRead)
 def create_deal(deal: DealCreate, db: Session = Depends(get_db)):
     
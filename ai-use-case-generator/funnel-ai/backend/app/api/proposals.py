@@ -5,7 +5,6 @@ from typing import List, Optional
 from ..db.session import get_db
 from ..models.proposal import Proposal
 from ..models.lead import Lead
-from ..services.pdf_generator import generate_proposal_pdf
 from pydantic import BaseModel
 from datetime import datetime
 import os
@@ -51,7 +50,8 @@ def generate_and_save_pdf(prop_id: int, title: str, content: str, amount: float,
     # For MVP, we'll assume the simple function is safe or just update DB
     # Note: Passed DB session might be closed, safer to create new one or handle carefully.
     # We will generate file path and update:
-    
+    # fpdf (and fontTools under it) costs ~300ms to import, so load it on first use
+    from ..services.pdf_generator import generate_proposal_pdf
     path = generate_proposal_pdf(prop_id, title, content, amount)
     
     # Update DB (Hack for MVP: creating new session here to avoid thread issues with dependency injection)
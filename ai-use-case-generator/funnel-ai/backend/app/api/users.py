@@ -1,12 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from types import SimpleNamespace
+from datetime import datetime, timezone
 from jose import jwt, JWTError
 from ..db.session import get_db
-from ..models.user import User
-from ..core.security import get_password_hash, SECRET_KEY, ALGORITHM
+from ..db.async_session import get_async_db
+from ..models.user import User, RevokedToken
+from ..core.cache import TTLCache
+from ..core.metrics import prometheus
+from ..core.security import get_password_hash_async, PasswordHashBusy, SECRET_KEY, ALGORITHM
 from pydantic import BaseModel
+import hashlib
+import os
+import threading
+import time
+
+# Verified token -> user snapshot. The TTL bounds how long a change made on
+# another worker (plan tier, profile, logout) can go unnoticed here.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "5"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
@@ -36,35 +52,123 @@ class PlanUpdate(BaseModel):
     plan_tier: str
     client_timestamp: Optional[str] = None
 
-# Secure dependency
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        # Typed tokens (password reset, iCal feed links) are not session tokens
+        if payload.get("sub") is None or payload.get("type") is not None:
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
+        raise _credentials_exception()
+    return payload
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+_user_cache = TTLCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+# Bumped by invalidate_user(); cached snapshots from an older generation are ignored
+_user_generations = {}
+_generations_lock = threading.Lock()
+
+auth_cache_lookups_total = prometheus.counter(
+    "funnel_auth_cache_lookups_total", "get_current_user cache lookups by result.", ("result",))
+
+def _generation(email: str) -> int:
+    with _generations_lock:
+        return _user_generations.get(email, 0)
+
+def invalidate_user(email: str):
+    """Drops every cached snapshot for `email`; call after writing to the user row."""
+    with _generations_lock:
+        _user_generations[email] = _user_generations.get(email, 0) + 1
+
+def _snapshot(user: User) -> SimpleNamespace:
+    # Detached, read-only copy so it can be shared across sessions and threads.
+    # Endpoints that write to the user load the row with db.get(User, current_user.id).
+    return SimpleNamespace(**{c.name: getattr(user, c.name) for c in User.__table__.columns
+                              if c.name != "hashed_password"})
+
+def _cached_user(key: str, email: str):
+    entry = _user_cache.get(key)
+    if entry is not None and entry[1] == _generation(email):
+        auth_cache_lookups_total.labels("hit").inc()
+        return entry[0]
+    auth_cache_lookups_total.labels("miss").inc()
+    return None
+
+def _cache_user(key: str, payload: dict, generation: int, user: Optional[User]) -> SimpleNamespace:
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    snapshot = _snapshot(user)
+    # Never keep a token around past its own expiry
+    ttl = min(AUTH_CACHE_TTL_SECONDS, payload.get("exp", float("inf")) - time.time())
+    if ttl > 0:
+        _user_cache.set(key, (snapshot, generation), ttl)
+    return snapshot
+
+# Secure dependency
+# Plain def: FastAPI runs it in the threadpool, so the blocking query stays off the event loop
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Read-only snapshot of the authenticated user. Served from memory for
+    AUTH_CACHE_TTL_SECONDS; on a miss the user row and the revocation list
+    are read from the database.
+    """
+    payload = _decode_token(token)
+    email, key = payload["sub"], token_hash(token)
+    user = _cached_user(key, email)
+    if user is not None:
+        return user
+    generation = _generation(email)
+    if db.query(RevokedToken.id).filter(RevokedToken.token_hash == key).first():
+        raise _credentials_exception()
+    return _cache_user(key, payload, generation, db.query(User).filter(User.email == email).first())
+
+# Same check for async endpoints (see db/async_session.py)
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    payload = _decode_token(token)
+    email, key = payload["sub"], token_hash(token)
+    user = _cached_user(key, email)
+    if user is not None:
+        return user
+    generation = _generation(email)
+    if (await db.execute(select(RevokedToken.id).where(RevokedToken.token_hash == key))).first():
+        raise _credentials_exception()
+    found = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    return _cache_user(key, payload, generation, found)
+
+def revoke_token(db: Session, token: str):
+    """
+    Ends `token` before its expiry. This worker forgets it at once; others
+    stop accepting it when their cached entry expires (AUTH_CACHE_TTL_SECONDS).
+    """
+    payload = _decode_token(token)
+    key = token_hash(token)
+    now = datetime.now(timezone.utc)
+    # Rows are only needed until the token would have expired anyway
+    db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+    if not db.query(RevokedToken.id).filter(RevokedToken.token_hash == key).first():
+        db.add(RevokedToken(token_hash=key, email=payload["sub"],
+                            expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc) if "exp" in payload else None))
+    db.commit()
+    _user_cache.delete(key)
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         print(f"DEBUG: Registering {user.email}")
-        db_user = db.query(User).filter(User.email == user.email).first()
+        db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
         if db_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         new_user = User(
             email=user.email,
             full_name=user.full_name,
@@ -73,10 +177,12 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             business_type=user.business_type
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         print("DEBUG: Registration Success")
         return new_user
+    except (HTTPException, PasswordHashBusy):
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -89,18 +195,20 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 @router.put("/me")
 def update_me(user_update: UserUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    user = db.get(User, current_user.id)
     for var, value in vars(user_update).items():
         if value is not None:
-            setattr(current_user, var, value)
+            setattr(user, var, value)
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    db.refresh(user)
+    invalidate_user(current_user.email)
+    return _snapshot(user)
 
 # ... (UserRead class remains same) ...
 
 @router.post("/me/upgrade")
 def upgrade_plan(plan: PlanUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    user = current_user
+    user = db.get(User, current_user.id)
     old_tier = user.plan_tier
     new_tier = plan.plan_tier
     
@@ -128,6 +236,7 @@ def upgrade_plan(plan: PlanUpdate, db: Session = Depends(get_db), current_user:
     # Update User
     user.plan_tier = new_tier
     db.commit()
+    invalidate_user(user.email)
     
     # Trigger notification
     from ..models.notification import Notification
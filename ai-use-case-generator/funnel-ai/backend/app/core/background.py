@@ -0,0 +1,49 @@
+from typing import Callable
+import threading
+import traceback
+
+class PeriodicWorker:
+    """
+    Daemon thread that calls `fn` every `interval` seconds, or sooner when
+    woken. Used for flushers and rollups that must stay off the event loop.
+    `fn` runs one final time on stop so buffered work is not lost.
+    """
+    def __init__(self, name: str, interval: float, fn: Callable[[], None]):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        if not self._thread:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            print(f"[{self.name}] worker error")
+            traceback.print_exc()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._run_once()
+        self._run_once()
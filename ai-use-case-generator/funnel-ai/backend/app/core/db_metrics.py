@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import os
+import re
+import time
+from sqlalchemy import event
+from .metrics import db_queries_total, db_query_duration_seconds, prometheus
+
+# X-DB-Queries / X-DB-Time / X-DB-N-Plus-One response headers
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+# Same SELECT shape repeated this many times in one request is an N+1 candidate
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "5"))
+# Over-budget requests fail with a 500 instead of only being logged (CI / tests)
+DB_QUERY_BUDGET_STRICT = os.getenv("DB_QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+db_query_budget_exceeded_total = prometheus.counter(
+    "funnel_db_query_budget_exceeded_total", "Requests that issued more SQL statements than their route budget.", ("route",))
+db_n_plus_one_total = prometheus.counter(
+    "funnel_db_n_plus_one_total", "Requests with a repeated SELECT shape (N+1 candidates).", ("route",))
+
+class RequestQueryStats:
+    """SQL statements and time attributed to the current request."""
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Dict[str, int] = {}
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+def start_request_tracking() -> RequestQueryStats:
+    """
+    Called by the request middleware. The stats object is shared by reference,
+    so queries from sync endpoints (run in the threadpool with a copied
+    context) still land on it.
+    """
+    stats = RequestQueryStats()
+    _current.set(stats)
+    return stats
+
+def current_request_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+_OPERATIONS = ("select", "insert", "update", "delete", "other")
+# Children resolved once; labels() lookups would dominate the per-query cost
+_children = {op: (db_queries_total.labels(op), db_query_duration_seconds.labels(op)) for op in _OPERATIONS}
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip()[:6].lower()
+    return verb if verb in _children else "other"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    counter, histogram = _children[_operation(statement)]
+    counter.inc()
+    histogram.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+def _handle_error(context):
+    # after_cursor_execute doesn't fire for failed statements
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+def instrument_engine(engine):
+    if getattr(engine, "_funnel_instrumented", False):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    engine._funnel_instrumented = True
+
+# --- Query budgets and N+1 detection ----------------------------------------
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """Statement with whitespace and expanded IN lists collapsed, so batches of different size compare equal."""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+def n_plus_one_candidates(stats: RequestQueryStats, threshold: int = DB_N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+    shapes: Dict[str, int] = {}
+    for statement, n in stats.statements.items():
+        if statement.lstrip()[:6].lower() == "select":
+            shape = statement_shape(statement)
+            shapes[shape] = shapes.get(shape, 0) + n
+    return sorted(((shape, n) for shape, n in shapes.items() if n >= threshold), key=lambda c: -c[1])
+
+def query_budget(max_queries: int):
+    """
+    Declares how many SQL statements one call to the endpoint may issue.
+    Checked by the request middleware; returns the endpoint unchanged so
+    FastAPI still sees the original signature.
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+def route_query_budget(scope) -> Optional[int]:
+    route = scope.get("route")
+    return getattr(getattr(route, "endpoint", None), "__query_budget__", None)
+
+def check_request(stats: RequestQueryStats, scope, route: str) -> Optional[str]:
+    """Logs N+1 candidates and budget overruns; returns an error message for strict mode."""
+    for shape, n in n_plus_one_candidates(stats):
+        db_n_plus_one_total.labels(route).inc()
+        print(f"[db] possible N+1 on {route}: {n}x {shape[:200]}")
+
+    budget = route_query_budget(scope)
+    if budget is not None and stats.count > budget:
+        db_query_budget_exceeded_total.labels(route).inc()
+        message = f"{route} issued {stats.count} SQL statements (budget {budget})"
+        print(f"[db] query budget exceeded: {message}")
+        return message
+    return None
+
+def debug_headers(stats: RequestQueryStats) -> Dict[str, str]:
+    headers = {"X-DB-Queries": str(stats.count), "X-DB-Time": f"{stats.duration * 1000:.2f}ms"}
+    candidates = n_plus_one_candidates(stats)
+    if candidates:
+        headers["X-DB-N-Plus-One"] = str(len(candidates))
+    return headers
+
+@contextmanager
+def track_queries():
+    """Counts statements issued inside the block, e.g. `with track_queries() as q: ...; assert q.count <= 3`."""
+    stats = RequestQueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
@@ -0,0 +1,370 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import time
+
+def _log_linear_buckets(min_exp: int = -1, max_exp: int = 5) -> List[float]:
+    """1, 2, ... 9 x 10^e for each decade: ~11% worst-case relative error."""
+    bounds = []
+    for exp in range(min_exp, max_exp):
+        for mantissa in range(1, 10):
+            bounds.append(round(mantissa * 10 ** exp, 6))
+    return bounds
+
+# Upper bounds in milliseconds (0.1ms .. 90s); one overflow bucket past the end
+LATENCY_BUCKETS_MS = _log_linear_buckets()
+
+class Histogram:
+    """Fixed-bucket histogram; cheap to record and to merge across workers."""
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: List[float] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge_sparse(self, sparse: Dict[str, int], total_sum: float = 0.0, max_value: float = 0.0):
+        for idx, n in sparse.items():
+            self.counts[int(idx)] += n
+            self.count += n
+        self.sum += total_sum
+        self.max = max(self.max, max_value)
+
+    def copy(self) -> "Histogram":
+        other = Histogram(self.bounds)
+        other.counts = list(self.counts)
+        other.count, other.sum, other.max = self.count, self.sum, self.max
+        return other
+
+    def to_sparse(self) -> Dict[str, int]:
+        return {str(i): n for i, n in enumerate(self.counts) if n}
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding rank q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if not n:
+                continue
+            if seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+class RouteStats:
+    __slots__ = ("histogram", "status_codes")
+
+    def __init__(self):
+        self.histogram = Histogram()
+        self.status_codes: Dict[str, int] = {}
+
+    def copy(self) -> "RouteStats":
+        other = RouteStats()
+        other.histogram = self.histogram.copy()
+        other.status_codes = dict(self.status_codes)
+        return other
+
+    def merge(self, other: "RouteStats"):
+        h = other.histogram
+        self.histogram.merge_sparse(h.to_sparse(), h.sum, h.max)
+        for code, n in other.status_codes.items():
+            self.status_codes[code] = self.status_codes.get(code, 0) + n
+
+    @property
+    def error_count(self) -> int:
+        return sum(n for code, n in self.status_codes.items() if int(code) >= 400)
+
+class MetricsRegistry:
+    """
+    Per-route latency histograms and status counters for this process since
+    the last rollup. Rollups (see services/metrics_rollup.py) persist and
+    reset it, so memory stays O(routes x buckets).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.window_start = datetime.now(timezone.utc)
+
+    def observe(self, method: str, route: str, status_code: int, duration_ms: float):
+        key = (method, route)
+        code = str(status_code)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteStats()
+            stats.histogram.observe(duration_ms)
+            stats.status_codes[code] = stats.status_codes.get(code, 0) + 1
+
+    def snapshot(self, reset: bool = False):
+        """Returns (window_start, {(method, route): RouteStats})."""
+        with self._lock:
+            routes, window_start = self._routes, self.window_start
+            if reset:
+                self._routes = {}
+                self.window_start = datetime.now(timezone.utc)
+            else:
+                routes = {key: stats.copy() for key, stats in routes.items()}
+        return window_start, routes
+
+    def restore(self, window_start: datetime, routes: Dict[Tuple[str, str], RouteStats]):
+        """Puts back a reset snapshot that couldn't be persisted; requests seen since are kept."""
+        with self._lock:
+            for key, stats in routes.items():
+                current = self._routes.get(key)
+                if current is None:
+                    self._routes[key] = stats
+                else:
+                    current.merge(stats)
+            self.window_start = window_start
+
+registry = MetricsRegistry()
+
+def route_template(scope) -> str:
+    """Route pattern ("/api/leads/{lead_id}") so label cardinality stays bounded."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+# --- Prometheus exposition ----------------------------------------------------
+#
+# Cumulative counters, gauges and histograms rendered in the Prometheus text
+# format at /metrics. Unlike MetricsRegistry above these are never reset;
+# Prometheus computes rates from the running totals.
+
+# Seconds; prometheus_client's defaults
+DEFAULT_BUCKETS_SECONDS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+class _HistogramChild:
+    __slots__ = ("histogram", "_lock")
+
+    def __init__(self, buckets):
+        self.histogram = Histogram(buckets)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.histogram.observe(value)
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class _MetricFamily:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._samples():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+        return lines
+
+class Counter(_MetricFamily):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+class Gauge(_MetricFamily):
+    """Set directly, or give `set_function` a callable read at scrape time (queue depths)."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions: Dict[tuple, Callable[[], float]] = {}
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def set_function(self, fn: Callable[[], float], *values):
+        self._functions[tuple(str(v) for v in values)] = fn
+
+    def _samples(self):
+        samples = super()._samples()
+        for values, fn in list(self._functions.items()):
+            child = _GaugeChild()
+            try:
+                child.value = fn()
+            except Exception:
+                continue
+            samples.append((values, child))
+        return samples
+
+class HistogramMetric(_MetricFamily):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS_SECONDS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = list(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._samples():
+            with child._lock:
+                h = child.histogram.copy()
+            cumulative = 0
+            for bound, n in zip(self.buckets + [float("inf")], h.counts):
+                cumulative += n
+                le = 'le="%s"' % _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(h.sum)}")
+            lines.append(f"{self.name}_count{labels} {h.count}")
+        return lines
+
+class PrometheusRegistry:
+    def __init__(self):
+        self._families: Dict[str, _MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: _MetricFamily):
+        with self._lock:
+            # Re-registering by name returns the existing family (module reloads)
+            return self._families.setdefault(family.name, family)
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS_SECONDS) -> HistogramMetric:
+        return self._register(HistogramMetric(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+prometheus = PrometheusRegistry()
+
+# HTTP (recorded by the request middleware in main.py)
+http_requests_total = prometheus.counter(
+    "funnel_http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+http_request_duration_seconds = prometheus.histogram(
+    "funnel_http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+
+# Database (recorded by the engine events in core/db_metrics.py)
+db_queries_total = prometheus.counter(
+    "funnel_db_queries_total", "SQL statements executed, by statement type.", ("operation",))
+db_query_duration_seconds = prometheus.histogram(
+    "funnel_db_query_duration_seconds", "SQL statement execution time.", ("operation",),
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0])
+db_queries_per_request = prometheus.histogram(
+    "funnel_db_queries_per_request", "SQL statements issued while serving one request.", ("route",),
+    buckets=[0, 1, 2, 5, 10, 20, 50, 100, 250])
+db_time_per_request_seconds = prometheus.histogram(
+    "funnel_db_time_per_request_seconds", "Total SQL time spent while serving one request.", ("route",))
+
+# Background work
+lead_run_stage_seconds = prometheus.histogram(
+    "funnel_lead_run_stage_seconds", "LeadEngine.process_run stage durations.", ("stage",),
+    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0])
+crawl_fetch_seconds = prometheus.histogram(
+    "funnel_crawl_fetch_seconds", "Company website fetch latency during lead runs.", ("outcome",))
+campaign_ticks_total = prometheus.counter(
+    "funnel_campaign_ticks_total", "Campaign runner ticks.")
+campaign_sends_per_tick = prometheus.histogram(
+    "funnel_campaign_sends_per_tick", "Emails sent by one campaign runner tick.",
+    buckets=[0, 1, 5, 10, 25, 50, 100, 250, 500, 1000])
+campaign_actions_total = prometheus.counter(
+    "funnel_campaign_actions_total", "Campaign lead actions, by kind.", ("action",))
+enrichment_call_seconds = prometheus.histogram(
+    "funnel_enrichment_call_seconds", "Enrichment provider batch call latency.", ("provider",))
+enrichment_leads_total = prometheus.counter(
+    "funnel_enrichment_leads_total", "Leads sent to enrichment providers.", ("provider",))
+scoring_rescore_seconds = prometheus.histogram(
+    "funnel_scoring_rescore_seconds", "Set-based lead rescoring duration.")
+queue_depth = prometheus.gauge(
+    "funnel_queue_depth", "Items waiting in in-process background queues.", ("queue",))
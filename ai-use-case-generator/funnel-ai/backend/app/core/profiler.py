@@ -0,0 +1,218 @@
+from collections import Counter as StackCounter, deque
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+
+# Opt-in; can also be toggled at runtime via /api/observability/profiler
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Only spans slower than this keep their profile
+PROFILE_THRESHOLD_MS = float(os.getenv("PROFILE_THRESHOLD_MS", "1000"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_PROFILES = int(os.getenv("PROFILE_MAX_PROFILES", "100"))
+PROFILE_MAX_STACK_DEPTH = int(os.getenv("PROFILE_MAX_STACK_DEPTH", "64"))
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BACKEND_ROOT = os.path.dirname(_APP_ROOT)
+
+class Span:
+    """
+    One request or job being sampled. Only stacks running on its behalf are
+    sampled: code in the span's context (see _context_span), which covers
+    the request's tasks on the event loop and the threadpool workers of its
+    sync endpoints, plus the opening thread for spans opened outside a
+    coroutine (jobs).
+    """
+    __slots__ = ("kind", "key", "thread_id", "token", "started", "started_at", "samples", "sample_count")
+
+    def __init__(self, kind: str, key: str):
+        self.kind = kind
+        self.key = key
+        # The event loop thread is shared by every request, so coroutine spans don't own it
+        self.thread_id = None if _in_coroutine() else threading.get_ident()
+        self.token = None
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc)
+        self.samples = StackCounter()
+        self.sample_count = 0
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_ROOT):
+        filename = os.path.relpath(filename, _BACKEND_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}"
+
+def _collapse(frame) -> str:
+    """Root-to-leaf 'file:func;file:func' (the collapsed-stack format flamegraph tools read)."""
+    labels = []
+    while frame is not None and len(labels) < PROFILE_MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("profiler_span", default=None)
+
+def _in_coroutine() -> bool:
+    try:
+        return asyncio.current_task() is not None
+    except RuntimeError:
+        return False
+
+def _context_span(frame) -> Optional[Span]:
+    """
+    The span set in the contextvars.Context a thread is running, found on
+    its stack: the event loop runs each task step in Handle._run (the task's
+    context is self._context), anyio's threadpool runs each sync call in
+    WorkerThread.run (the caller's copied context is the `context` local).
+    """
+    while frame is not None:
+        if frame.f_code.co_name in ("run", "_run"):
+            f_locals = frame.f_locals
+            context = f_locals.get("context")
+            if context is None and "self" in f_locals:
+                context = getattr(f_locals["self"], "_context", None)
+            if isinstance(context, Context):
+                return context.get(_current_span)
+        frame = frame.f_back
+    return None
+
+class SamplingProfiler:
+    """
+    Samples Python stacks every PROFILE_SAMPLE_INTERVAL_MS while at least one
+    span is open, and keeps the collapsed profile of spans that end up
+    slower than the threshold. Idle cost is one contextmanager per span.
+    """
+    def __init__(self, enabled=PROFILER_ENABLED, threshold_ms=PROFILE_THRESHOLD_MS,
+                 interval_ms=PROFILE_SAMPLE_INTERVAL_MS, max_profiles=PROFILE_MAX_PROFILES):
+        self.enabled = enabled
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000
+        self.profiles = deque(maxlen=max_profiles)
+        self._spans: Dict[int, Span] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread = None
+
+    def configure(self, enabled: Optional[bool] = None, threshold_ms: Optional[float] = None):
+        if threshold_ms is not None:
+            self.threshold_ms = threshold_ms
+        if enabled is not None:
+            self.enabled = enabled
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def start_span(self, kind: str, key: str) -> Optional[Span]:
+        if not self.enabled:
+            return None
+        span = Span(kind, key)
+        span.token = _current_span.set(span)
+        with self._lock:
+            self._spans[id(span)] = span
+            self._ensure_thread()
+        self._active.set()
+        return span
+
+    def end_span(self, span: Optional[Span]):
+        if span is None:
+            return
+        duration_ms = (time.perf_counter() - span.started) * 1000
+        try:
+            _current_span.reset(span.token)
+        except ValueError: # ended from another context
+            pass
+        with self._lock:
+            self._spans.pop(id(span), None)
+            if not self._spans:
+                self._active.clear()
+        if duration_ms >= self.threshold_ms and span.sample_count:
+            self.profiles.append({
+                "id": next(self._ids),
+                "kind": span.kind,
+                "key": span.key,
+                "started_at": span.started_at,
+                "duration_ms": round(duration_ms, 2),
+                "samples": span.sample_count,
+                "interval_ms": self.interval * 1000,
+                "stacks": span.samples,
+            })
+
+    @contextmanager
+    def span(self, kind: str, key: str):
+        """Profiles the block on the current thread; for jobs and other background work."""
+        span = self.start_span(kind, key)
+        try:
+            yield span
+        finally:
+            self.end_span(span)
+
+    def _sample(self):
+        me = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            spans = list(self._spans.values())
+        stacks = {id(span): [] for span in spans}
+        thread_spans = {span.thread_id: span for span in spans if span.thread_id is not None}
+        for tid, frame in frames.items():
+            if tid == me:
+                continue
+            span = _context_span(frame)
+            if span is None or id(span) not in stacks:
+                span = thread_spans.get(tid)
+            if span is not None:
+                stacks[id(span)].append(_collapse(frame))
+        collected = [(span, stacks[id(span)]) for span in spans]
+        del frames
+        # Spans ended meanwhile are skipped; end_span reads samples under the same lock
+        with self._lock:
+            for span, stacks in collected:
+                if id(span) not in self._spans:
+                    continue
+                span.sample_count += 1
+                span.samples.update(stacks)
+
+    def _loop(self):
+        while True:
+            self._active.wait()
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"Profiler sample failed: {e}")
+            time.sleep(self.interval)
+
+    def list_profiles(self, key: Optional[str] = None) -> List[dict]:
+        return [
+            {k: v for k, v in p.items() if k != "stacks"}
+            for p in reversed(self.profiles) if key is None or p["key"] == key
+        ]
+
+    def get_profile(self, profile_id: int) -> Optional[dict]:
+        return next((p for p in self.profiles if p["id"] == profile_id), None)
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "interval_ms": self.interval * 1000,
+            "stored_profiles": len(self.profiles),
+            "max_profiles": self.profiles.maxlen,
+            "open_spans": len(self._spans),
+        }
+
+def collapsed_text(profile: dict) -> str:
+    """One 'stack count' line per distinct stack, for flamegraph.pl / speedscope."""
+    return "\n".join(f"{stack} {n}" for stack, n in profile["stacks"].most_common()) + "\n"
+
+profiler = SamplingProfiler()
@@ -1,14 +1,26 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
 from passlib.context import CryptContext
+import asyncio
 import bcrypt
+import os
+import threading
+from .metrics import prometheus
 
 # Secret key (in production, use env var)
 SECRET_KEY = "supersecretkey" # TODO: Move to env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60 # 30 days for MVP
 
+# bcrypt work factor for new hashes (existing hashes keep the cost they were made with)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads doing bcrypt; bcrypt releases the GIL, so this is roughly CPU cores spent on hashing
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes running or queued before new ones are refused with PasswordHashBusy (-> 503)
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+
 # pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password, hashed_password):
@@ -20,9 +32,44 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     # return pwd_context.hash(password)
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(pwd_bytes, salt).decode('utf-8')
 
+class PasswordHashBusy(Exception):
+    """More than BCRYPT_MAX_PENDING hashes in flight; the caller should answer 503."""
+
+_hash_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(BCRYPT_MAX_PENDING)
+
+def _submit_hash(fn, *args) -> Future:
+    # Admission is checked before queueing, so a login storm gets fast 503s
+    # instead of an unbounded queue of multi-second waits
+    if not _hash_slots.acquire(blocking=False):
+        password_hash_rejected_total.inc()
+        raise PasswordHashBusy()
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """verify_password on the bcrypt pool, so the event loop keeps serving other requests."""
+    return await asyncio.wrap_future(_submit_hash(verify_password, plain_password, hashed_password))
+
+async def get_password_hash_async(password) -> str:
+    return await asyncio.wrap_future(_submit_hash(get_password_hash, password))
+
+def hash_pool_pending() -> int:
+    return BCRYPT_MAX_PENDING - _hash_slots._value
+
+password_hash_rejected_total = prometheus.counter(
+    "funnel_password_hash_rejected_total", "Password hashes refused because the bcrypt pool was full.")
+prometheus.gauge(
+    "funnel_password_hash_pending", "Password hashes running or queued on the bcrypt pool.").set_function(hash_pool_pending)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
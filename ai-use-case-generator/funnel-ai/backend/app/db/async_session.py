@@ -0,0 +1,116 @@
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncIterator
+import os
+import threading
+from .session import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS, SQLITE_BUSY_TIMEOUT_MS, _apply_sqlite_pragmas, _is_memory_sqlite,
+    REPLICA_DATABASE_URL, replica_health, lag_query_for, db_read_routing_total, ReadOnlySession
+)
+from ..core.db_metrics import instrument_engine
+
+def _async_url(url: str) -> str:
+    """sqlite:// -> sqlite+aiosqlite://, postgresql:// -> postgresql+asyncpg://"""
+    scheme, sep, rest = url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+ASYNC_REPLICA_DATABASE_URL = os.getenv(
+    "ASYNC_REPLICA_DATABASE_URL", _async_url(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+)
+
+_engine = None
+_sessionmaker = None
+_replica_engine = None
+_replica_sessionmaker = None
+_lock = threading.Lock()
+
+def build_async_engine(url: str = ASYNC_DATABASE_URL):
+    if url.startswith("sqlite"):
+        kwargs = {"connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if not _is_memory_sqlite(url.replace("+aiosqlite", "")):
+            # aiosqlite defaults to NullPool (a new connection + PRAGMAs per checkout)
+            kwargs.update(poolclass=AsyncAdaptedQueuePool, pool_size=DB_POOL_SIZE,
+                          max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+        async_engine = create_async_engine(url, **kwargs)
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    else:
+        connect_args = {}
+        if DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        async_engine = create_async_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+def get_async_engine():
+    """Created on first use, so the async driver is only imported by processes that need it."""
+    global _engine, _sessionmaker
+    with _lock:
+        if _engine is None:
+            _engine = build_async_engine()
+            _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False, autoflush=False)
+    return _engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _sessionmaker()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of get_db for `async def` endpoints; queries never block the event loop."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _get_replica_sessionmaker():
+    global _replica_engine, _replica_sessionmaker
+    with _lock:
+        if _replica_engine is None:
+            _replica_engine = build_async_engine(ASYNC_REPLICA_DATABASE_URL)
+            _replica_sessionmaker = async_sessionmaker(
+                _replica_engine, expire_on_commit=False, autoflush=False, sync_session_class=ReadOnlySession
+            )
+    return _replica_sessionmaker
+
+async def _async_replica_available() -> bool:
+    if not ASYNC_REPLICA_DATABASE_URL:
+        return False
+    maker = _get_replica_sessionmaker()
+    if replica_health.is_due():
+        try:
+            async with maker() as db:
+                replica_health.record(await db.scalar(text(lag_query_for(ASYNC_REPLICA_DATABASE_URL))) or 0)
+        except Exception as e:
+            replica_health.record(error=e)
+    return replica_health.healthy
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of session.get_read_db: replica when fresh enough, else primary."""
+    use_replica = await _async_replica_available()
+    db_read_routing_total.labels("replica" if use_replica else "primary").inc()
+    maker = _get_replica_sessionmaker() if use_replica else AsyncSessionLocal
+    async with maker() as db:
+        yield db
+
+def is_replica(db: AsyncSession) -> bool:
+    """True for sessions from the replica sessionmaker, whose reads may lag the primary."""
+    return isinstance(db.sync_session, ReadOnlySession)
+
+async def dispose_async_engine():
+    if _engine is not None:
+        await _engine.dispose()
+    if _replica_engine is not None:
+        await _replica_engine.dispose()
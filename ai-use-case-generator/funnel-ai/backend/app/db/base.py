@@ -0,0 +1,21 @@
+# Imports every model so Base.metadata is complete; used by alembic/env.py.
+# Import this (not app.db.session) anywhere the full schema is needed.
+from .session import Base  # noqa: F401
+from ..models.brand import BrandSettings  # noqa: F401
+from ..models.campaign import Campaign, CampaignStep, CampaignLead  # noqa: F401
+from ..models.crm import CRMIntegration, FollowUp, LeadNote  # noqa: F401
+from ..models.lead import Lead  # noqa: F401
+from ..models.lead_engine import (  # noqa: F401
+    Tenant, Workspace, WorkspacePreset, LeadRun, Company, LeadRunItem, CompanyContact,
+    Source, IntentSignal, CrawlJob, CrawlPage, WorkspaceAction,
+)
+from ..models.log import AccessLog, AccessLogMinute  # noqa: F401
+from ..models.metrics import RouteLatencyRollup, DashboardSummary, DashboardDaily  # noqa: F401
+from ..models.notification import Notification  # noqa: F401
+from ..models.pipeline import Stage, Deal  # noqa: F401
+from ..models.plan import Plan  # noqa: F401
+from ..models.proposal import Proposal  # noqa: F401
+from ..models.subscription_history import SubscriptionHistory  # noqa: F401
+from ..models.task import Task  # noqa: F401
+from ..models.template import MessageTemplate  # noqa: F401
+from ..models.user import User, RevokedToken  # noqa: F401
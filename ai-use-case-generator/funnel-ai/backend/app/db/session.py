@@ -1,17 +1,87 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+import threading
+import time
+from ..core.db_metrics import instrument_engine
+from ..core.metrics import prometheus
 import os
 
 # Use SQLite by default if POSTGRES isn't available
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sql_app_restored.db")
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
+# Pool sizing (per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Postgres: server-side cap per statement (0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+# SQLite: lets background writers wait for the lock instead of failing with "database is locked"
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Optional read replica for heavy read-only endpoints (see get_read_db)
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+# Reads fall back to the primary while the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
+# Lag in seconds as one scalar; defaults to pg_last_xact_replay_timestamp() on Postgres, 0 elsewhere
+REPLICA_LAG_QUERY = os.getenv("REPLICA_LAG_QUERY")
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+def build_engine(url: str = DATABASE_URL, tuned: bool = True):
+    """
+    Creates the engine for `url`. `tuned=False` gives the old all-defaults
+    engine (kept for scripts/load_test_db.py comparisons).
+    """
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+        if not tuned:
+            return create_engine(url, connect_args=connect_args)
+        # sqlite3's own lock wait, in seconds; PRAGMA busy_timeout mirrors it
+        connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
+        kwargs = {"connect_args": connect_args}
+        if not _is_memory_sqlite(url):
+            kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+        sqlite_engine = create_engine(url, **kwargs)
+        event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+        return sqlite_engine
+
+    if not tuned:
+        return create_engine(url)
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS and url.startswith("postgresql"):
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
     )
-else:
-    engine = create_engine(DATABASE_URL)
+
+engine = build_engine(DATABASE_URL)
+
+# Query counts/durations for /metrics and per-request DB stats
+instrument_engine(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -23,3 +93,103 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# --- Read replica routing ----------------------------------------------------
+
+POSTGRES_LAG_QUERY = (
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+)
+
+class ReadOnlySession(Session):
+    """Session class for replica reads; flushing raises instead of writing."""
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _forbid_writes(session, flush_context, instances):
+    raise RuntimeError("Read-replica session is read-only; use get_db for writes")
+
+def lag_query_for(url: str) -> str:
+    if REPLICA_LAG_QUERY:
+        return REPLICA_LAG_QUERY
+    return POSTGRES_LAG_QUERY if url.startswith("postgres") else "SELECT 0"
+
+class ReplicaHealth:
+    """
+    Cached replication lag, refreshed at most every REPLICA_LAG_CHECK_SECONDS.
+    An unreachable replica counts as unhealthy, so reads go to the primary.
+    """
+    def __init__(self):
+        self.lag_seconds = None
+        self.error = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_due(self) -> bool:
+        return time.monotonic() - self.checked_at >= REPLICA_LAG_CHECK_SECONDS
+
+    def record(self, lag_seconds=None, error=None):
+        with self._lock:
+            self.lag_seconds = float(lag_seconds) if lag_seconds is not None else None
+            self.error = str(error) if error else None
+            self.checked_at = time.monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        return self.error is None and self.lag_seconds is not None and self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+
+    def status(self) -> dict:
+        return {"lag_seconds": self.lag_seconds, "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+                "healthy": self.healthy, "error": self.error}
+
+replica_health = ReplicaHealth()
+replica_engine = build_engine(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+ReplicaSessionLocal = None
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine, class_=ReadOnlySession)
+
+db_read_routing_total = prometheus.counter(
+    "funnel_db_read_routing_total", "Read-only sessions by target database.", ("target",))
+
+def replica_available() -> bool:
+    if replica_engine is None:
+        return False
+    if replica_health.is_due():
+        try:
+            with replica_engine.connect() as conn:
+                replica_health.record(conn.execute(text(lag_query_for(REPLICA_DATABASE_URL))).scalar() or 0)
+        except Exception as e:
+            replica_health.record(error=e)
+    return replica_health.healthy
+
+def get_read_db():
+    """
+    Dependency for read-only endpoints: a replica session when one is
+    configured and within REPLICA_MAX_LAG_SECONDS, else the primary.
+    Anything that writes must keep using get_db.
+    """
+    use_replica = replica_available()
+    db_read_routing_total.labels("replica" if use_replica else "primary").inc()
+    db = ReplicaSessionLocal() if use_replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def pool_status(target=None) -> dict:
+    """Checked-out / overflow counts for the connection pool."""
+    pool = (target or engine).pool
+    status = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            status[name] = fn()
+    if "size" in status:
+        status["max_overflow"] = getattr(pool, "_max_overflow", None)
+        status["timeout"] = getattr(pool, "_timeout", None)
+    return status
+
+db_pool_connections = prometheus.gauge(
+    "funnel_db_pool_connections", "Connections in the SQLAlchemy pool, by state.", ("state",))
+for _state in ("checkedout", "checkedin", "overflow"):
+    db_pool_connections.set_function(lambda state=_state: pool_status().get(state, 0), _state)
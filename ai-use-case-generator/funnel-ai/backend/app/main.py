@@ -1,65 +1,117 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import leads, campaigns, pipeline, proposals, observability, notifications, users, brand, integrations, actions, ai, history, tasks, webhooks
-from app.db.session import engine, Base, SessionLocal
-from app.models.log import AccessLog
-from app.models.lead_engine import Company, LeadRun, CrawlJob # Register models
-from app.models.template import MessageTemplate # Ensure table is created
-from app.models.notification import Notification # Ensure table is created
-from app.models.subscription_history import SubscriptionHistory # Ensure table is created
+from app.db.session import SessionLocal
+from app.db import base as _models # Register every model; schema is managed by alembic
+from app.services.access_log import access_log_writer
+from app.services.metrics_rollup import metrics_rollup_worker
+from app.services.log_retention import log_retention_worker
+from app.services.dashboard_rollup import dashboard_rollup_worker
+from app.core.metrics import registry as metrics_registry, route_template, prometheus, http_requests_total, \
+    http_request_duration_seconds, db_queries_per_request, db_time_per_request_seconds
+from app.core.db_metrics import start_request_tracking, check_request, debug_headers, DEBUG, DB_QUERY_BUDGET_STRICT
+from fastapi.responses import PlainTextResponse, JSONResponse
+from app.core.profiler import profiler
+from app.core.security import PasswordHashBusy
 from fastapi import Request
 import time
+from datetime import datetime, timezone
 
-# Create tables (for MVP, manual migration later)
-Base.metadata.create_all(bind=engine)
+# Schema changes live in alembic/versions; run `alembic upgrade head` before starting the app
 
-# MVP: Manual migration to ensure new User columns exist
-def run_migration(sql):
+app = FastAPI(title="$Funnel.ai API", version="0.1.0")
+
+@app.exception_handler(PasswordHashBusy)
+async def password_hash_busy(request: Request, exc: PasswordHashBusy):
+    # Login/registration storm: shed load rather than queue behind bcrypt
+    return JSONResponse(status_code=503, content={"detail": "Too many sign-in attempts in progress, retry shortly"},
+                        headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+def bootstrap_default_user():
+    # MVP single-user bootstrap, kept off the request path
+    db = SessionLocal()
     try:
-        with engine.connect() as conn:
-            from sqlalchemy import text
-            conn.execute(text(sql))
-    except Exception:
-        pass
-
-# User table updates
-run_migration("ALTER TABLE users ADD COLUMN usage_leads_weekly INTEGER DEFAULT 0")
-run_migration("ALTER TABLE users ADD COLUMN usage_reset_at DATETIME DEFAULT CURRENT_TIMESTAMP")
-run_migration("ALTER TABLE users ADD COLUMN hashed_password TEXT")
-run_migration("ALTER TABLE users ADD COLUMN business_type TEXT DEFAULT 'b2b'")
-run_migration("ALTER TABLE users ADD COLUMN email_opt_in BOOLEAN DEFAULT 1")
-
-# Lead table updates (Lead Engine v2)
-run_migration("ALTER TABLE leads ADD COLUMN company_id INTEGER REFERENCES companies(id)")
-run_migration("ALTER TABLE leads ADD COLUMN bucket TEXT DEFAULT 'review'")
-run_migration("ALTER TABLE leads ADD COLUMN last_enriched_at DATETIME")
-run_migration("ALTER TABLE leads ADD COLUMN campaign_id INTEGER REFERENCES campaigns(id)")
+        brand.ensure_default_user_exists(db)
+    finally:
+        db.close()
 
-app = FastAPI(title="$Funnel.ai API", version="0.1.0")
+@app.on_event("startup")
+def start_access_log_writer():
+    access_log_writer.start()
+
+@app.on_event("shutdown")
+def stop_access_log_writer():
+    # Final flush of anything still buffered
+    access_log_writer.stop()
+
+@app.on_event("startup")
+def start_metrics_rollup():
+    metrics_rollup_worker.start()
+
+@app.on_event("shutdown")
+def stop_metrics_rollup():
+    metrics_rollup_worker.stop()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    from app.db.async_session import dispose_async_engine
+    await dispose_async_engine()
+
+@app.on_event("startup")
+def start_log_retention():
+    log_retention_worker.start()
+
+@app.on_event("shutdown")
+def stop_log_retention():
+    log_retention_worker.stop()
+
+@app.on_event("startup")
+def start_dashboard_rollup():
+    dashboard_rollup_worker.start()
+
+@app.on_event("shutdown")
+def stop_dashboard_rollup():
+    dashboard_rollup_worker.stop()
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.time()
-    response = await call_next(request)
+    query_stats = start_request_tracking()
+    span = profiler.start_span("request", f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+    finally:
+        if span is not None:
+            # Key by route template so profiles of one endpoint group together
+            span.key = f"{request.method} {route_template(request.scope)}"
+        profiler.end_span(span)
     process_time = (time.time() - start_time) * 1000
     
-    # Log to DB (Non-blocking ideally, but simple for MVP)
+    # Queue for the background flusher; the request never waits on logging I/O
     # We skip OPTIONS requests to avoid noise
     if request.method != "OPTIONS":
-        try:
-            db = SessionLocal()
-            log = AccessLog(
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
-                duration_ms=process_time,
-                ip_address=request.client.host
-            )
-            db.add(log)
-            db.commit()
-            db.close()
-        except Exception:
-            pass # Don't fail request if logging fails
+        route = route_template(request.scope)
+        # In-memory histogram for /api/observability/stats, keyed by route template
+        metrics_registry.observe(request.method, route, response.status_code, process_time)
+        http_requests_total.labels(request.method, route, response.status_code).inc()
+        http_request_duration_seconds.labels(request.method, route).observe(process_time / 1000)
+        db_queries_per_request.labels(route).observe(query_stats.count)
+        db_time_per_request_seconds.labels(route).observe(query_stats.duration)
+
+        budget_error = check_request(query_stats, request.scope, route)
+        if budget_error and DB_QUERY_BUDGET_STRICT:
+            response = JSONResponse(status_code=500, content={"detail": f"Query budget exceeded: {budget_error}"})
+        if DEBUG:
+            response.headers.update(debug_headers(query_stats))
+        access_log_writer.submit({
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": process_time,
+            "ip_address": request.client.host if request.client else None,
+            "timestamp": datetime.now(timezone.utc)
+        })
             
     return response
 
@@ -70,6 +122,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paging cursors and the alert count travel in headers the frontend reads cross-origin
+    expose_headers=["X-Next-Cursor", "X-Unread-Count"],
 )
 
 app.include_router(leads.router, prefix="/api/leads", tags=["leads"])
@@ -77,7 +131,7 @@ app.include_router(campaigns.router, prefix="/api/campaigns", tags=["campaigns"]
 app.include_router(pipeline.router, prefix="/api/pipeline", tags=["pipeline"])
 app.include_router(proposals.router, prefix="/api/proposals", tags=["proposals"])
 app.include_router(observability.router, prefix="/api/observability", tags=["observability"])
-app.include_router(notifications.router, prefix="/api", tags=["notifications"])
+app.include_router(notifications.router, prefix="/api/notifications", tags=["notifications"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(brand.router, prefix="/api/brand", tags=["brand"])
 app.include_router(integrations.router, prefix="/api/integrations", tags=["integrations"])
@@ -106,7 +160,6 @@ app.include_router(scraper.router, prefix="/api/scraper", tags=["scraper"])
 
 # Register plans router
 from app.api import plans
-from app.models.plan import Plan # Ensure model is registered
 app.include_router(plans.router, prefix="/api/plans", tags=["plans"])
 
 @app.get("/")
@@ -114,6 +167,11 @@ async def root():
     return {"message": "Welcome to $Funnel.ai API", "status": "online"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition (format 0.0.4)."""
+    return PlainTextResponse(prometheus.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
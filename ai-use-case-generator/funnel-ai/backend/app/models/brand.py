@@ -42,4 +42,7 @@ class BrandSettings(Base):
     weight_engagement = Column(Integer, default=50)
     weight_intent = Column(Integer, default=50)
 
+    # Bumped on every edit so workers can detect a stale cached copy
+    settings_version = Column(Integer, default=1)
+
     user = relationship("User")
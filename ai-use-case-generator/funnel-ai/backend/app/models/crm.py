@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..db.session import Base
@@ -42,6 +42,15 @@ class FollowUp(Base):
     # Relationships
     lead = relationship("Lead")
 
+    __table_args__ = (
+        # Calendar windows and iCal export: range on scheduled_at, filter on status
+        Index("ix_follow_ups_scheduled_at_status", "scheduled_at", "status"),
+        # Due alerts: equality on status/is_dismissed, then range on scheduled_at
+        Index("ix_follow_ups_alerts", "status", "is_dismissed", "scheduled_at"),
+        # Lead timeline: newest-first range per lead
+        Index("ix_follow_ups_lead_id_scheduled_at", "lead_id", "scheduled_at"),
+    )
+
 class LeadNote(Base):
     __tablename__ = "lead_notes"
 
@@ -56,4 +65,7 @@ class LeadNote(Base):
     # Relationships
     lead = relationship("Lead")
 
-
+    __table_args__ = (
+        # Lead timeline: newest-first range per lead
+        Index("ix_lead_notes_lead_id_created_at", "lead_id", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey, event
 from sqlalchemy.sql import func
 from ..db.session import Base
 
@@ -23,6 +23,11 @@ class Lead(Base):
     phone = Column(String, nullable=True)
     secondary_email = Column(String, nullable=True)
     secondary_phone = Column(String, nullable=True)
+
+    # Normalized dedupe keys (see services/dedupe.py), maintained on insert/update
+    email_key = Column(String, unique=True, index=True, nullable=True) # lowercased email
+    name_key = Column(String, index=True, nullable=True) # "first last|company"
+    phone_key = Column(String, index=True, nullable=True) # E.164
     
     # Company Info
     title = Column(String, index=True)
@@ -34,6 +39,17 @@ class Lead(Base):
     score = Column(Integer, default=0)
     status = Column(String, default="new")  # new, contacted, qualified, lost
     source = Column(String, default="manual")
+
+    # Cached Score Components (0-100, weight-independent; see services/scoring.py)
+    score_stage = Column(Integer, nullable=True)
+    score_icp = Column(Integer, nullable=True)
+    score_seniority = Column(Integer, nullable=True)
+    score_intent_website = Column(Integer, nullable=True)
+    score_intent_pricing = Column(Integer, nullable=True)
+    score_intent_demo = Column(Integer, nullable=True)
+    score_intent_content = Column(Integer, nullable=True)
+    score_intent_social = Column(Integer, nullable=True)
+    score_intent_email = Column(Integer, nullable=True)
     
     # Rich Data
     social_profiles = Column(JSON, nullable=True)  # {linkedin: url, twitter: url}
@@ -62,3 +78,14 @@ class Lead(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+@event.listens_for(Lead, "before_insert")
+def _set_match_keys(mapper, connection, target):
+    from ..services.dedupe import apply_match_keys
+    apply_match_keys(target)
+
+@event.listens_for(Lead, "before_update")
+def _sync_match_keys(mapper, connection, target):
+    from ..services.dedupe import apply_match_keys
+    apply_match_keys(target, only_changed=True)
@@ -12,4 +12,17 @@ class AccessLog(Base):
     duration_ms = Column(Float)
     ip_address = Column(String, nullable=True)
     
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class AccessLogMinute(Base):
+    """Per-minute downsample of access_logs rows past raw retention (see services/log_retention.py)."""
+    __tablename__ = "access_log_minutes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    minute = Column(DateTime(timezone=True), index=True)
+    method = Column(String)
+    path = Column(String, index=True)
+    status_code = Column(Integer)
+    count = Column(Integer, default=0)
+    sum_ms = Column(Float, default=0.0)
+    max_ms = Column(Float, default=0.0)
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON, Index
+from ..db.session import Base
+
+class RouteLatencyRollup(Base):
+    """One row per worker, route and rollup interval (see services/metrics_rollup.py)."""
+    __tablename__ = "route_latency_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    bucket_end = Column(DateTime(timezone=True), nullable=False)
+    method = Column(String, nullable=False)
+    route = Column(String, nullable=False)
+
+    count = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    sum_ms = Column(Float, default=0.0)
+    max_ms = Column(Float, default=0.0)
+    status_codes = Column(JSON, default={}) # {"200": 12, "404": 1}
+    histogram = Column(JSON, default={}) # sparse {bucket index: count}, see core/metrics.py
+
+    __table_args__ = (
+        Index("ix_route_latency_rollups_bucket_route", "bucket_start", "route"),
+    )
+
+class DashboardSummary(Base):
+    """Single row (id=1) of headline dashboard counters, refreshed by services/dashboard_rollup.py."""
+    __tablename__ = "dashboard_summary"
+
+    id = Column(Integer, primary_key=True)
+    total_leads = Column(Integer, default=0)
+    pipeline_value = Column(Float, default=0.0)
+    pending_tasks = Column(Integer, default=0)
+    refreshed_at = Column(DateTime(timezone=True))
+
+class DashboardDaily(Base):
+    """
+    One value per metric, dimension and day: "leads_created" (dimension "")
+    and "pipeline_value" (dimension = stage id, a daily snapshot).
+    """
+    __tablename__ = "dashboard_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    metric = Column(String, nullable=False)
+    dimension = Column(String, nullable=False, default="")
+    value = Column(Float, default=0.0)
+
+    __table_args__ = (
+        Index("ix_dashboard_daily_metric_day", "metric", "day", "dimension", unique=True),
+    )
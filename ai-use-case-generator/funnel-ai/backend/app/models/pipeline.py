@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Integer, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..db.session import Base
@@ -37,3 +37,10 @@ class Deal(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     tasks = relationship("Task", back_populates="deal")
+
+    __table_args__ = (
+        # Lead timeline: newest-first range per lead
+        Index("ix_deals_lead_id_created_at", "lead_id", "created_at"),
+        # Pipeline board: per-stage counts/sums and row_number() ranking in board order
+        Index("ix_deals_stage_id_id", "stage_id", "id"),
+    )
@@ -38,3 +38,13 @@ class User(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class RevokedToken(Base):
+    """Access tokens ended by logout before their expiry (see api/users.revoke_token)."""
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String, unique=True, index=True) # sha256 of the JWT; raw tokens are never stored
+    email = Column(String, index=True)
+    expires_at = Column(DateTime(timezone=True), index=True) # row can be purged after this
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
 from datetime import datetime
 
 class ActionResponse(BaseModel):
@@ -34,3 +34,45 @@ class FollowUpRequest(BaseModel):
 class NoteRequest(BaseModel):
     lead_id: int
     content: str
+
+# --- Bulk variants: act on a selection of leads in one request ---
+
+class LeadFilter(BaseModel):
+    # Same filters as GET /api/leads; an empty filter selects every lead
+    status: Optional[str] = None
+    source: Optional[str] = None
+    min_score: Optional[int] = None
+    campaign_id: Optional[int] = None
+    search: Optional[str] = None
+
+class LeadSelection(BaseModel):
+    lead_ids: Optional[List[int]] = None
+    filter: Optional[LeadFilter] = None
+
+    @model_validator(mode="after")
+    def _one_selector(self):
+        if (self.lead_ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of lead_ids or filter")
+        return self
+
+class BulkEmailRequest(LeadSelection):
+    subject: str
+    body: str
+
+class BulkSMSRequest(LeadSelection):
+    message: str
+
+class BulkLinkedInRequest(LeadSelection):
+    message: str
+
+class BulkPipelineAddRequest(LeadSelection):
+    stage_id: int
+
+class BulkFollowUpRequest(LeadSelection):
+    scheduled_at: datetime
+    notes: Optional[str] = None
+    title: Optional[str] = None
+    type: Optional[str] = "task"
+
+class BulkNoteRequest(LeadSelection):
+    content: str
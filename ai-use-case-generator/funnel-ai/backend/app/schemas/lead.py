@@ -91,3 +91,16 @@ class Lead(LeadBase):
 
     class Config:
         from_attributes = True
+
+class DedupeCandidate(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    company: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+class DedupeMatch(BaseModel):
+    index: int
+    exists: bool
+    lead_id: Optional[int] = None
+    matched_on: Optional[str] = None # email_key, name_key, phone_key
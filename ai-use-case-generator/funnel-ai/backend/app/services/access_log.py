@@ -0,0 +1,87 @@
+from sqlalchemy import insert
+import os
+import queue
+import random
+import threading
+from ..core.background import PeriodicWorker
+from ..core.metrics import queue_depth
+from ..db.session import SessionLocal
+from ..models.log import AccessLog
+
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", "500"))
+ACCESS_LOG_FLUSH_SECONDS = float(os.getenv("ACCESS_LOG_FLUSH_SECONDS", "2"))
+# Overload policy: "drop" keeps everything until the queue is full, then drops;
+# "sample" starts keeping only ACCESS_LOG_SAMPLE_RATE of records once half full
+ACCESS_LOG_OVERLOAD_POLICY = os.getenv("ACCESS_LOG_OVERLOAD_POLICY", "drop")
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+
+class AccessLogWriter:
+    """
+    Buffers access-log records in a bounded in-memory queue and writes them
+    in batches from a background thread, on a size or time trigger.
+    submit() never blocks and never touches the database.
+    """
+    def __init__(self, maxsize=ACCESS_LOG_QUEUE_SIZE, batch_size=ACCESS_LOG_BATCH_SIZE,
+                 flush_interval=ACCESS_LOG_FLUSH_SECONDS, policy=ACCESS_LOG_OVERLOAD_POLICY,
+                 sample_rate=ACCESS_LOG_SAMPLE_RATE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.worker = PeriodicWorker("access-log-flusher", flush_interval, self.flush)
+        self._flush_lock = threading.Lock()
+        self.counters = {"written": 0, "dropped": 0, "sampled_out": 0, "failed": 0}
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.worker.stop()
+
+    def submit(self, record: dict):
+        depth = self.queue.qsize()
+        if self.policy == "sample" and depth >= self.queue.maxsize // 2:
+            if random.random() >= self.sample_rate:
+                self.counters["sampled_out"] += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.counters["dropped"] += 1
+            return
+        if depth + 1 >= self.batch_size:
+            self.worker.wake()
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    return
+                db = SessionLocal()
+                try:
+                    db.execute(insert(AccessLog), batch)
+                    db.commit()
+                    self.counters["written"] += len(batch)
+                except Exception as e:
+                    db.rollback()
+                    self.counters["failed"] += len(batch)
+                    print(f"Access log flush failed: {e}")
+                finally:
+                    db.close()
+
+    def stats(self):
+        return {"queue_depth": self.queue.qsize(), "queue_capacity": self.queue.maxsize, **self.counters}
+
+access_log_writer = AccessLogWriter()
+queue_depth.set_function(access_log_writer.queue.qsize, "access_log")
@@ -0,0 +1,266 @@
+from sqlalchemy import and_, exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime
+from ..db.session import SessionLocal
+from ..models.crm import CRMIntegration, FollowUp, LeadNote
+from ..models.lead import Lead
+from ..models.lead_engine import WorkspaceAction, ActionStatus
+from ..models.pipeline import Deal, Stage
+from ..core.profiler import profiler
+from . import followup_feed
+from .dashboard_rollup import mark_dirty as mark_dashboard_dirty
+from .job_heartbeat import beat
+from .scoring import _score_expression
+import os
+
+ACTION_PREFIX = "bulk_"
+
+# Leads sent and logged per commit by the delivery job
+BULK_ACTION_CHUNK_SIZE = int(os.getenv("BULK_ACTION_CHUNK_SIZE", "500"))
+# Explicit lead_ids per request; larger selections should use a filter
+BULK_ACTION_MAX_IDS = int(os.getenv("BULK_ACTION_MAX_IDS", "10000"))
+
+# Channel -> (integration crm_type, contact column the lead needs, contact method)
+MESSAGE_CHANNELS = {
+    "email": ("smtp", Lead.email, "email"),
+    "sms": ("twilio", Lead.phone, "sms"),
+    "linkedin_dm": (None, None, "linkedin"),
+}
+
+CLOSED_STAGES = ["Deal Won", "Deal Lost"]
+
+def selection_clauses(selection: dict) -> list:
+    """WHERE clauses on Lead for a LeadSelection payload (lead_ids or filter)."""
+    if selection.get("lead_ids") is not None:
+        return [Lead.id.in_(selection["lead_ids"])]
+    lead_filter = selection.get("filter") or {}
+    clauses = []
+    if lead_filter.get("status"):
+        clauses.append(Lead.status == lead_filter["status"])
+    if lead_filter.get("source"):
+        clauses.append(Lead.source == lead_filter["source"])
+    if lead_filter.get("min_score") is not None:
+        clauses.append(Lead.score >= lead_filter["min_score"])
+    if lead_filter.get("campaign_id") is not None:
+        clauses.append(Lead.campaign_id == lead_filter["campaign_id"])
+    if lead_filter.get("search"):
+        search_term = f"%{lead_filter['search']}%"
+        clauses.append(or_(Lead.first_name.ilike(search_term), Lead.last_name.ilike(search_term),
+                           Lead.company.ilike(search_term)))
+    return clauses
+
+def _integration(db: Session, crm_type: str):
+    if crm_type is None:
+        return None
+    return db.query(CRMIntegration).filter(
+        CRMIntegration.crm_type == crm_type, CRMIntegration.user_id == 1, CRMIntegration.is_connected == True
+    ).first()
+
+def _note_text(channel: str, integration, params: dict):
+    if channel == "email":
+        if integration and integration.api_key and integration.endpoint:
+            return f"📧 Sent Email via {integration.endpoint}: {params['subject']}"
+        return f"📧 (Mock) Sent Email: {params['subject']}"
+    if channel == "sms":
+        if integration and integration.api_key:
+            return f"📱 Sent SMS via Twilio: {params['message'][:20]}..."
+        return f"📱 (Mock) Sent SMS: {params['message'][:20]}..."
+    return None # LinkedIn DMs only update contact info, as in /linkedin_dm
+
+class BulkActionRunner:
+    """
+    Actions on a selection of leads, tracked as WorkspaceActions.
+
+    CRM writes (notes, follow-ups, deals, contacted) are single INSERT ...
+    SELECT / UPDATE statements and finish inside the request. Message
+    sends are queued: process_job walks the selection in id order, one
+    chunk per commit, so a resumed job continues after
+    progress["last_lead_id"] (the chunk in flight may be sent twice).
+    """
+    def __init__(self, db: Session, user_id: str = None):
+        self.db = db
+        self.user_id = user_id
+
+    def _job(self, action: str, selection: dict, params: dict, status: str, progress: dict):
+        job = WorkspaceAction(
+            tenant_id=1, # Default
+            workspace_id=1,
+            action_type=ACTION_PREFIX + action,
+            status=status,
+            requested_by_user_id=self.user_id,
+            payload={"selection": selection, "params": params},
+            progress=progress,
+        )
+        self.db.add(job)
+        return job
+
+    def get_job(self, job_id: int):
+        return self.db.query(WorkspaceAction).filter(
+            WorkspaceAction.id == job_id,
+            WorkspaceAction.action_type.startswith(ACTION_PREFIX)
+        ).first()
+
+    # --- Set-based CRM writes ---
+
+    def _finish(self, action: str, selection: dict, params: dict, total: int, affected: int, **extra):
+        now = datetime.now()
+        job = self._job(action, selection, params, ActionStatus.completed.value,
+                        {"total": total, "processed": total, "affected": affected, **extra})
+        job.started_at = job.finished_at = now
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def _count(self, clauses) -> int:
+        return self.db.scalar(select(func.count(Lead.id)).where(*clauses)) or 0
+
+    def add_notes(self, selection: dict, content: str):
+        clauses = selection_clauses(selection)
+        total = self._count(clauses)
+        affected = self.db.execute(insert(LeadNote).from_select(
+            ["lead_id", "content"], select(Lead.id, literal(content)).where(*clauses)
+        )).rowcount
+        return self._finish("note_add", selection, {"content": content}, total, affected)
+
+    def schedule_followups(self, selection: dict, params: dict):
+        clauses = selection_clauses(selection)
+        total = self._count(clauses)
+        affected = self.db.execute(insert(FollowUp).from_select(
+            ["lead_id", "scheduled_at", "notes", "status", "title", "type"],
+            select(Lead.id, literal(params["scheduled_at"], FollowUp.scheduled_at.type), literal(params.get("notes")),
+                   literal("pending"), literal(params.get("title")), literal(params.get("type") or "task"))
+            .where(*clauses)
+        )).rowcount
+        # Bulk INSERT skips the mapper events calendar/iCal/alert caches and the dashboard listen to
+        followup_feed.mark_changed(self.db)
+        if affected:
+            mark_dashboard_dirty(self.db)
+        params = dict(params, scheduled_at=params["scheduled_at"].isoformat())
+        return self._finish("followup_schedule", selection, params, total, affected)
+
+    def add_to_pipeline(self, selection: dict, stage_id: int):
+        stage = self.db.query(Stage).filter(Stage.id == stage_id).first()
+        if not stage:
+            # Fallback to first stage if any exist, or error
+            stage = self.db.query(Stage).order_by(Stage.order).first()
+            if not stage:
+                return None
+        clauses = selection_clauses(selection)
+        total = self._count(clauses)
+        # Idempotency: skip leads that already have an open deal
+        open_deal = exists().where(
+            Deal.lead_id == Lead.id, Deal.stage_id == Stage.id, Stage.name.notin_(CLOSED_STAGES)
+        )
+        affected = self.db.execute(insert(Deal).from_select(
+            ["title", "lead_id", "stage_id", "value"],
+            select(literal("Deal for ") + func.coalesce(Lead.company, Lead.last_name), Lead.id,
+                   literal(stage.id), literal(0.0))
+            .where(*clauses, ~open_deal)
+        )).rowcount
+        if affected:
+            mark_dashboard_dirty(self.db)
+        return self._finish("pipeline_add", selection, {"stage_id": stage.id}, total, affected, stage=stage.name)
+
+    def mark_contacted(self, selection: dict, weights):
+        clauses = selection_clauses(selection)
+        # status feeds the score, so refresh score_stage/score in the same statement
+        stage, score = _score_expression(weights, self.db.get_bind().dialect.name, status="contacted")
+        affected = self.db.execute(
+            update(Lead).where(*clauses).values(
+                status="contacted", last_contacted_at=datetime.now(), last_contact_method="manual",
+                score_stage=stage, score=score),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        return self._finish("contacted", selection, {}, affected, affected)
+
+    # --- Queued message delivery ---
+
+    def _message_clauses(self, channel: str, selection: dict) -> list:
+        clauses = selection_clauses(selection)
+        contact = MESSAGE_CHANNELS[channel][1]
+        if contact is not None:
+            clauses.append(and_(contact.isnot(None), contact != ""))
+        return clauses
+
+    def queue_messages(self, channel: str, selection: dict, params: dict):
+        job = self._job(channel, selection, params, ActionStatus.queued.value, {
+            "total": self._count(self._message_clauses(channel, selection)),
+            "processed": 0,
+            "sent": 0,
+            "last_lead_id": 0,
+        })
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def process_job(self, job_id: int):
+        """
+        The worker function. Uses its own session: it outlives the request.
+        """
+        db = SessionLocal()
+        try:
+            job = db.get(WorkspaceAction, job_id)
+            if not job or job.status == ActionStatus.completed.value:
+                return
+            with profiler.span(job.action_type, f"{job.action_type}:{job_id}"):
+                self._deliver(db, job)
+        finally:
+            db.close()
+
+    def _deliver(self, db: Session, job: WorkspaceAction):
+        channel = job.action_type[len(ACTION_PREFIX):]
+        crm_type, contact, method = MESSAGE_CHANNELS[channel]
+        clauses = self._message_clauses(channel, job.payload["selection"])
+        params = job.payload["params"]
+        progress = dict(job.progress or {})
+
+        try:
+            job.status = ActionStatus.running.value
+            job.started_at = job.started_at or datetime.now()
+            job.error = None
+            job.progress = beat(dict(progress))
+            # Resolved once per job, not per lead
+            integration = _integration(db, crm_type)
+            note = _note_text(channel, integration, params)
+            db.commit()
+
+            columns = [Lead.id] + ([contact] if contact is not None else [])
+            while True:
+                chunk = db.execute(
+                    select(*columns).where(*clauses, Lead.id > progress["last_lead_id"])
+                    .order_by(Lead.id).limit(BULK_ACTION_CHUNK_SIZE)
+                ).all()
+                if not chunk:
+                    break
+                ids = [row.id for row in chunk]
+
+                if integration is not None:
+                    print(f"[REAL SEND] {channel} x{len(ids)} via {integration.endpoint or crm_type}...")
+                    # Provider batch APIs go here (smtplib / Twilio client), one connection per chunk
+                else:
+                    print(f"[MOCK SEND] {channel} x{len(ids)}: {params.get('subject') or params.get('message', '')[:40]}")
+
+                # Log and update contact info for the whole chunk in two statements
+                if note:
+                    db.execute(insert(LeadNote), [{"lead_id": lead_id, "content": note} for lead_id in ids])
+                db.execute(
+                    update(Lead).where(Lead.id.in_(ids)).values(last_contacted_at=datetime.now(), last_contact_method=method),
+                    execution_options={"synchronize_session": False},
+                )
+                progress["processed"] += len(ids)
+                progress["sent"] += len(ids)
+                progress["last_lead_id"] = ids[-1]
+                # Reassign so SQLAlchemy detects the JSON change
+                job.progress = beat(dict(progress))
+                db.commit()
+
+            job.status = ActionStatus.completed.value
+            job.finished_at = datetime.now()
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            job.status = ActionStatus.failed.value
+            job.error = str(e)
+            db.commit()
+            print(f"Bulk {channel} Job Failed: {e}")
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.models.campaign import Campaign, CampaignLead, CampaignStep
 from app.models.lead import Lead
 from app.models.template import MessageTemplate
+from app.core.metrics import campaign_ticks_total, campaign_sends_per_tick, campaign_actions_total
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,9 +37,13 @@ class CampaignRunner:
                     result = self._process_lead(lead_state, campaign)
                     if result:
                         results[result] += 1
+                        campaign_actions_total.labels(result).inc()
                 except Exception as e:
+                    campaign_actions_total.labels("errors").inc()
                     logger.error(f"Error processing lead {lead_state.id}: {e}")
                     
+        campaign_ticks_total.inc()
+        campaign_sends_per_tick.observe(results["emails_sent"])
         return results
 
     def _is_within_schedule(self, campaign: Campaign) -> bool:
@@ -0,0 +1,123 @@
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session, object_session
+from datetime import date, datetime, timedelta, timezone
+import os
+import threading
+import time
+from ..core.background import PeriodicWorker
+from ..db.session import SessionLocal
+from ..models.crm import FollowUp
+from ..models.lead import Lead
+from ..models.metrics import DashboardDaily, DashboardSummary
+from ..models.pipeline import Deal
+
+# How often the worker checks the dirty flag
+DASHBOARD_REFRESH_SECONDS = float(os.getenv("DASHBOARD_REFRESH_SECONDS", "15"))
+# Refresh at least this often even when clean: bulk writes and other workers don't set the flag here
+DASHBOARD_MAX_STALE_SECONDS = float(os.getenv("DASHBOARD_MAX_STALE_SECONDS", "300"))
+# Days of leads_created recomputed per refresh; older days are final
+DASHBOARD_DAILY_LOOKBACK_DAYS = int(os.getenv("DASHBOARD_DAILY_LOOKBACK_DAYS", "2"))
+
+LEADS_CREATED = "leads_created"
+PIPELINE_VALUE = "pipeline_value"
+METRICS = (LEADS_CREATED, PIPELINE_VALUE)
+
+_SESSION_KEY = "dashboard_dirty"
+
+_dirty = threading.Event()
+_dirty.set() # first tick after startup always refreshes
+_last_refresh = 0.0
+
+def mark_dirty(session: Session = None):
+    """
+    Flags the rollup for a refresh. With a session the flag is set when it
+    commits (and dropped on rollback), so the worker can't refresh from
+    rows that aren't visible yet; without one it is set immediately. ORM
+    writes to leads, deals and follow-ups do this automatically; call it
+    after set-based writes (bulk inserts, query.update()) that skip mapper events.
+    """
+    if session is None:
+        _dirty.set()
+    else:
+        session.info[_SESSION_KEY] = True
+
+def _on_change(mapper, connection, target):
+    mark_dirty(object_session(target))
+
+for _model in (Lead, Deal, FollowUp):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _on_change)
+
+@event.listens_for(Session, "after_commit")
+def _publish(session):
+    if session.info.pop(_SESSION_KEY, False):
+        _dirty.set()
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session, previous_transaction):
+    session.info.pop(_SESSION_KEY, None)
+
+def _as_date(value) -> date:
+    # SQLite's date() returns text, Postgres returns a date
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def refresh_dashboard(db: Session, backfill: bool = False):
+    """
+    Recomputes the summary row, leads_created for the last
+    DASHBOARD_DAILY_LOOKBACK_DAYS days (all history when `backfill` or the
+    series is empty) and today's pipeline_value snapshot, in one transaction.
+    """
+    now = datetime.now(timezone.utc)
+    today = now.date()
+
+    summary = db.get(DashboardSummary, 1) or DashboardSummary(id=1)
+    summary.total_leads = db.scalar(select(func.count(Lead.id))) or 0
+    summary.pipeline_value = db.scalar(select(func.sum(Deal.value))) or 0.0
+    summary.pending_tasks = db.scalar(select(func.count(FollowUp.id)).where(FollowUp.status == 'pending')) or 0
+    summary.refreshed_at = now
+    db.add(summary)
+
+    if not backfill:
+        backfill = db.scalar(select(DashboardDaily.id).where(DashboardDaily.metric == LEADS_CREATED).limit(1)) is None
+    day_expr = func.date(Lead.created_at)
+    per_day = select(day_expr, func.count(Lead.id)).where(Lead.created_at.isnot(None)).group_by(day_expr)
+    clear = delete(DashboardDaily).where(DashboardDaily.metric == LEADS_CREATED)
+    if not backfill:
+        since = today - timedelta(days=DASHBOARD_DAILY_LOOKBACK_DAYS - 1)
+        # Naive UTC, matching how CURRENT_TIMESTAMP defaults are stored
+        per_day = per_day.where(Lead.created_at >= datetime.combine(since, datetime.min.time()))
+        clear = clear.where(DashboardDaily.day >= since)
+    db.execute(clear)
+    rows = [{"day": _as_date(day), "metric": LEADS_CREATED, "dimension": "", "value": count}
+            for day, count in db.execute(per_day) if day is not None]
+    if rows:
+        db.execute(insert(DashboardDaily), rows)
+
+    # Deals move between stages, so stage value history only exists from these snapshots on
+    db.execute(delete(DashboardDaily).where(DashboardDaily.metric == PIPELINE_VALUE, DashboardDaily.day == today))
+    rows = [{"day": today, "metric": PIPELINE_VALUE, "dimension": str(stage_id) if stage_id is not None else "",
+             "value": value or 0.0}
+            for stage_id, value in db.execute(select(Deal.stage_id, func.sum(Deal.value)).group_by(Deal.stage_id))]
+    if rows:
+        db.execute(insert(DashboardDaily), rows)
+    db.commit()
+
+def refresh_if_dirty():
+    global _last_refresh
+    stale = time.monotonic() - _last_refresh >= DASHBOARD_MAX_STALE_SECONDS
+    if not (_dirty.is_set() or stale):
+        return
+    # Cleared before reading, so writes that land during the refresh trigger another one
+    _dirty.clear()
+    db = SessionLocal()
+    try:
+        refresh_dashboard(db)
+        _last_refresh = time.monotonic()
+    except Exception:
+        db.rollback()
+        _dirty.set()
+        raise
+    finally:
+        db.close()
+
+dashboard_rollup_worker = PeriodicWorker("dashboard-rollup", DASHBOARD_REFRESH_SECONDS, refresh_if_dirty)
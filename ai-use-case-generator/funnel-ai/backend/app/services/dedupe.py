@@ -0,0 +1,146 @@
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import os
+import re
+
+# Country calling code assumed for national-format numbers (e.g. "(555) 123-4567")
+DEFAULT_PHONE_COUNTRY_CODE = os.getenv("DEFAULT_PHONE_COUNTRY_CODE", "1")
+
+# Keys checked when deciding a candidate already exists, strongest first
+BLOCKING_KEYS = ("email_key", "name_key")
+
+_COMPANY_SUFFIXES = {"inc", "llc", "ltd", "limited", "corp", "corporation", "co", "company", "gmbh", "plc"}
+
+def _normalize_words(value: Optional[str]) -> str:
+    words = re.sub(r"[^a-z0-9]+", " ", (value or "").lower()).split()
+    return " ".join(words)
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
+def normalize_name_company(first_name: Optional[str], last_name: Optional[str], company: Optional[str]) -> Optional[str]:
+    """'Jane  Doe' at 'Acme, Inc.' -> 'jane doe|acme'. None without a full name."""
+    first, last = _normalize_words(first_name), _normalize_words(last_name)
+    if not first or not last:
+        return None
+    company_words = [w for w in _normalize_words(company).split() if w not in _COMPANY_SUFFIXES]
+    return f"{first} {last}|{' '.join(company_words)}"
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Best-effort E.164 ('+15551234567'). None when it can't be a phone number."""
+    if not phone:
+        return None
+    raw = phone.strip()
+    digits = re.sub(r"\D", "", raw)
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif len(digits) == 10:
+        digits = DEFAULT_PHONE_COUNTRY_CODE + digits
+    elif not (len(digits) == 11 and digits.startswith(DEFAULT_PHONE_COUNTRY_CODE)):
+        return None
+    if not 8 <= len(digits) <= 15:
+        return None
+    return f"+{digits}"
+
+def compute_match_keys(first_name=None, last_name=None, company=None, email=None, phone=None) -> Dict[str, Optional[str]]:
+    return {
+        "email_key": normalize_email(email),
+        "name_key": normalize_name_company(first_name, last_name, company),
+        "phone_key": normalize_phone(phone),
+    }
+
+# Match key -> the lead fields it is derived from
+MATCH_KEY_SOURCES = {
+    "email_key": ("email",),
+    "name_key": ("first_name", "last_name", "company"),
+    "phone_key": ("phone",),
+}
+
+def apply_match_keys(lead, only_changed: bool = False):
+    """
+    Keeps the indexed match-key columns in sync with the lead's fields.
+    With `only_changed` (updates), a key is recomputed only when one of its
+    source fields changed, so a key left empty on purpose (see
+    scripts/backfill_lead_match_keys.py) stays empty on unrelated writes.
+    """
+    keys = compute_match_keys(lead.first_name, lead.last_name, lead.company, lead.email, lead.phone)
+    if only_changed:
+        from sqlalchemy import inspect
+        attrs = inspect(lead).attrs
+        keys = {key: value for key, value in keys.items()
+                if any(getattr(attrs, field).history.has_changes() for field in MATCH_KEY_SOURCES[key])}
+    for key, value in keys.items():
+        setattr(lead, key, value)
+
+def find_existing(db: Session, candidates: List[Dict[str, Optional[str]]], keys=BLOCKING_KEYS) -> List[Optional[tuple]]:
+    """
+    Answers "which of these candidates already exist" with one query.
+    `candidates` are match-key dicts from compute_match_keys. Returns, per
+    candidate, (lead, matched_key) for the strongest matching key, or None.
+    """
+    from ..models.lead import Lead
+
+    values = {key: {c[key] for c in candidates if c.get(key)} for key in keys}
+    clauses = [getattr(Lead, key).in_(vals) for key, vals in values.items() if vals]
+    if not clauses:
+        return [None] * len(candidates)
+
+    index = {key: {} for key in keys}
+    for lead in db.query(Lead).filter(or_(*clauses)).order_by(Lead.id):
+        for key in keys:
+            value = getattr(lead, key)
+            if value in values[key]:
+                index[key].setdefault(value, lead)
+
+    matches = []
+    for candidate in candidates:
+        match = None
+        for key in keys:
+            lead = index[key].get(candidate.get(key))
+            if lead is not None:
+                match = (lead, key)
+                break
+        matches.append(match)
+    return matches
+
+def email_owner(db: Session, email: Optional[str], exclude_id: Optional[int] = None) -> Optional[int]:
+    """Id of the lead already holding `email`'s match key (other than `exclude_id`), or None."""
+    from ..models.lead import Lead
+
+    key = normalize_email(email)
+    if key is None:
+        return None
+    query = db.query(Lead.id).filter(Lead.email_key == key)
+    if exclude_id is not None:
+        query = query.filter(Lead.id != exclude_id)
+    row = query.first()
+    return row.id if row else None
+
+def drop_taken_emails(db: Session, enrichments: List[tuple]):
+    """
+    Enrichment writes emails onto existing leads; one another lead already
+    has (or one claimed earlier in the same batch) would violate the unique
+    email_key index. Such emails are dropped from the (lead, updates) pairs
+    and the lead is flagged with meta_data["duplicate_of"] for a merge,
+    as scripts/backfill_lead_match_keys.py does. One query per batch.
+    """
+    from ..models.lead import Lead
+
+    wanted = {normalize_email(updates.get("email")) for _, updates in enrichments} - {None}
+    if not wanted:
+        return
+    owners = dict(db.query(Lead.email_key, Lead.id).filter(Lead.email_key.in_(wanted)))
+    for lead, updates in enrichments:
+        key = normalize_email(updates.get("email"))
+        if key is None:
+            continue
+        owner = owners.get(key)
+        if owner is not None and owner != lead.id:
+            del updates["email"]
+            lead.meta_data = dict(lead.meta_data or {}, duplicate_of=owner)
+        else:
+            owners[key] = lead.id
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Set, Tuple
+import asyncio
+import os
+import threading
+import time
+from ..models.crm import FollowUp
+from ..models.lead import Lead
+from ..db.async_session import is_replica
+from . import followup_feed
+
+# Follow-ups due within this horizon (or overdue) raise an alert
+DUE_SOON_HOURS = float(os.getenv("DUE_SOON_HOURS", "24"))
+# Alerts also change with the clock, not just on writes: recount at least this often
+DUE_ALERTS_COUNT_TTL_SECONDS = float(os.getenv("DUE_ALERTS_COUNT_TTL_SECONDS", "30"))
+
+def alerts_query(now: datetime):
+    """
+    Pending, undismissed follow-ups due before now + DUE_SOON_HOURS, oldest
+    first. A range on ix_follow_ups_alerts (status, is_dismissed, scheduled_at),
+    so cost tracks the number of alerts, not the size of follow-up history.
+    """
+    return (
+        select(FollowUp.id, FollowUp.scheduled_at, FollowUp.lead_id, Lead.first_name, Lead.last_name)
+        .join(Lead, Lead.id == FollowUp.lead_id)
+        .where(
+            FollowUp.status == "pending",
+            FollowUp.is_dismissed == False,
+            FollowUp.scheduled_at < now + timedelta(hours=DUE_SOON_HOURS),
+        )
+        .order_by(FollowUp.scheduled_at, FollowUp.id)
+    )
+
+def after_cursor(query, cursor: Optional[Tuple[datetime, int]]):
+    """Keyset pagination on (scheduled_at, id), matching alerts_query's order."""
+    if cursor is None:
+        return query
+    scheduled_at, follow_up_id = cursor
+    return query.where(or_(FollowUp.scheduled_at > scheduled_at,
+                           and_(FollowUp.scheduled_at == scheduled_at, FollowUp.id > follow_up_id)))
+
+def to_alert(row, now: datetime) -> dict:
+    overdue = row.scheduled_at < now
+    return {
+        "id": row.id,
+        "type": "overdue_task" if overdue else "due_soon",
+        "severity": "high" if overdue else "medium",
+        "message": f"{'Overdue' if overdue else 'Due Today'}: Follow up with {row.first_name} {row.last_name}",
+        "context_id": row.lead_id,
+        "timestamp": row.scheduled_at,
+    }
+
+class UnreadCounter:
+    """
+    Count of active alerts, shared by every poll and stream in this worker.
+    Follow-ups are not owned per user yet (and dismissal is global), so one
+    counter serves all users. Recomputed when the follow-up feed moves or
+    after DUE_ALERTS_COUNT_TTL_SECONDS. Counts taken on a replica session
+    are returned but not stored, since they may predate the feed version.
+    """
+    def __init__(self, ttl: float = DUE_ALERTS_COUNT_TTL_SECONDS):
+        self.ttl = ttl
+        self._value: Optional[int] = None
+        self._version = -1
+        self._computed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def cached(self) -> Optional[int]:
+        if self._version == followup_feed.version() and time.monotonic() - self._computed_at < self.ttl:
+            return self._value
+        return None
+
+    async def get(self, db: AsyncSession) -> int:
+        value = self.cached()
+        if value is not None:
+            return value
+        # One recount at a time; concurrent callers reuse its result
+        async with self._lock:
+            value = self.cached()
+            if value is not None:
+                return value
+            version = followup_feed.version()
+            count = select(func.count()).select_from(alerts_query(datetime.now()).order_by(None).subquery())
+            value = (await db.execute(count)).scalar_one()
+            if not is_replica(db):
+                self._value, self._version, self._computed_at = value, version, time.monotonic()
+            return value
+
+unread_counter = UnreadCounter()
+
+class AlertBroadcaster:
+    """
+    Fans follow-up changes out to SSE clients. Commit hooks run on any
+    thread, so each subscriber queue is fed through its own event loop.
+    """
+    def __init__(self):
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+        # Size 1: a client that has not drained yet only needs to know "something changed"
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=1))
+        with self._lock:
+            self._subscribers.add(entry)
+        return entry
+
+    def unsubscribe(self, entry):
+        with self._lock:
+            self._subscribers.discard(entry)
+
+    def publish(self, ids=None):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue)
+            except RuntimeError:
+                # Loop already closed (worker shutting down)
+                self.unsubscribe((loop, queue))
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue):
+        if not queue.full():
+            queue.put_nowait(True)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+broadcaster = AlertBroadcaster()
+followup_feed.subscribe(broadcaster.publish)
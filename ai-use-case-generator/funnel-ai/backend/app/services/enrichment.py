@@ -1,60 +1,321 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+import os
+import threading
+import time
+from ..core.cache import TTLCache
+from ..core.metrics import enrichment_call_seconds, enrichment_leads_total
 from ..models.lead import Lead
 
+# Provider chain, tried in parallel; the first provider with data for a lead wins
+ENRICHMENT_PROVIDERS = os.getenv("ENRICHMENT_PROVIDERS", "mock")
+APOLLO_API_KEY = os.getenv("APOLLO_API_KEY")
+# Paid lookups are cached per person so we never pay twice within the TTL
+ENRICHMENT_CACHE_TTL_SECONDS = float(os.getenv("ENRICHMENT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+ENRICHMENT_CACHE_SIZE = int(os.getenv("ENRICHMENT_CACHE_SIZE", "50000"))
+ENRICHMENT_HTTP_POOL_SIZE = int(os.getenv("ENRICHMENT_HTTP_POOL_SIZE", "10"))
+
+class RateLimiter:
+    """Spaces out calls so a provider never exceeds `rate_per_second`."""
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """Pooled HTTP client shared by every provider (keep-alive across calls)."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=ENRICHMENT_HTTP_POOL_SIZE, pool_maxsize=ENRICHMENT_HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+def missing_fields(lead: Lead, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The part of a provider's person record this lead still lacks. Computed
+    per lead, so one cached record can serve several leads for the same
+    person without overwriting what each already has.
+    """
+    current = {
+        "email": lead.email,
+        "phone": lead.phone,
+        "linkedin_url": (lead.social_profiles or {}).get("linkedin"),
+        "title": lead.title,
+    }
+    return {key: value for key, value in record.items() if value and not current.get(key)}
+
 class BaseEnrichmentProvider:
     """Base interface for data enrichment providers."""
+    name = "base"
+    # Max leads per lookup_many call and calls per second the API allows
+    batch_size = 1
+    rate_limit_per_second = 0.0
+
+    @property
+    def http(self):
+        return get_http_session()
+
+    def lookup_many(self, leads: List[Lead]) -> List[Dict[str, Any]]:
+        """
+        Look up a batch of at most `batch_size` leads.
+        Returns the provider's person record (email, phone, linkedin_url,
+        title; whatever it found) per lead, in the same order. {} is a
+        genuine miss; None means the lookup failed (provider error), so the
+        lead is neither cached nor marked as enriched and is retried later.
+        """
+        raise NotImplementedError
+
     def enrich(self, lead: Lead) -> Dict[str, Any]:
         """
         Enrich a single lead.
         Returns a dictionary of fields to update on the lead.
         """
-        raise NotImplementedError
+        return self.enrich_many([lead])[0]
+
+    def enrich_many(self, leads: List[Lead]) -> List[Optional[Dict[str, Any]]]:
+        """One update dictionary per lead: the fields it is missing from its record (None if the lookup failed)."""
+        return _updates(leads, self.lookup_many(leads))
 
 class MockEnrichmentProvider(BaseEnrichmentProvider):
     """Simulates enrichment for development/demo purposes."""
-    def enrich(self, lead: Lead) -> Dict[str, Any]:
+    name = "mock"
+    batch_size = 25
+
+    def lookup_many(self, leads: List[Lead]) -> List[Dict[str, Any]]:
+        return [self._lookup(lead) for lead in leads]
+
+    def _lookup(self, lead: Lead) -> Dict[str, Any]:
         import random
-        
-        updates = {}
-        
-        # Simulate finding missing data
-        if not lead.email:
-            updates["email"] = f"{lead.first_name.lower()}.{lead.last_name.lower()}@example.com"
-            
-        if not lead.phone:
-            updates["phone"] = f"+1 (555) {random.randint(100, 999)}-{random.randint(1000, 9999)}"
-            
-        if not lead.linkedin_url:
-            updates["linkedin_url"] = f"https://linkedin.com/in/{lead.first_name.lower()}-{lead.last_name.lower()}"
-            
-        # Simulate title or company correction occasionally
-        if not lead.title:
-            updates["title"] = "Founder & CEO" # Optimistic guess
-        
-        return updates
+
+        first, last = (lead.first_name or "").lower(), (lead.last_name or "").lower()
+        # Simulate finding contact data; missing_fields keeps what the lead already has
+        return {
+            "email": f"{first}.{last}@example.com",
+            "phone": f"+1 (555) {random.randint(100, 999)}-{random.randint(1000, 9999)}",
+            "linkedin_url": f"https://linkedin.com/in/{first}-{last}",
+            "title": "Founder & CEO", # Optimistic guess
+        }
 
 class ApolloEnrichmentProvider(BaseEnrichmentProvider):
-    """Placeholder for future Apollo.io integration."""
+    """Apollo.io people/bulk_match."""
+    name = "apollo"
+    # people/bulk_match accepts up to 10 details per request
+    batch_size = 10
+    rate_limit_per_second = 1.0
+    URL = "https://api.apollo.io/v1/people/bulk_match"
+
     def __init__(self, api_key: str):
         self.api_key = api_key
-        
-    def enrich(self, lead: Lead) -> Dict[str, Any]:
-        # TODO: Implement actual Apollo API call
-        # response = requests.post("https://api.apollo.io/v1/people/match", json={...})
-        return {}
+
+    def lookup_many(self, leads: List[Lead]) -> List[Dict[str, Any]]:
+        response = self.http.post(self.URL, json={
+            "details": [{"first_name": l.first_name, "last_name": l.last_name,
+                         "organization_name": l.company, "email": l.email} for l in leads]
+        }, headers={"X-Api-Key": self.api_key}, timeout=10)
+        response.raise_for_status()
+        # One entry per detail, in order; null when Apollo found no match
+        matches = (response.json() or {}).get("matches") or []
+        return [self._record(matches[i] if i < len(matches) else None) for i in range(len(leads))]
+
+    @staticmethod
+    def _record(person: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not person:
+            return {}
+        phones = person.get("phone_numbers") or []
+        phone = next((p.get("sanitized_number") or p.get("raw_number") for p in phones
+                      if p.get("sanitized_number") or p.get("raw_number")), None)
+        record = {
+            "email": person.get("email"),
+            "phone": phone,
+            "linkedin_url": person.get("linkedin_url"),
+            "title": person.get("title"),
+        }
+        # Apollo masks emails it won't reveal on the current plan
+        if record["email"] and "email_not_unlocked" in record["email"]:
+            record["email"] = None
+        return {key: value for key, value in record.items() if value}
+
+def enrichment_cache_key(lead: Lead) -> Optional[str]:
+    """
+    Normalized identity of the person behind a lead: email when known,
+    otherwise name at the company domain. None means "don't cache".
+    """
+    if lead.email:
+        return f"email:{lead.email.strip().lower()}"
+
+    domain = None
+    source_url = (lead.meta_data or {}).get("source_url")
+    if source_url:
+        domain = urlparse(source_url if "//" in source_url else f"//{source_url}").hostname
+    if domain:
+        domain = domain.lower().removeprefix("www.")
+    else:
+        domain = (lead.company or "").strip().lower()
+    name = f"{lead.first_name or ''} {lead.last_name or ''}".strip().lower()
+    if not domain or not name:
+        return None
+    return f"person:{name}@{domain}"
+
+class CachedEnrichmentProvider(BaseEnrichmentProvider):
+    """
+    Serves repeat lookups from a TTL cache; only misses reach `provider`.
+    Caches the provider's person record, not a lead's update diff.
+    """
+    name = "cached"
+
+    def __init__(self, provider: BaseEnrichmentProvider, cache: TTLCache):
+        self.provider = provider
+        self.cache = cache
+        self.batch_size = provider.batch_size
+
+    def lookup_many(self, leads: List[Lead]) -> List[Dict[str, Any]]:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(leads)
+        misses = []
+        for i, lead in enumerate(leads):
+            key = enrichment_cache_key(lead)
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                results[i] = dict(cached)
+            else:
+                misses.append((i, key, lead))
+
+        if misses:
+            fetched = call_lookup(self.provider, [lead for _, _, lead in misses])
+            for (i, key, _), record in zip(misses, fetched):
+                # Empty results are cached too: a miss is still a paid lookup.
+                # Failed lookups (None) are not, or an outage would hide the lead for the whole TTL
+                if key and record is not None:
+                    self.cache.set(key, dict(record))
+                results[i] = record
+        return results
+
+_chain_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="enrichment-chain")
+
+class ChainedEnrichmentProvider(BaseEnrichmentProvider):
+    """
+    Queries every provider in parallel. For each lead the first provider to
+    return data wins; stragglers are not waited on once all leads are resolved.
+    Leads still without data after a provider failed come back as None
+    (unresolved by error), since that provider might have had them.
+    """
+    name = "chain"
+
+    def __init__(self, providers: List[BaseEnrichmentProvider]):
+        self.providers = providers
+        self.batch_size = min(p.batch_size for p in providers)
+
+    def lookup_many(self, leads: List[Lead]) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = [{} for _ in leads]
+        unresolved = set(range(len(leads)))
+        pending = {_chain_executor.submit(call_lookup, p, leads) for p in self.providers}
+        failed = False
+
+        while pending and unresolved:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    provider_results = future.result()
+                except Exception as e:
+                    print(f"Enrichment provider error: {e}")
+                    failed = True
+                    continue
+                for i in list(unresolved):
+                    if provider_results[i]:
+                        results[i] = provider_results[i]
+                        unresolved.discard(i)
+        if failed:
+            for i in unresolved:
+                results[i] = None
+        return results
+
+def apply_enrichment(lead: Lead, updates: Dict[str, Any]):
+    """Writes provider output onto the lead, mapping non-column fields."""
+    for key, value in updates.items():
+        if key == "linkedin_url":
+            profiles = dict(lead.social_profiles or {})
+            profiles["linkedin"] = value
+            lead.social_profiles = profiles
+        else:
+            setattr(lead, key, value)
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider: BaseEnrichmentProvider) -> RateLimiter:
+    """Process-wide limiter per provider, shared by every job and request."""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(provider.name)
+        if limiter is None:
+            limiter = _rate_limiters[provider.name] = RateLimiter(provider.rate_limit_per_second)
+        return limiter
+
+def call_lookup(provider: BaseEnrichmentProvider, leads: List[Lead]) -> List[Dict[str, Any]]:
+    """Single entry point for provider lookups so rate limits always apply."""
+    get_rate_limiter(provider).acquire()
+    enrichment_leads_total.labels(provider.name).inc(len(leads))
+    with enrichment_call_seconds.labels(provider.name).time():
+        return provider.lookup_many(leads)
+
+def _updates(leads: List[Lead], records: List[Optional[Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+    return [None if record is None else missing_fields(lead, record) for lead, record in zip(leads, records)]
+
+def call_provider(provider: BaseEnrichmentProvider, leads: List[Lead]) -> List[Optional[Dict[str, Any]]]:
+    """Rate-limited lookup, reduced to each lead's missing fields (None where the lookup failed)."""
+    return _updates(leads, call_lookup(provider, leads))
+
+def _build_provider(name: str) -> Optional[BaseEnrichmentProvider]:
+    name = name.strip().lower()
+    if name == "mock":
+        return MockEnrichmentProvider()
+    if name == "apollo" and APOLLO_API_KEY:
+        return ApolloEnrichmentProvider(APOLLO_API_KEY)
+    return None
+
+_provider: Optional[BaseEnrichmentProvider] = None
+_provider_lock = threading.Lock()
 
 def get_enrichment_provider() -> BaseEnrichmentProvider:
     """
     Factory to get the configured provider.
-    In production, this would read from environment variables.
-    """
-    # config = get_settings()
-    # if config.ENRICHMENT_PROVIDER == "APOLLO":
-    #     return ApolloEnrichmentProvider(config.APOLLO_API_KEY)
-    
-    return MockEnrichmentProvider()
-
-def enrich_lead_service(lead: Lead) -> Dict[str, Any]:
-    """Service function to enrich a lead and return the new data."""
-    provider = get_enrichment_provider()
-    return provider.enrich(lead)
+    Built once per process from ENRICHMENT_PROVIDERS (comma-separated) and
+    reused, so the response cache and HTTP pool persist across calls.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            providers = [p for p in map(_build_provider, ENRICHMENT_PROVIDERS.split(",")) if p]
+            if not providers:
+                providers = [MockEnrichmentProvider()]
+            inner = providers[0] if len(providers) == 1 else ChainedEnrichmentProvider(providers)
+            _provider = CachedEnrichmentProvider(inner, TTLCache(ENRICHMENT_CACHE_SIZE, ENRICHMENT_CACHE_TTL_SECONDS))
+        return _provider
+
+def set_enrichment_provider(provider: Optional[BaseEnrichmentProvider]):
+    """Swap in a provider (e.g. a local fake in scripts/tests); None rebuilds from env."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+def enrich_lead_service(lead: Lead) -> Optional[Dict[str, Any]]:
+    """Service function to enrich a lead and return the new data (None if the lookup failed)."""
+    return call_provider(get_enrichment_provider(), [lead])[0]
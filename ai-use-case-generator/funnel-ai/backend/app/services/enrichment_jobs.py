@@ -0,0 +1,142 @@
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from ..db.session import SessionLocal
+from ..models.lead import Lead
+from ..models.lead_engine import WorkspaceAction, ActionStatus
+from .enrichment import get_enrichment_provider, call_provider, apply_enrichment
+from .scoring import apply_lead_score, SCORE_INPUT_FIELDS
+from .job_heartbeat import beat
+from .dedupe import drop_taken_emails
+from ..core.profiler import profiler
+import os
+
+ACTION_TYPE = "enrich_leads"
+
+ENRICH_CHUNK_SIZE = int(os.getenv("ENRICH_CHUNK_SIZE", "200"))
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "4"))
+# Leads enriched more recently than this are skipped
+ENRICH_STALE_DAYS = int(os.getenv("ENRICH_STALE_DAYS", "30"))
+
+class EnrichmentJobRunner:
+    """
+    Bulk enrichment as a resumable background job, tracked as a WorkspaceAction.
+    Leads are streamed in id order and committed one chunk at a time, so a
+    restarted job continues after progress["last_lead_id"].
+    """
+    def __init__(self, db: Session, user_id: str = None):
+        self.db = db
+        self.user_id = user_id
+
+    def start_job(self, stale_days: int = None, chunk_size: int = None, workspace_id: int = 1):
+        stale_days = ENRICH_STALE_DAYS if stale_days is None else stale_days
+        cutoff = datetime.now() - timedelta(days=stale_days)
+
+        job = WorkspaceAction(
+            tenant_id=1, # Default
+            workspace_id=workspace_id,
+            action_type=ACTION_TYPE,
+            status=ActionStatus.queued.value,
+            requested_by_user_id=self.user_id,
+            payload={"cutoff": cutoff.isoformat(), "chunk_size": chunk_size or ENRICH_CHUNK_SIZE},
+            progress=self._initial_progress(cutoff)
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def _initial_progress(self, cutoff):
+        total = self._pending_query(cutoff).count()
+        return {
+            "total": total,
+            "processed": 0,
+            "enriched": 0,
+            "last_lead_id": 0,
+            "details": {"emails": 0, "phones": 0, "linkedin": 0}
+        }
+
+    def _pending_query(self, cutoff, db: Session = None):
+        return (db or self.db).query(Lead).filter(
+            or_(Lead.last_enriched_at.is_(None), Lead.last_enriched_at < cutoff)
+        )
+
+    def get_job(self, job_id: int):
+        return self.db.query(WorkspaceAction).filter(
+            WorkspaceAction.id == job_id,
+            WorkspaceAction.action_type == ACTION_TYPE
+        ).first()
+
+    def process_job(self, job_id: int):
+        """
+        The worker function. Uses its own session: it outlives the request.
+        """
+        db = SessionLocal()
+        try:
+            job = db.query(WorkspaceAction).get(job_id)
+            if not job or job.status == ActionStatus.completed.value:
+                return
+            with profiler.span(ACTION_TYPE, f"{ACTION_TYPE}:{job_id}"):
+                self._run(db, job)
+        finally:
+            db.close()
+
+    def _run(self, db: Session, job: WorkspaceAction):
+        from ..api.brand import get_cached_brand_settings
+        provider = get_enrichment_provider()
+        weights = get_cached_brand_settings(db)
+        cutoff = datetime.fromisoformat(job.payload["cutoff"])
+        chunk_size = job.payload.get("chunk_size", ENRICH_CHUNK_SIZE)
+        progress = dict(job.progress or {})
+
+        try:
+            job.status = ActionStatus.running.value
+            job.started_at = job.started_at or datetime.now()
+            job.error = None
+            job.progress = beat(dict(progress, details=dict(progress["details"])))
+            db.commit()
+
+            with ThreadPoolExecutor(max_workers=ENRICH_CONCURRENCY) as pool:
+                while True:
+                    chunk = self._pending_query(cutoff, db).filter(
+                        Lead.id > progress["last_lead_id"]
+                    ).order_by(Lead.id).limit(chunk_size).all()
+                    if not chunk:
+                        break
+
+                    batches = [chunk[i:i + provider.batch_size] for i in range(0, len(chunk), provider.batch_size)]
+                    results = pool.map(lambda batch: call_provider(provider, batch), batches)
+
+                    now = datetime.now()
+                    # None = the provider failed for this lead: left un-enriched so a later run retries it
+                    enrichments = [pair for batch, batch_updates in zip(batches, results)
+                                   for pair in zip(batch, batch_updates) if pair[1] is not None]
+                    drop_taken_emails(db, enrichments)
+                    for lead, updates in enrichments:
+                        if updates:
+                            progress["enriched"] += 1
+                            if "email" in updates: progress["details"]["emails"] += 1
+                            if "phone" in updates: progress["details"]["phones"] += 1
+                            if "linkedin_url" in updates: progress["details"]["linkedin"] += 1
+                            apply_enrichment(lead, updates)
+                            if SCORE_INPUT_FIELDS & updates.keys():
+                                apply_lead_score(lead, weights)
+                        lead.last_enriched_at = now
+
+                    progress["processed"] += len(chunk)
+                    progress["last_lead_id"] = chunk[-1].id
+                    # Reassign so SQLAlchemy detects the JSON change
+                    job.progress = beat(dict(progress, details=dict(progress["details"])))
+                    db.commit()
+
+            job.status = ActionStatus.completed.value
+            job.finished_at = datetime.now()
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            job.status = ActionStatus.failed.value
+            job.error = str(e)
+            db.commit()
+            print(f"Enrichment Job Failed: {e}")
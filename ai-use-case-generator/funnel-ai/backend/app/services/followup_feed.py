@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from typing import Callable, Iterable, List, Optional, Set
+import threading
+from ..models.crm import FollowUp
+
+# Change feed for follow-ups. Calendar, iCal and notification caches key their
+# entries on version() and drop them when it moves. The counter is bumped only
+# after a commit, so a reader that sees the new version also sees the new rows.
+# In-process only: other workers notice through their caches' TTLs.
+
+_SESSION_KEY = "followup_feed_changed"
+
+_lock = threading.Lock()
+_version = 0
+_changed_at = datetime.now(timezone.utc)
+_subscribers: List[Callable[[Optional[Set[int]]], None]] = []
+
+def version() -> int:
+    return _version
+
+def changed_at() -> datetime:
+    return _changed_at
+
+def subscribe(fn: Callable[[Optional[Set[int]]], None]):
+    """`fn(ids)` runs after every committed change; ids is None when unknown (set-based writes)."""
+    with _lock:
+        _subscribers.append(fn)
+
+def bump(ids: Optional[Iterable[int]] = None):
+    global _version, _changed_at
+    ids = set(ids) if ids is not None else None
+    with _lock:
+        _version += 1
+        _changed_at = datetime.now(timezone.utc)
+        subscribers = list(_subscribers)
+    for fn in subscribers:
+        try:
+            fn(ids)
+        except Exception as e:
+            print(f"Follow-up feed subscriber failed: {e}")
+
+def mark_changed(session: Session, ids: Optional[Iterable[int]] = None):
+    """
+    Records a follow-up change on `session`, published when it commits.
+    ORM inserts/updates/deletes do this automatically; call it after
+    set-based writes (query.update(), bulk inserts) that skip mapper events.
+    """
+    pending = session.info.setdefault(_SESSION_KEY, set())
+    if ids is None:
+        session.info[_SESSION_KEY] = None
+    elif pending is not None:
+        pending.update(ids)
+
+def _on_followup_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        mark_changed(session, [target.id])
+
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(FollowUp, _event, _on_followup_change)
+
+@event.listens_for(Session, "after_commit")
+def _publish(session):
+    if _SESSION_KEY in session.info:
+        bump(session.info.pop(_SESSION_KEY))
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session, previous_transaction):
+    session.info.pop(_SESSION_KEY, None)
@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Set, Tuple
+import hashlib
+import os
+import threading
+import time
+from ..models.crm import FollowUp
+from ..models.lead import Lead
+from . import followup_feed
+
+# Full rebuild at least this often, so changes made by other workers show up
+ICAL_CACHE_TTL_SECONDS = float(os.getenv("ICAL_CACHE_TTL_SECONDS", "300"))
+
+HEADER = "\r\n".join([
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    "PRODID:-//Funnel.ai//Calendar//EN",
+    "CALSCALE:GREGORIAN",
+]) + "\r\n"
+FOOTER = "END:VCALENDAR"
+
+def _escape(value: str) -> str:
+    # RFC 5545 TEXT escaping; raw newlines or commas in notes would break the feed
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+def _vevent(row) -> str:
+    dt_start = row.scheduled_at.strftime('%Y%m%dT%H%M%SZ') # UTC
+    kind = (row.type or "task").capitalize()
+    if row.title:
+        summary = row.title
+    elif row.lead_pk is not None:
+        summary = f"{kind}: {row.first_name} {row.last_name}"
+    else:
+        summary = f"{kind}: General Task"
+    return "\r\n".join([
+        "BEGIN:VEVENT",
+        f"UID:funnel-task-{row.id}@funnel.ai",
+        f"DTSTAMP:{dt_start}",
+        f"DTSTART:{dt_start}",
+        f"SUMMARY:{_escape(summary)}",
+        f"DESCRIPTION:{_escape(row.notes or '')}",
+        "END:VEVENT",
+    ]) + "\r\n"
+
+def _pending_events_query():
+    return (
+        select(FollowUp.id, FollowUp.title, FollowUp.type, FollowUp.scheduled_at, FollowUp.notes,
+               Lead.id.label("lead_pk"), Lead.first_name, Lead.last_name)
+        .outerjoin(Lead, Lead.id == FollowUp.lead_id)
+        .where(FollowUp.status == "pending")
+    )
+
+class ICalFeed:
+    """
+    Serialized VEVENT per pending follow-up, kept between requests.
+    Follow-up commits (services/followup_feed.py) mark ids dirty; the next
+    request re-reads only those rows and patches them in. Set-based writes
+    with unknown ids, and the TTL, trigger a full rebuild.
+    """
+    def __init__(self, ttl: float = ICAL_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._events: Dict[int, Tuple[datetime, str]] = {}
+        self._chunks: List[str] = [HEADER, FOOTER]
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[datetime] = None
+        self._built_at = 0.0
+        # None means "rebuild everything"; guarded by _pending_lock, which
+        # commit hooks take, so they never wait on a rebuild
+        self._pending: Optional[Set[int]] = None
+        self._pending_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.stats = {"full_builds": 0, "patches": 0, "patched_rows": 0}
+
+    def invalidate(self, ids: Optional[Set[int]] = None):
+        with self._pending_lock:
+            if ids is None or self._pending is None:
+                self._pending = None
+            else:
+                self._pending |= ids
+
+    def is_current(self) -> bool:
+        """True when a request can be answered from the cache without a query."""
+        with self._pending_lock:
+            clean = self._pending is not None and not self._pending
+        return clean and self.etag is not None and time.monotonic() - self._built_at < self.ttl
+
+    def snapshot(self, db: Session) -> Tuple[List[str], str, datetime]:
+        """Chunks of the current feed plus its ETag and Last-Modified; queries only if something changed."""
+        with self._build_lock:
+            if not self.is_current():
+                with self._pending_lock:
+                    pending, self._pending = self._pending, set()
+                if pending is None or self.etag is None or time.monotonic() - self._built_at >= self.ttl:
+                    self._rebuild(db)
+                else:
+                    self._patch(db, pending)
+            return self._chunks, self.etag, self.last_modified
+
+    def _rebuild(self, db: Session):
+        self._events = {row.id: (row.scheduled_at, _vevent(row)) for row in db.execute(_pending_events_query())}
+        self._built_at = time.monotonic()
+        self.stats["full_builds"] += 1
+        self._assemble()
+
+    def _patch(self, db: Session, ids: Set[int]):
+        rows = db.execute(_pending_events_query().where(FollowUp.id.in_(ids))).all()
+        for follow_up_id in ids:
+            # Completed, cancelled and deleted follow-ups leave the feed
+            self._events.pop(follow_up_id, None)
+        for row in rows:
+            self._events[row.id] = (row.scheduled_at, _vevent(row))
+        self.stats["patches"] += 1
+        self.stats["patched_rows"] += len(ids)
+        self._assemble()
+
+    def _assemble(self):
+        events = [text for _, text in sorted(self._events.values(), key=lambda e: e[0])]
+        chunks = [HEADER, *events, FOOTER]
+        digest = hashlib.sha1()
+        for chunk in chunks:
+            digest.update(chunk.encode("utf-8"))
+        etag = f'"{digest.hexdigest()}"'
+        if etag != self.etag:
+            # Whole seconds: that is all Last-Modified / If-Modified-Since can carry
+            self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self._chunks, self.etag = chunks, etag
+
+    def status(self) -> dict:
+        with self._pending_lock:
+            pending = None if self._pending is None else len(self._pending)
+        return {"events": len(self._events), "etag": self.etag, "pending_changes": pending,
+                "last_modified": self.last_modified.isoformat() if self.last_modified else None, **self.stats}
+
+ical_feed = ICalFeed()
+followup_feed.subscribe(ical_feed.invalidate)
@@ -0,0 +1,63 @@
+from sqlalchemy import Text, cast, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+from ..models.lead_engine import WorkspaceAction, ActionStatus
+import os
+
+# A queued/running job whose worker hasn't committed for this long is presumed dead (process restart)
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "300"))
+
+def beat(progress: dict) -> dict:
+    """Stamps progress["heartbeat_at"]; workers call it before every progress commit."""
+    progress["heartbeat_at"] = datetime.now().isoformat()
+    return progress
+
+def _naive(value: datetime) -> datetime:
+    # Postgres returns timezone-aware timestamps, SQLite naive ones
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+def last_beat(job: WorkspaceAction) -> Optional[datetime]:
+    at = (job.progress or {}).get("heartbeat_at")
+    if at:
+        return datetime.fromisoformat(at)
+    # Jobs from before heartbeats
+    at = job.started_at or job.created_at
+    return _naive(at) if at else None
+
+def is_stale(job: WorkspaceAction) -> bool:
+    at = last_beat(job)
+    return at is None or datetime.now() - at > timedelta(seconds=JOB_STALE_SECONDS)
+
+def claim_for_resume(db: Session, job: WorkspaceAction) -> bool:
+    """
+    Claims `job` for a new worker if it may be resumed: it failed, or it is
+    still queued/running but nothing has beaten for JOB_STALE_SECONDS (a
+    queued job whose BackgroundTasks callback died with the process never
+    beats; its age counts from created_at). The claim is a conditional
+    UPDATE on the status and progress the decision was made on, so of two
+    concurrent resume requests only one gets rowcount 1 and starts a worker.
+    """
+    # Decide on a fresh row, and remember the exact progress text it was read with:
+    # progress carries the heartbeat, so that text changes with every worker commit
+    job, seen_progress = db.execute(
+        select(WorkspaceAction, cast(WorkspaceAction.progress, Text).label("progress_text"))
+        .where(WorkspaceAction.id == job.id)
+        .execution_options(populate_existing=True)
+    ).one()
+    resumable = job.status == ActionStatus.failed.value or (
+        job.status in (ActionStatus.queued.value, ActionStatus.running.value) and is_stale(job)
+    )
+    if not resumable:
+        return False
+    claimed = db.execute(
+        update(WorkspaceAction).where(
+            WorkspaceAction.id == job.id,
+            WorkspaceAction.status == job.status,
+            cast(WorkspaceAction.progress, Text).is_not_distinct_from(seen_progress),
+        ).values(status=ActionStatus.running.value, progress=beat(dict(job.progress or {}))),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.commit()
+    db.refresh(job)
+    return claimed == 1
@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from ..models.lead_engine import LeadRun, Company, LeadRunStatus, WorkspacePreset, CompanyContact, ContactType
 from ..models.lead import Lead
+from ..core.metrics import lead_run_stage_seconds, crawl_fetch_seconds
+from ..core.profiler import profiler
 from datetime import datetime
 import json
+import time
 
 class LeadEngine:
     def __init__(self, db: Session, user_id: str = None):
@@ -45,7 +48,12 @@ class LeadEngine:
     def process_run(self, run_id: int):
         """
         The worker function that executes the run.
+        Profiled when the sampling profiler is on (see core/profiler.py).
         """
+        with profiler.span("lead_run", f"lead_run:{run_id}"):
+            self._process_run(run_id)
+
+    def _process_run(self, run_id: int):
         run = self.db.query(LeadRun).get(run_id)
         if not run: return
         
@@ -62,31 +70,35 @@ class LeadEngine:
             # 1. Dispatch based on Strategy
             if platform == 'jobs':
                 # Path B: Intent (ATS / Jobs)
-                results = self._intent(config)
+                with lead_run_stage_seconds.labels("intent").time():
+                    results = self._intent(config)
             else:
                 # Path A: Discovery (Google / General)
-                results = self._discover(config)
+                with lead_run_stage_seconds.labels("discover").time():
+                    results = self._discover(config)
             
             # 2. Process Results -> Company -> Lead
             created_count = 0
             for res in results:
                 try:
-                    # Upsert Company
-                    company = self._upsert_company(res['company_name'], res['url'])
-                    
-                    # Upsert Lead
-                    self._upsert_lead(
-                        run.workspace_id, 
-                        company, 
-                        first_name="Contact", 
-                        last_name=f"at {res['company_name']}",
-                        title=res.get('job_title', "Sourced Lead"),
-                        source_url=res.get('source_url', res['url'])
-                    )
+                    with lead_run_stage_seconds.labels("upsert").time():
+                        # Upsert Company
+                        company = self._upsert_company(res['company_name'], res['url'])
+                        
+                        # Upsert Lead
+                        self._upsert_lead(
+                            run.workspace_id, 
+                            company, 
+                            first_name="Contact", 
+                            last_name=f"at {res['company_name']}",
+                            title=res.get('job_title', "Sourced Lead"),
+                            source_url=res.get('source_url', res['url'])
+                        )
                     created_count += 1
                     
                     # Enrichment (Crawling)
-                    self._enrich(company)
+                    with lead_run_stage_seconds.labels("enrich").time():
+                        self._enrich(company)
 
                 except Exception as e:
                     print(f"Error processing result {res}: {e}")
@@ -221,7 +233,13 @@ class LeadEngine:
         try:
             # 1. Fetch
             headers = {"User-Agent": "Mozilla/5.0 (Compatible; FunnelBot/1.0)"}
-            resp = requests.get(company.website_url, headers=headers, timeout=5)
+            fetch_start = time.perf_counter()
+            try:
+                resp = requests.get(company.website_url, headers=headers, timeout=5)
+            except Exception:
+                crawl_fetch_seconds.labels("error").observe(time.perf_counter() - fetch_start)
+                raise
+            crawl_fetch_seconds.labels(f"{resp.status_code // 100}xx").observe(time.perf_counter() - fetch_start)
             if resp.status_code != 200:
                 print(f"Enrich failed: {resp.status_code}")
                 return
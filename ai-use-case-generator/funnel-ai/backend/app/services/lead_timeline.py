@@ -0,0 +1,115 @@
+from datetime import datetime
+from sqlalchemy import String, and_, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Tuple
+from ..models.crm import FollowUp, LeadNote
+from ..models.pipeline import Deal
+
+# Activity kinds, in the order they sort on equal dates (the cursor relies on it)
+NOTE = "note"
+FOLLOWUP = "followup"
+DEAL = "deal"
+KINDS = (DEAL, FOLLOWUP, NOTE)
+
+# (model, date column) per source; each is served by a (lead_id, date) index
+_SOURCES = {
+    NOTE: (LeadNote, LeadNote.created_at),
+    FOLLOWUP: (FollowUp, FollowUp.scheduled_at),
+    DEAL: (Deal, Deal.created_at),
+}
+
+Cursor = Tuple[datetime, str, int]
+
+def _columns(kind: str):
+    if kind == NOTE:
+        return (LeadNote.id, LeadNote.created_at, null(), LeadNote.content, null(), null(), null())
+    if kind == FOLLOWUP:
+        return (FollowUp.id, FollowUp.scheduled_at, FollowUp.title, FollowUp.notes,
+                FollowUp.status, FollowUp.type, null())
+    return (Deal.id, Deal.created_at, Deal.title, null(), null(), null(), Deal.value)
+
+_LABELS = ("id", "date", "title", "body", "status", "subtype", "value")
+
+def _strict_bound(db: Session, value: datetime):
+    """
+    Bound for `date < value`. SQLite keeps datetimes as text: server-default
+    timestamps are stored without microseconds, ORM-written ones with, so the
+    same instant can be "…:00" or "…:00.000000". Comparing against the shorter
+    form keeps both on the right side of the cursor.
+    """
+    if db.get_bind().dialect.name == "sqlite" and value.microsecond == 0:
+        return literal(value.strftime("%Y-%m-%d %H:%M:%S"), String)
+    return value
+
+def _after(db: Session, kind: str, date_col, id_col, cursor: Optional[Cursor]):
+    """Keyset predicate for one source, for the (date, kind, id) descending order."""
+    if cursor is None:
+        return None
+    at, cursor_kind, cursor_id = cursor
+    if kind < cursor_kind:
+        return date_col <= at
+    if kind > cursor_kind:
+        return date_col < _strict_bound(db, at)
+    return or_(date_col < _strict_bound(db, at), and_(date_col <= at, id_col < cursor_id))
+
+def timeline_query(db: Session, lead_id: int, limit: int, cursor: Optional[Cursor] = None,
+                   kinds: Iterable[str] = KINDS):
+    """
+    One UNION ALL over the requested sources. Each branch is a bounded range
+    scan of its (lead_id, date) index, newest first, capped at `limit` rows,
+    so a page costs O(limit) however long the lead's history is.
+    """
+    branches = []
+    for kind in kinds:
+        model, date_col = _SOURCES[kind]
+        columns = [col.label(name) for col, name in zip(_columns(kind), _LABELS)]
+        branch = (
+            select(literal(kind, String).label("kind"), *columns)
+            .where(model.lead_id == lead_id, date_col.isnot(None))
+            .order_by(date_col.desc(), model.id.desc())
+            .limit(limit)
+        )
+        after = _after(db, kind, date_col, model.id, cursor)
+        if after is not None:
+            branch = branch.where(after)
+        # Wrapped so SQLite accepts a per-branch ORDER BY / LIMIT
+        branches.append(select(branch.subquery()))
+    return union_all(*branches)
+
+def _sort_key(row):
+    # Ordered here rather than in SQL: SQLite would compare the two text
+    # forms of a timestamp as different values (see _strict_bound)
+    return row.date, row.kind, row.id
+
+def fetch_page(db: Session, lead_id: int, limit: int, cursor: Optional[Cursor] = None,
+               kinds: Iterable[str] = KINDS) -> Tuple[List, Optional[Cursor]]:
+    """Newest-first page of activity rows plus the cursor for the next one (None on the last page)."""
+    kinds = [kind for kind in KINDS if kind in set(kinds)]
+    if not kinds:
+        return [], None
+    rows = db.execute(timeline_query(db, lead_id, limit + 1, cursor, kinds)).all()
+    rows.sort(key=_sort_key, reverse=True)
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = (last.date, last.kind, last.id)
+    return page, next_cursor
+
+def to_activity(row) -> dict:
+    if row.kind == NOTE:
+        return {"id": row.id, "type": "note", "content": row.body, "date": row.date, "icon": "FileEdit"}
+    if row.kind == FOLLOWUP:
+        # Use title if available, else standard fallback
+        desc = row.title if row.title else (row.body or "Scheduled Follow-up")
+        subtype = row.subtype or "followup" # specific type like 'call', 'meeting'
+        return {
+            "id": row.id,
+            "type": subtype,
+            "content": f"{(row.status or 'pending').capitalize()} {subtype.capitalize()}: {desc}",
+            "date": row.date,
+            "status": row.status,
+            "icon": "Calendar",
+        }
+    return {"id": row.id, "type": "deal", "content": f"Deal created: {row.title} (${row.value})",
+            "date": row.date, "icon": "Briefcase"}
@@ -0,0 +1,202 @@
+from sqlalchemy import func, insert, select, delete, text
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+import os
+from ..core.background import PeriodicWorker
+from ..db.session import SessionLocal
+from ..models.log import AccessLog, AccessLogMinute
+from ..models.metrics import RouteLatencyRollup
+
+# Raw access_logs rows are kept this long, then folded into access_log_minutes
+LOG_RAW_RETENTION_DAYS = int(os.getenv("LOG_RAW_RETENTION_DAYS", "7"))
+# Per-minute aggregates and latency rollups are kept this long
+LOG_AGGREGATE_RETENTION_DAYS = int(os.getenv("LOG_AGGREGATE_RETENTION_DAYS", "90"))
+LOG_RETENTION_INTERVAL_SECONDS = float(os.getenv("LOG_RETENTION_INTERVAL_SECONDS", "3600"))
+# Daily partitions created ahead of time (Postgres, partitioned table only)
+LOG_PARTITION_PREMAKE_DAYS = int(os.getenv("LOG_PARTITION_PREMAKE_DAYS", "3"))
+# Upper bound on hour-sized chunks downsampled per run, so a first run on a
+# large backlog doesn't hold the worker for hours; the rest goes next run
+LOG_RETENTION_MAX_CHUNKS = int(os.getenv("LOG_RETENTION_MAX_CHUNKS", "500"))
+
+PARTITION_PREFIX = "access_logs_p"
+# Catches rows outside every daily partition (see scripts/partition_access_logs.py)
+DEFAULT_PARTITION = "access_logs_default"
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything here is stored as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _minute_expr(dialect: str):
+    if dialect == "postgresql":
+        return func.date_trunc("minute", AccessLog.timestamp)
+    return func.strftime("%Y-%m-%d %H:%M:00", AccessLog.timestamp)
+
+def downsample_range(db: Session, start: datetime, end: datetime) -> int:
+    """Folds raw rows in [start, end) into per-minute aggregates. Caller deletes the raw rows."""
+    minute = _minute_expr(db.bind.dialect.name).label("minute")
+    aggregate = (
+        select(
+            minute, AccessLog.method, AccessLog.path, AccessLog.status_code,
+            func.count(AccessLog.id), func.sum(AccessLog.duration_ms), func.max(AccessLog.duration_ms)
+        )
+        .where(AccessLog.timestamp >= start, AccessLog.timestamp < end)
+        .group_by(minute, AccessLog.method, AccessLog.path, AccessLog.status_code)
+    )
+    result = db.execute(
+        insert(AccessLogMinute).from_select(
+            ["minute", "method", "path", "status_code", "count", "sum_ms", "max_ms"], aggregate
+        )
+    )
+    return result.rowcount or 0
+
+# --- Postgres native partitioning -------------------------------------------
+
+def is_partitioned(db: Session) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    return bool(db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('access_logs')"
+    )).scalar())
+
+def _partition_name(day: datetime) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+def list_day_partitions(db: Session):
+    """[(name, day_start)] for the daily partitions, oldest first. Legacy/default partitions are skipped."""
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('access_logs')"
+    )).scalars()
+    partitions = []
+    for name in rows:
+        if not name.startswith(PARTITION_PREFIX):
+            continue
+        try:
+            day = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        partitions.append((name, day))
+    return sorted(partitions, key=lambda p: p[1])
+
+def _relation_exists(db: Session, name: str) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+def create_day_partition(db: Session, day: datetime):
+    """
+    Creates the partition for `day`. Postgres refuses to add one while the
+    default partition holds rows in its range (e.g. clock-skewed writes from
+    the future), so those rows are moved over: detach the default, create
+    the day, move its rows, reattach, all in one transaction.
+    """
+    name = _partition_name(day)
+    if _relation_exists(db, name):
+        return
+    end = day + timedelta(days=1)
+    bounds = f"FOR VALUES FROM ('{day.isoformat()}') TO ('{end.isoformat()}')"
+    in_range = "WHERE timestamp >= :start AND timestamp < :end"
+    params = {"start": day, "end": end}
+    stranded = _relation_exists(db, DEFAULT_PARTITION) and db.execute(
+        text(f"SELECT 1 FROM {DEFAULT_PARTITION} {in_range} LIMIT 1"), params
+    ).scalar()
+    if not stranded:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF access_logs {bounds}"))
+        db.commit()
+        return
+    db.execute(text(f"ALTER TABLE access_logs DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.execute(text(f"CREATE TABLE {name} PARTITION OF access_logs {bounds}"))
+    db.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} {in_range}"), params)
+    db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} {in_range}"), params)
+    db.execute(text(f"ALTER TABLE access_logs ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    db.commit()
+
+def ensure_partitions(db: Session, today: datetime):
+    """Premakes the daily partitions; one failing day is logged and doesn't block the others."""
+    for offset in range(LOG_PARTITION_PREMAKE_DAYS + 1):
+        day = today + timedelta(days=offset)
+        try:
+            create_day_partition(db, day)
+        except Exception as e:
+            db.rollback()
+            print(f"Log retention: could not create partition {_partition_name(day)}: {e}")
+
+def drop_expired_partitions(db: Session, cutoff: datetime) -> int:
+    """Downsamples and drops whole daily partitions that end before `cutoff`, one transaction each."""
+    dropped = 0
+    for name, day in list_day_partitions(db):
+        if day + timedelta(days=1) > cutoff:
+            break
+        downsample_range(db, day, day + timedelta(days=1))
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        dropped += 1
+    return dropped
+
+# --- Row-level retention (SQLite, unpartitioned Postgres, legacy partitions) --
+
+def expire_raw_rows(db: Session, cutoff: datetime, max_chunks: int = LOG_RETENTION_MAX_CHUNKS) -> int:
+    """
+    Downsamples then deletes raw rows older than `cutoff`, one hour per
+    transaction, so a crash never leaves a minute both aggregated and raw.
+    Each chunk is an indexed range on timestamp.
+    """
+    chunks = 0
+    deleted = 0
+    while chunks < max_chunks:
+        oldest = db.query(func.min(AccessLog.timestamp)).filter(AccessLog.timestamp < cutoff).scalar()
+        if oldest is None:
+            break
+        start = _as_utc(oldest).replace(minute=0, second=0, microsecond=0)
+        end = min(start + timedelta(hours=1), cutoff)
+        downsample_range(db, start, end)
+        result = db.execute(delete(AccessLog).where(AccessLog.timestamp >= start, AccessLog.timestamp < end))
+        db.commit()
+        deleted += result.rowcount or 0
+        chunks += 1
+    return deleted
+
+def expire_aggregates(db: Session, cutoff: datetime) -> int:
+    removed = db.execute(delete(AccessLogMinute).where(AccessLogMinute.minute < cutoff)).rowcount or 0
+    removed += db.execute(delete(RouteLatencyRollup).where(RouteLatencyRollup.bucket_start < cutoff)).rowcount or 0
+    db.commit()
+    return removed
+
+_last_run = {}
+
+def run_retention(db: Session) -> dict:
+    now = datetime.now(timezone.utc)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    # Day-aligned so Postgres partitions are either kept or dropped whole
+    raw_cutoff = today - timedelta(days=LOG_RAW_RETENTION_DAYS)
+
+    summary = {"started_at": now, "raw_cutoff": raw_cutoff, "partitioned": is_partitioned(db),
+               "partitions_dropped": 0}
+    if summary["partitioned"]:
+        ensure_partitions(db, today)
+        summary["partitions_dropped"] = drop_expired_partitions(db, raw_cutoff)
+    summary["raw_rows_deleted"] = expire_raw_rows(db, raw_cutoff)
+    summary["aggregate_rows_deleted"] = expire_aggregates(db, today - timedelta(days=LOG_AGGREGATE_RETENTION_DAYS))
+    summary["finished_at"] = datetime.now(timezone.utc)
+
+    _last_run.clear()
+    _last_run.update(summary)
+    return summary
+
+def _run_in_background():
+    db = SessionLocal()
+    try:
+        run_retention(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def retention_status() -> dict:
+    return {
+        "raw_retention_days": LOG_RAW_RETENTION_DAYS,
+        "aggregate_retention_days": LOG_AGGREGATE_RETENTION_DAYS,
+        "interval_seconds": LOG_RETENTION_INTERVAL_SECONDS,
+        "last_run": dict(_last_run) or None,
+    }
+
+log_retention_worker = PeriodicWorker("log-retention", LOG_RETENTION_INTERVAL_SECONDS, _run_in_background)
@@ -0,0 +1,115 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import os
+from ..core.background import PeriodicWorker
+from ..core.metrics import Histogram, registry
+from ..db.session import SessionLocal
+from ..models.metrics import RouteLatencyRollup
+
+METRICS_ROLLUP_SECONDS = float(os.getenv("METRICS_ROLLUP_SECONDS", "60"))
+
+def rollup_metrics():
+    """
+    Persists this worker's in-memory route stats and starts a new interval.
+    If the insert fails the interval goes back into the registry, so the
+    next rollup writes it together with the requests seen meanwhile.
+    """
+    window_start, routes = registry.snapshot(reset=True)
+    if not routes:
+        return
+    window_end = datetime.now(timezone.utc)
+    rows = [
+        {
+            "bucket_start": window_start,
+            "bucket_end": window_end,
+            "method": method,
+            "route": route,
+            "count": stats.histogram.count,
+            "error_count": stats.error_count,
+            "sum_ms": stats.histogram.sum,
+            "max_ms": stats.histogram.max,
+            "status_codes": stats.status_codes,
+            "histogram": stats.histogram.to_sparse(),
+        }
+        for (method, route), stats in routes.items()
+    ]
+    db = SessionLocal()
+    try:
+        db.execute(insert(RouteLatencyRollup), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        registry.restore(window_start, routes)
+        raise
+    finally:
+        db.close()
+
+metrics_rollup_worker = PeriodicWorker("metrics-rollup", METRICS_ROLLUP_SECONDS, rollup_metrics)
+
+class _Aggregate:
+    def __init__(self):
+        self.histogram = Histogram()
+        self.status_codes = {}
+        self.errors = 0
+
+    def add(self, count, errors, sum_ms, max_ms, sparse, status_codes):
+        self.histogram.merge_sparse(sparse, sum_ms, max_ms)
+        self.errors += errors
+        for code, n in status_codes.items():
+            self.status_codes[code] = self.status_codes.get(code, 0) + n
+
+    def summary(self, seconds: float):
+        h = self.histogram
+        return {
+            "total_requests": h.count,
+            "avg_latency_ms": round(h.sum / h.count, 2) if h.count else 0,
+            "p50_ms": round(h.quantile(0.50), 2),
+            "p95_ms": round(h.quantile(0.95), 2),
+            "p99_ms": round(h.quantile(0.99), 2),
+            "max_ms": round(h.max, 2),
+            "error_count": self.errors,
+            "error_rate": round((self.errors / h.count * 100) if h.count else 0, 2),
+            "throughput_rps": round(h.count / seconds, 3) if seconds > 0 else 0,
+            "status_codes": self.status_codes,
+        }
+
+def latency_stats(db: Session, since: datetime, until: Optional[datetime] = None, route: Optional[str] = None):
+    """
+    Merges persisted rollups in [since, until) with this worker's live,
+    not-yet-rolled-up stats. Cost scales with rollup rows, not requests.
+    """
+    now = datetime.now(timezone.utc)
+    until = until or now
+    query = db.query(
+        RouteLatencyRollup.method, RouteLatencyRollup.route, RouteLatencyRollup.count,
+        RouteLatencyRollup.error_count, RouteLatencyRollup.sum_ms, RouteLatencyRollup.max_ms,
+        RouteLatencyRollup.histogram, RouteLatencyRollup.status_codes
+    ).filter(RouteLatencyRollup.bucket_start >= since, RouteLatencyRollup.bucket_start < until)
+    if route:
+        query = query.filter(RouteLatencyRollup.route == route)
+
+    overall = _Aggregate()
+    per_route = {}
+    for method, route_path, count, errors, sum_ms, max_ms, sparse, status_codes in query:
+        for agg in (overall, per_route.setdefault((method, route_path), _Aggregate())):
+            agg.add(count, errors, sum_ms, max_ms, sparse or {}, status_codes or {})
+
+    window_start, live = registry.snapshot()
+    if until >= now:
+        for (method, route_path), stats in live.items():
+            if route and route_path != route:
+                continue
+            for agg in (overall, per_route.setdefault((method, route_path), _Aggregate())):
+                agg.add(stats.histogram.count, stats.error_count, stats.histogram.sum,
+                        stats.histogram.max, stats.histogram.to_sparse(), stats.status_codes)
+
+    seconds = (min(until, now) - since).total_seconds()
+    result = overall.summary(seconds)
+    result["window"] = {"since": since, "until": until}
+    result["routes"] = sorted(
+        ({"method": m, "route": r, **agg.summary(seconds)} for (m, r), agg in per_route.items()),
+        key=lambda r: r["total_requests"], reverse=True
+    )
+    return result
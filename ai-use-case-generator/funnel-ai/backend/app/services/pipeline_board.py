@@ -0,0 +1,64 @@
+from sqlalchemy import func, select
+from typing import Optional
+from ..models.lead import Lead
+from ..models.pipeline import Deal, Stage
+
+# What a Kanban card needs from the lead; the full Lead row stays on /leads/{id}
+LEAD_CARD_COLUMNS = (
+    Lead.id, Lead.first_name, Lead.last_name, Lead.email, Lead.phone, Lead.company, Lead.title,
+    Lead.score, Lead.status, Lead.last_contacted_at, Lead.next_scheduled_action,
+)
+
+def _lead_label(col) -> str:
+    # Lead.id as lead_pk: lead_id is the deal's own column (NULL pk = dangling lead_id)
+    return "lead_pk" if col.key == "id" else f"lead_{col.key}"
+
+_DEAL_COLUMNS = (Deal.id, Deal.title, Deal.value, Deal.currency, Deal.stage_id, Deal.lead_id, Deal.created_at)
+
+def stage_totals_query():
+    """Every stage with its deal count and value sum: one grouped pass over ix_deals_stage_id_id."""
+    totals = (
+        select(Deal.stage_id, func.count(Deal.id).label("deal_count"), func.sum(Deal.value).label("total_value"))
+        .group_by(Deal.stage_id)
+        .subquery()
+    )
+    return (
+        select(Stage.id, Stage.name, Stage.order, Stage.color,
+               func.coalesce(totals.c.deal_count, 0).label("deal_count"),
+               func.coalesce(totals.c.total_value, 0.0).label("total_value"))
+        .outerjoin(totals, totals.c.stage_id == Stage.id)
+        .order_by(Stage.order, Stage.id)
+    )
+
+def _with_lead(query):
+    return query.add_columns(*(col.label(_lead_label(col)) for col in LEAD_CARD_COLUMNS)) \
+        .outerjoin(Lead, Lead.id == Deal.lead_id)
+
+def first_deals_query(per_stage: int):
+    """
+    The first `per_stage` deals of every stage (board order: oldest first),
+    ranked with row_number() over the (stage_id, id) index so only the rows
+    that will be shown are joined to leads.
+    """
+    rank = func.row_number().over(partition_by=Deal.stage_id, order_by=Deal.id).label("rank")
+    ranked = select(Deal.id, rank).subquery()
+    return (
+        _with_lead(select(*_DEAL_COLUMNS))
+        .join(ranked, ranked.c.id == Deal.id)
+        .where(ranked.c.rank <= per_stage)
+        .order_by(Deal.stage_id, Deal.id)
+    )
+
+def stage_deals_query(stage_id: int, limit: int, after_id: Optional[int] = None):
+    """One stage's deals after `after_id`, in board order."""
+    query = _with_lead(select(*_DEAL_COLUMNS)).where(Deal.stage_id == stage_id)
+    if after_id is not None:
+        query = query.where(Deal.id > after_id)
+    return query.order_by(Deal.id).limit(limit)
+
+def to_card(row) -> dict:
+    card = {col.key: getattr(row, col.key) for col in _DEAL_COLUMNS}
+    card["lead"] = None
+    if row.lead_pk is not None:
+        card["lead"] = {col.key: getattr(row, _lead_label(col)) for col in LEAD_CARD_COLUMNS}
+    return card
@@ -1,23 +1,46 @@
+from sqlalchemy import case, cast, func, literal, update, Integer
+from sqlalchemy.orm import Session
 from ..models.lead import Lead
 from ..models.brand import BrandSettings
+from ..core.metrics import scoring_rescore_seconds
 
-def calculate_lead_score(lead: Lead, weights: BrandSettings) -> int:
+# Pipeline Stage (Highest Impact)
+# cold=10, contacted=30, qualified=60, closed=100
+STAGE_SCORES = {
+    "new": 10,
+    "contacted": 30,
+    "qualified": 60,
+    "closed": 100,
+    "lost": 0
+}
+DEFAULT_STAGE_SCORE = 10
+
+# Cached factor column on Lead -> weight column on BrandSettings.
+# A weight change only needs to recombine these, never re-derive them.
+COMPONENT_WEIGHTS = {
+    "score_icp": "weight_icp",
+    "score_seniority": "weight_seniority",
+    "score_intent_website": "weight_intent_website",
+    "score_intent_pricing": "weight_intent_pricing",
+    "score_intent_demo": "weight_intent_demo",
+    "score_intent_content": "weight_intent_content",
+    "score_intent_social": "weight_intent_social",
+    "score_intent_email": "weight_intent_email",
+}
+WEIGHT_FIELDS = set(COMPONENT_WEIGHTS.values())
+# Lead fields calculate_score_components reads; writes to any of them must
+# refresh the cached components (apply_lead_score) or rescores go stale
+SCORE_INPUT_FIELDS = {"status", "title", "industry", "meta_data"}
+
+RESCORE_CHUNK_SIZE = 500
+
+def calculate_score_components(lead: Lead) -> dict:
     """
-    Calculates a lead score (0-100) based on weighted factors.
+    Derives the per-lead factor scores (0-100 each) that are independent of
+    the brand weights. These are cached on the lead as score_* columns.
     """
-    score = 0
-    
-    # 1. Pipeline Stage (Highest Impact)
-    # cold=10, contacted=30, qualified=60, closed=100
-    stage_scores = {
-        "new": 10,
-        "contacted": 30,
-        "qualified": 60,
-        "closed": 100,
-        "lost": 0
-    }
-    base_stage_score = stage_scores.get((lead.status or "new").lower(), 10)
-    
+    base_stage_score = STAGE_SCORES.get((lead.status or "new").lower(), DEFAULT_STAGE_SCORE)
+
     # 2. Seniority (Based on Job Title)
     seniority_bonus = 0
     title_lower = lead.title.lower() if lead.title else ""
@@ -29,44 +52,122 @@ def calculate_lead_score(lead: Lead, weights: BrandSettings) -> int:
         seniority_bonus = 60
     elif any(word in title_lower for word in ["manager"]):
         seniority_bonus = 40
-    
+
     # 3. ICP Fit (Simulated based on company known types or industry)
     icp_score = 50 # Default middle ground
     if lead.industry and any(ind in lead.industry.lower() for ind in ["software", "technology", "saas"]):
         icp_score = 100
-    
+
     # 4. Intent & Engagement (Detailed Factors)
     # Individual signal impact (0-100)
-    signal_scores = {
-        "website": lead.meta_data.get("website_visits", 0) * 10 if lead.meta_data else 0,
-        "pricing": 100 if lead.meta_data and lead.meta_data.get("viewed_pricing") else 0,
-        "demo": 100 if lead.meta_data and lead.meta_data.get("requested_demo") else 0,
-        "content": 70 if lead.meta_data and lead.meta_data.get("downloaded_content") else 0,
-        "social": 50 if lead.meta_data and lead.meta_data.get("social_engagement") else 0,
-        "email": 40 if lead.meta_data and (lead.meta_data.get("opened_email") or lead.meta_data.get("clicked_link")) else 0
+    meta = lead.meta_data or {}
+    return {
+        "score_stage": base_stage_score,
+        "score_icp": icp_score,
+        "score_seniority": seniority_bonus,
+        "score_intent_website": meta.get("website_visits", 0) * 10,
+        "score_intent_pricing": 100 if meta.get("viewed_pricing") else 0,
+        "score_intent_demo": 100 if meta.get("requested_demo") else 0,
+        "score_intent_content": 70 if meta.get("downloaded_content") else 0,
+        "score_intent_social": 50 if meta.get("social_engagement") else 0,
+        "score_intent_email": 40 if (meta.get("opened_email") or meta.get("clicked_link")) else 0,
     }
-    
+
+def combine_score_components(components: dict, weights: BrandSettings) -> int:
+    """
+    Linear recombination of cached components with the current weights.
+    """
+    base_stage_score = components["score_stage"]
+
     # Simplified weighting:
-    total_weights = (weights.weight_icp + weights.weight_seniority + 
-                     weights.weight_intent_website + weights.weight_intent_pricing +
-                     weights.weight_intent_demo + weights.weight_intent_content +
-                     weights.weight_intent_social + weights.weight_intent_email)
-    
+    total_weights = sum(getattr(weights, w) for w in WEIGHT_FIELDS)
     if total_weights == 0:
         return base_stage_score
-        
-    weighted_sum = (
-        (icp_score * (weights.weight_icp / 100)) +
-        (seniority_bonus * (weights.weight_seniority / 100)) +
-        (signal_scores["website"] * (weights.weight_intent_website / 100)) +
-        (signal_scores["pricing"] * (weights.weight_intent_pricing / 100)) +
-        (signal_scores["demo"] * (weights.weight_intent_demo / 100)) +
-        (signal_scores["content"] * (weights.weight_intent_content / 100)) +
-        (signal_scores["social"] * (weights.weight_intent_social / 100)) +
-        (signal_scores["email"] * (weights.weight_intent_email / 100))
+
+    weighted_sum = sum(
+        (components[col] or 0) * (getattr(weights, w) / 100)
+        for col, w in COMPONENT_WEIGHTS.items()
     )
-    
+
     # Blend with Stage Score (Stage is 50%, Signals are 50% normalized)
     final_score = (base_stage_score * 0.5) + (min(100, weighted_sum) * 0.5)
-    
+
     return int(min(100, final_score))
+
+def calculate_lead_score(lead: Lead, weights: BrandSettings) -> int:
+    """
+    Calculates a lead score (0-100) based on weighted factors.
+    """
+    return combine_score_components(calculate_score_components(lead), weights)
+
+def apply_lead_score(lead: Lead, weights: BrandSettings) -> int:
+    """
+    Refreshes the cached components on the lead and sets its score.
+    """
+    components = calculate_score_components(lead)
+    for key, value in components.items():
+        setattr(lead, key, value)
+    lead.score = combine_score_components(components, weights)
+    return lead.score
+
+def _score_expression(weights: BrandSettings, dialect_name: str, status: str = None):
+    """
+    SQL equivalent of combine_score_components over the cached columns.
+    The stage component is re-derived from status so it never drifts; pass
+    `status` when the same UPDATE sets it (SET expressions see the old row).
+    """
+    if status is not None:
+        stage = literal(STAGE_SCORES.get(status.lower(), DEFAULT_STAGE_SCORE))
+    else:
+        stage = case(
+            *[(func.lower(func.coalesce(Lead.status, "new")) == name, value) for name, value in STAGE_SCORES.items()],
+            else_=DEFAULT_STAGE_SCORE
+        )
+
+    total_weights = sum(getattr(weights, w) for w in WEIGHT_FIELDS)
+    if total_weights == 0:
+        return stage, stage
+
+    weighted_sum = sum(
+        func.coalesce(getattr(Lead, col), 0) * (getattr(weights, w) / 100)
+        for col, w in COMPONENT_WEIGHTS.items()
+    )
+    capped = case((weighted_sum > 100, 100), else_=weighted_sum)
+    final_score = (stage * 0.5) + (capped * 0.5)
+
+    # int() truncates; Postgres CAST rounds, SQLite CAST truncates.
+    if dialect_name == "postgresql":
+        final_score = func.trunc(final_score)
+    return stage, cast(final_score, Integer)
+
+def backfill_score_components(db: Session) -> int:
+    """
+    Computes cached components for leads scored before they existed.
+    """
+    count = 0
+    while True:
+        leads = db.query(Lead).filter(Lead.score_stage.is_(None)).limit(RESCORE_CHUNK_SIZE).all()
+        if not leads:
+            break
+        for lead in leads:
+            for key, value in calculate_score_components(lead).items():
+                setattr(lead, key, value)
+        db.commit()
+        count += len(leads)
+    return count
+
+def rescore_leads(db: Session, weights: BrandSettings) -> int:
+    """
+    Re-applies the current weights to every lead with one UPDATE statement.
+    Returns the number of leads updated.
+    """
+    with scoring_rescore_seconds.time():
+        backfill_score_components(db)
+
+        stage, score = _score_expression(weights, db.get_bind().dialect.name)
+        result = db.execute(
+            update(Lead).values(score_stage=stage, score=score),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+    return result.rowcount
@@ -1,5 +1,3 @@
-import requests
-from bs4 import BeautifulSoup
 import random
 import time
 
@@ -20,6 +18,10 @@ def search_google(query, limit=10, api_key=None, cx=None):
         "Referer": "https://www.google.com/"
     }
     
+    # requests/bs4 are imported on first search, not at app startup
+    import requests
+    from bs4 import BeautifulSoup
+
     try:
         # Construct Google URL
         url = f"https://www.google.com/search?q={query}&num={limit}"
@@ -90,6 +92,8 @@ def search_with_api(query, api_key, cx, limit=10):
     Uses Google Custom Search JSON API to fetch results.
     Reliable and compliant, but requires credentials.
     """
+    import requests
+
     try:
         url = "https://www.googleapis.com/customsearch/v1"
         params = {
@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.session import SessionLocal
+from app.models.lead import Lead
+from app.services.dedupe import compute_match_keys
+
+CHUNK_SIZE = 500
+
+def backfill():
+    """
+    Fills email_key / name_key / phone_key for leads created before the
+    dedupe keys existed. Emails that only differ by case keep the key on
+    the oldest lead; later ones are left without an email_key (the update
+    listener only recomputes it when the email itself changes) and flagged
+    with meta_data["duplicate_of"] for review/merge.
+    """
+    db = SessionLocal()
+    try:
+        taken = dict(db.query(Lead.email_key, Lead.id).filter(Lead.email_key.isnot(None)))
+        last_id = 0
+        updated = 0
+        conflicts = []
+
+        while True:
+            leads = db.query(Lead).filter(Lead.id > last_id).order_by(Lead.id).limit(CHUNK_SIZE).all()
+            if not leads:
+                break
+            for lead in leads:
+                keys = compute_match_keys(lead.first_name, lead.last_name, lead.company, lead.email, lead.phone)
+                if keys["email_key"] and keys["email_key"] != lead.email_key and keys["email_key"] in taken:
+                    original_id = taken[keys["email_key"]]
+                    conflicts.append((lead.id, lead.email, original_id))
+                    keys["email_key"] = None
+                    keys["meta_data"] = dict(lead.meta_data or {}, duplicate_of=original_id)
+                if keys["email_key"]:
+                    taken[keys["email_key"]] = lead.id
+                # Bulk-style column update; skips the ORM listeners on purpose
+                db.query(Lead).filter(Lead.id == lead.id).update(keys, synchronize_session=False)
+                updated += 1
+            last_id = leads[-1].id
+            db.commit()
+            print(f"Processed up to lead {last_id}...")
+
+        print(f"Success: match keys set on {updated} leads.")
+        for lead_id, email, original_id in conflicts:
+            print(f"Warning: lead {lead_id} ({email}) duplicates lead {original_id}; email_key left empty, flagged duplicate_of.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,66 @@
+import sys
+import os
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import time
+from sqlalchemy import create_engine, text
+from app.core.metrics import (
+    MetricsRegistry, prometheus, http_requests_total, http_request_duration_seconds,
+    db_queries_per_request, db_time_per_request_seconds
+)
+from app.core.db_metrics import instrument_engine, start_request_tracking
+
+ITERATIONS = int(os.getenv("BENCH_ITERATIONS", "200000"))
+QUERY_ITERATIONS = int(os.getenv("BENCH_QUERY_ITERATIONS", "20000"))
+
+def _per_call_us(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+def bench_request_path():
+    """Everything the middleware records per request, minus the request itself."""
+    registry = MetricsRegistry()
+    routes = [f"/api/bench/{i}" for i in range(20)]
+    stats = start_request_tracking()
+
+    def record(i):
+        route = routes[i % 20]
+        registry.observe("GET", route, 200, 12.5)
+        http_requests_total.labels("GET", route, 200).inc()
+        http_request_duration_seconds.labels("GET", route).observe(0.0125)
+        db_queries_per_request.labels(route).observe(stats.count)
+        db_time_per_request_seconds.labels(route).observe(stats.duration)
+
+    return _per_call_us(record, ITERATIONS)
+
+def bench_query_events():
+    """Overhead the engine events add to one trivial SQLite statement."""
+    plain = create_engine("sqlite://")
+    instrumented = create_engine("sqlite://")
+    instrument_engine(instrumented)
+    start_request_tracking()
+
+    results = []
+    for engine in (plain, instrumented):
+        with engine.connect() as conn:
+            stmt = text("SELECT 1")
+            _per_call_us(lambda i: conn.execute(stmt), 1000) # warm up
+            results.append(_per_call_us(lambda i: conn.execute(stmt), QUERY_ITERATIONS))
+    return results
+
+def bench_render():
+    start = time.perf_counter()
+    body = prometheus.render()
+    return (time.perf_counter() - start) * 1000, len(body)
+
+if __name__ == "__main__":
+    print(f"Request instrumentation: {bench_request_path():.2f} us/request ({ITERATIONS} iterations)")
+    plain_us, instrumented_us = bench_query_events()
+    print(f"SELECT 1 without events: {plain_us:.2f} us, with events: {instrumented_us:.2f} us "
+          f"(+{instrumented_us - plain_us:.2f} us/query)")
+    render_ms, size = bench_render()
+    print(f"/metrics render: {render_ms:.2f} ms for {size} bytes")
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import tempfile
+import threading
+import time
+from sqlalchemy import insert, select, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.db.session import Base, build_engine, pool_status
+from app.models.log import AccessLog
+
+THREADS = int(os.getenv("LOAD_THREADS", "16"))
+SECONDS = float(os.getenv("LOAD_SECONDS", "5"))
+WRITE_RATIO = float(os.getenv("LOAD_WRITE_RATIO", "0.5"))
+
+def run(engine, label):
+    """Mixed small-transaction writers and readers, like request handlers plus background flushers."""
+    Base.metadata.create_all(bind=engine, tables=[AccessLog.__table__])
+    Session = sessionmaker(bind=engine)
+    counters = {"ok": 0, "locked": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.time() + SECONDS
+
+    def worker(n):
+        i = 0
+        while time.time() < deadline:
+            i += 1
+            db = Session()
+            try:
+                if (i * 7 + n) % 100 < WRITE_RATIO * 100:
+                    db.execute(insert(AccessLog), [{"method": "GET", "path": f"/load/{n}", "status_code": 200, "duration_ms": 1.0}])
+                    db.commit()
+                else:
+                    db.execute(select(func.count(AccessLog.id)).where(AccessLog.path == f"/load/{n}")).scalar()
+                outcome = "ok"
+            except OperationalError as e:
+                db.rollback()
+                outcome = "locked" if "locked" in str(e) else "errors"
+            except Exception:
+                db.rollback()
+                outcome = "errors"
+            finally:
+                db.close()
+            with lock:
+                counters[outcome] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    status = pool_status(engine)
+    engine.dispose()
+    print(f"{label:>8}: {counters['ok'] / SECONDS:8.0f} ops/s  locked={counters['locked']}  errors={counters['errors']}  pool={status}")
+
+if __name__ == "__main__":
+    url = os.getenv("LOAD_DATABASE_URL")
+    if url:
+        run(build_engine(url, tuned=False), "default")
+        run(build_engine(url, tuned=True), "tuned")
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(build_engine(f"sqlite:///{tmp}/default.db", tuned=False), "default")
+            run(build_engine(f"sqlite:///{tmp}/tuned.db", tuned=True), "tuned")
@@ -0,0 +1,76 @@
+import sys
+import os
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp.name}/login_load.db")
+
+import asyncio
+import statistics
+import time
+import httpx
+from app.main import app
+from app.db.base import Base
+from app.db.session import engine
+from app.db.async_session import dispose_async_engine
+from app.core import security
+import app.api.auth as auth
+
+SECONDS = float(os.getenv("LOAD_SECONDS", "5"))
+LOGIN_CONCURRENCY = int(os.getenv("LOAD_LOGIN_CONCURRENCY", "16"))
+PROBE_PATH = os.getenv("LOAD_PROBE_PATH", "/")
+
+async def probe(client, deadline):
+    """Sequential requests to an endpoint that never touches bcrypt; returns latencies in ms."""
+    latencies = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get(PROBE_PATH)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+    return latencies
+
+async def login_loop(client, deadline, counters):
+    while time.perf_counter() < deadline:
+        r = await client.post("/api/token", data={"username": "load@test.com", "password": "load-test"})
+        counters[r.status_code] = counters.get(r.status_code, 0) + 1
+
+async def phase(client, label, logins):
+    deadline = time.perf_counter() + SECONDS
+    counters = {}
+    tasks = [login_loop(client, deadline, counters) for _ in range(LOGIN_CONCURRENCY if logins else 0)]
+    latencies, *_ = await asyncio.gather(probe(client, deadline), *tasks)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:>16}: probe p50={statistics.median(latencies):7.1f}ms  p95={p95:7.1f}ms  "
+          f"max={latencies[-1]:7.1f}ms  logins={counters}")
+
+async def main():
+    Base.metadata.create_all(bind=engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        await client.post("/api/users/register", json={"email": "load@test.com", "full_name": "Load", "password": "load-test"})
+        print(f"bcrypt rounds={security.BCRYPT_ROUNDS} workers={security.BCRYPT_MAX_WORKERS} "
+              f"max_pending={security.BCRYPT_MAX_PENDING} concurrent logins={LOGIN_CONCURRENCY}")
+        await phase(client, "idle", logins=False)
+
+        # Old behaviour for comparison: checkpw directly on the event loop
+        pooled = security.verify_password_async
+        async def inline(plain, hashed):
+            return security.verify_password(plain, hashed)
+        security.verify_password_async = inline
+        auth.verify_password_async = inline
+        await phase(client, "logins, inline", logins=True)
+
+        security.verify_password_async = pooled
+        auth.verify_password_async = pooled
+        await phase(client, "logins, pooled", logins=True)
+    # aiosqlite connection threads would otherwise keep the process alive
+    await dispose_async_engine()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add the backend directory to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.db.session import engine, SessionLocal
+from app.services.log_retention import ensure_partitions, is_partitioned
+
+def partition():
+    """
+    One-off, Postgres only: turns access_logs into a table partitioned by
+    day on timestamp. Existing rows stay in access_logs_legacy, attached as
+    the partition for everything before today; the retention worker
+    downsamples and deletes it row-wise like any unpartitioned data.
+    SQLite keeps the single indexed table with batched deletes.
+    """
+    if engine.dialect.name != "postgresql":
+        print("Skipping: native partitioning is only used on Postgres.")
+        return
+
+    db = SessionLocal()
+    try:
+        if is_partitioned(db):
+            print("access_logs is already partitioned.")
+            return
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        db.execute(text("LOCK TABLE access_logs IN ACCESS EXCLUSIVE MODE"))
+        db.execute(text("UPDATE access_logs SET timestamp = now() WHERE timestamp IS NULL"))
+        db.execute(text("ALTER TABLE access_logs RENAME TO access_logs_legacy"))
+        # LIKE ... INCLUDING DEFAULTS keeps the id sequence default
+        db.execute(text(
+            "CREATE TABLE access_logs (LIKE access_logs_legacy INCLUDING DEFAULTS, "
+            "PRIMARY KEY (id, timestamp)) PARTITION BY RANGE (timestamp)"
+        ))
+        for column in ["method", "path", "status_code", "timestamp"]:
+            db.execute(text(f"ALTER INDEX IF EXISTS ix_access_logs_{column} RENAME TO ix_access_logs_legacy_{column}"))
+            db.execute(text(f"CREATE INDEX ix_access_logs_{column} ON access_logs ({column})"))
+        db.execute(text(
+            f"ALTER TABLE access_logs ATTACH PARTITION access_logs_legacy "
+            f"FOR VALUES FROM (MINVALUE) TO ('{today.isoformat()}')"
+        ))
+        db.execute(text("CREATE TABLE access_logs_default PARTITION OF access_logs DEFAULT"))
+        db.commit()
+        ensure_partitions(db, today)
+        print("Success: access_logs is now partitioned by day.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    partition()
@@ -0,0 +1,49 @@
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+# Add backend to path
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(BACKEND_DIR)
+
+# Budget for `import app.main` in a fresh interpreter (best of IMPORT_TIME_RUNS)
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+IMPORT_TIME_RUNS = int(os.getenv("IMPORT_TIME_RUNS", "3"))
+
+# Loaded on first use only; importing any of them at startup is a regression
+DEFERRED_MODULES = ["fpdf", "bs4", "requests"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import app.main
+elapsed_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({"ms": elapsed_ms, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+def measure_import(db_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    # The app prints its own lines on import; the probe result is the last one
+    return json.loads(out.strip().splitlines()[-1])
+
+def test_import_time():
+    print("--- Testing app.main import time ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "import_probe.db")
+        runs = [measure_import(db_path) for _ in range(IMPORT_TIME_RUNS)]
+        best = min(r["ms"] for r in runs)
+        print(f"import app.main: best {best:.0f}ms of {IMPORT_TIME_RUNS} (budget {IMPORT_TIME_BUDGET_MS:.0f}ms)")
+
+        # Schema is alembic's job; importing the app must not create the database
+        assert not os.path.exists(db_path), "import app.main touched the database"
+        loaded = runs[0]["loaded"]
+        assert not loaded, f"Heavy modules imported at startup: {loaded}"
+        assert best <= IMPORT_TIME_BUDGET_MS, f"import app.main took {best:.0f}ms > {IMPORT_TIME_BUDGET_MS:.0f}ms"
+    print("SUCCESS: import time within budget")
+
+if __name__ == "__main__":
+    test_import_time()
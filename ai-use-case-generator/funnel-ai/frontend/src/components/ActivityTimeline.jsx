@@ -5,27 +5,29 @@ import { motion } from 'framer-motion';
 const ActivityTimeline = ({ leadId, includeNotes = true }) => {
     const [history, setHistory] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState(null);
 
-    useEffect(() => {
-        if (!leadId) return;
-
-        const fetchHistory = async () => {
-            try {
-                const res = await fetch(`/api/history/${leadId}`);
-                if (res.ok) {
-                    let data = await res.json();
-                    if (!includeNotes) {
-                        data = data.filter(item => item.type !== 'note');
-                    }
-                    setHistory(data);
-                }
-            } catch (err) {
-                console.error("Failed to fetch history", err);
-            } finally {
-                setLoading(false);
+    // Paginated newest-first; older pages load on demand
+    const fetchHistory = async (cursor = null) => {
+        const params = new URLSearchParams();
+        if (!includeNotes) params.set('kinds', 'followup,deal');
+        if (cursor) params.set('cursor', cursor);
+        try {
+            const res = await fetch(`/api/history/${leadId}?${params}`);
+            if (res.ok) {
+                const data = await res.json();
+                setHistory(prev => cursor ? [...prev, ...data] : data);
+                setNextCursor(res.headers.get('X-Next-Cursor'));
             }
-        };
+        } catch (err) {
+            console.error("Failed to fetch history", err);
+        } finally {
+            setLoading(false);
+        }
+    };
 
+    useEffect(() => {
+        if (!leadId) return;
         fetchHistory();
     }, [leadId]);
 
@@ -70,6 +72,14 @@ const ActivityTimeline = ({ leadId, includeNotes = true }) => {
                     </motion.div>
                 ))}
             </div>
+            {nextCursor && (
+                <button
+                    onClick={() => fetchHistory(nextCursor)}
+                    className="text-xs text-gray-400 hover:text-white transition-colors ml-2"
+                >
+                    Load older activity
+                </button>
+            )}
         </div>
     );
 };
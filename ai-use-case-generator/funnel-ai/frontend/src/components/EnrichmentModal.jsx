@@ -21,38 +21,55 @@ export default function EnrichmentModal({ isOpen, onClose }) {
                 setProgress(prev => Math.min(prev + 2, 90)); // Cap at 90% until API returns
             }, 100);
 
-            // Call Backend API
+            // Start the backend job, then poll its status until it finishes
+            let pollTimer = null;
+            const finish = (details) => {
+                clearInterval(interval);
+                setProgress(100);
+                setTimeout(() => {
+                    setStep('complete');
+                    if (details) {
+                        setStats(details);
+                    }
+                }, 500);
+            };
+            const fail = (err) => {
+                console.error("Enrichment failed:", err);
+                clearInterval(interval);
+                setProgress(100);
+                setStep('complete');
+                setStats({ emails: 0, phones: 0, linkedin: 0 });
+            };
+            const poll = (jobId) => {
+                fetch(`http://localhost:8000/api/leads/enrich/jobs/${jobId}`)
+                    .then(res => res.json())
+                    .then(job => {
+                        if (job.status === 'completed') {
+                            finish(job.details);
+                        } else if (job.status === 'failed') {
+                            fail(job.error);
+                        } else {
+                            if (job.total > 0) {
+                                setProgress(prev => Math.max(prev, Math.min(90, Math.round(job.processed / job.total * 90))));
+                            }
+                            pollTimer = setTimeout(() => poll(jobId), 1000);
+                        }
+                    })
+                    .catch(fail);
+            };
+
             fetch('http://localhost:8000/api/leads/enrich/all', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' }
             })
                 .then(res => res.json())
-                .then(data => {
-                    clearInterval(interval);
-                    setProgress(100);
-                    setTimeout(() => {
-                        setStep('complete');
-
-                        // Map backend "details" keys to our stats state
-                        // Backend returns: { emails: int, phones: int, linkedin: int }
-                        // Frontend expects: { emails: int, phones: int, linkedin: int }
-                        // Assuming keys match, but let's be safe
-                        if (data.details) {
-                            setStats(data.details);
-                        }
-                    }, 500);
-                })
-                .catch(err => {
-                    console.error("Enrichment failed:", err);
-                    clearInterval(interval);
-                    // Ideally show error state, but for now just close or stay on processing?
-                    // check if user wants error handling. For now, let's complete with 0 stats.
-                    setProgress(100);
-                    setStep('complete');
-                    setStats({ emails: 0, phones: 0, linkedin: 0 });
-                });
+                .then(job => poll(job.job_id))
+                .catch(fail);
 
-            return () => clearInterval(interval);
+            return () => {
+                clearInterval(interval);
+                clearTimeout(pollTimer);
+            };
         }
     }, [isOpen]);
 
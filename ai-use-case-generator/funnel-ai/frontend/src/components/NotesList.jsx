@@ -11,10 +11,9 @@ const NotesList = ({ leadId }) => {
 
         const fetchNotes = async () => {
             try {
-                const res = await fetch(`/api/history/${leadId}`);
+                const res = await fetch(`/api/history/${leadId}?kinds=note`);
                 if (res.ok) {
-                    const data = await res.json();
-                    setNotes(data.filter(item => item.type === 'note'));
+                    setNotes(await res.json());
                 }
             } catch (err) {
                 console.error("Failed to fetch notes", err);
@@ -4,6 +4,8 @@ import { motion, AnimatePresence } from 'framer-motion';
 
 const NotificationCenter = () => {
     const [notifications, setNotifications] = useState([]);
+    // Total from the server: the list itself is only the first page
+    const [unreadCount, setUnreadCount] = useState(0);
     const [isOpen, setIsOpen] = useState(false);
 
     const fetchNotifications = async () => {
@@ -12,27 +14,32 @@ const NotificationCenter = () => {
             if (res.ok) {
                 const data = await res.json();
                 setNotifications(data);
+                const total = res.headers.get('X-Unread-Count');
+                setUnreadCount(total !== null ? Number(total) : data.length);
             }
         } catch (error) {
             console.error("Failed to fetch notifications", error);
         }
     };
 
-    // Poll every 30 seconds
+    // Server pushes an `alerts` event whenever the unread count changes; refetch then instead of polling
     useEffect(() => {
         fetchNotifications();
-        const interval = setInterval(fetchNotifications, 30000);
-        return () => clearInterval(interval);
+        const source = new EventSource('http://localhost:8000/api/notifications/stream');
+        source.addEventListener('alerts', (event) => {
+            setUnreadCount(JSON.parse(event.data).unread);
+            fetchNotifications();
+        });
+        return () => source.close();
     }, []);
 
-    const unreadCount = notifications.length;
-
     const dismissNotification = async (e, id) => {
         e.stopPropagation();
         try {
             await fetch(`http://localhost:8000/api/notifications/${id}/dismiss`, { method: 'POST' });
             // Optimistic update
             setNotifications(prev => prev.filter(n => n.id !== id));
+            setUnreadCount(prev => Math.max(prev - 1, 0));
         } catch (error) {
             console.error("Failed to dismiss", error);
         }
@@ -73,7 +80,7 @@ const NotificationCenter = () => {
                             </div>
 
                             <div className="max-h-[300px] overflow-y-auto">
-                                {unreadCount === 0 ? (
+                                {notifications.length === 0 ? (
                                     <div className="p-8 text-center text-gray-500 text-xs">
                                         No active alerts.
                                     </div>
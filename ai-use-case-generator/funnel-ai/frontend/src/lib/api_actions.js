@@ -79,5 +79,28 @@ export const actionApi = {
         const response = await fetch(`${API_BASE}/actions/details/${leadId}`);
         if (!response.ok) throw new Error('Failed to get details');
         return await response.json();
+    },
+
+    // Bulk actions: one request for a whole selection.
+    // `selection` is { lead_ids: [...] } or { filter: { status, source, min_score, campaign_id, search } }.
+    // action: 'email' | 'sms' | 'linkedin_dm' | 'pipeline/add' | 'followup/schedule' | 'note/add' | 'contacted'
+    // Returns a job; message sends finish in the background (poll getBulkJob).
+    bulkAction: async (action, selection, params = {}) => {
+        const response = await fetch(`${API_BASE}/actions/bulk/${action}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ...selection, ...params })
+        });
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({}));
+            throw new Error(typeof error.detail === 'string' ? error.detail : 'Bulk action failed');
+        }
+        return await response.json();
+    },
+
+    getBulkJob: async (jobId) => {
+        const response = await fetch(`${API_BASE}/actions/bulk/jobs/${jobId}`);
+        if (!response.ok) throw new Error('Failed to get bulk job');
+        return await response.json();
     }
 };
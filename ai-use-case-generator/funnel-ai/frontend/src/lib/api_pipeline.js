@@ -14,6 +14,19 @@ export async function fetchDeals() {
     return res.json();
 }
 
+// Stages with counts/value totals and the first page of deals per column
+export async function fetchBoard() {
+    const res = await fetch(`${BASE}/pipeline/board`);
+    if (!res.ok) throw new Error('Failed to fetch board');
+    return res.json();
+}
+
+export async function fetchStageDeals(stageId, cursor) {
+    const res = await fetch(`${BASE}/pipeline/stages/${stageId}/deals?cursor=${encodeURIComponent(cursor)}`);
+    if (!res.ok) throw new Error('Failed to fetch deals');
+    return { deals: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+}
+
 export async function createDeal(data) {
     const res = await fetch(`${BASE}/pipeline/deals`, {
         method: 'POST',
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { fetchStages, fetchDeals, moveDeal, createDeal, updateDeal } from '../lib/api_pipeline';
+import { fetchBoard, fetchStageDeals, moveDeal, createDeal, updateDeal } from '../lib/api_pipeline';
 import { disqualifyLead } from '../lib/api';
 import { Plus, MoreHorizontal, Loader2 } from 'lucide-react';
 import { cn } from '../lib/utils';
@@ -36,9 +36,9 @@ export default function Pipeline() {
 
     const loadData = async () => {
         try {
-            const [stagesData, dealsData] = await Promise.all([fetchStages(), fetchDeals()]);
-            setStages(stagesData);
-            setDeals(dealsData);
+            const board = await fetchBoard();
+            setStages(board.stages.map(({ deals, ...stage }) => stage));
+            setDeals(board.stages.flatMap(stage => stage.deals));
         } catch (err) {
             console.error(err);
         } finally {
@@ -62,9 +62,31 @@ export default function Pipeline() {
         }
     };
 
+    // Column counts/totals come from the server, so optimistic edits adjust them too
+    const adjustStage = (stageId, countDelta, valueDelta) => {
+        setStages(prev => prev.map(s => s.id === stageId
+            ? { ...s, deal_count: s.deal_count + countDelta, total_value: s.total_value + valueDelta }
+            : s));
+    };
+
+    const loadMoreDeals = async (stage) => {
+        try {
+            const { deals: more, nextCursor } = await fetchStageDeals(stage.id, stage.next_cursor);
+            setDeals(prev => [...prev, ...more.filter(d => !prev.some(p => p.id === d.id))]);
+            setStages(prev => prev.map(s => s.id === stage.id ? { ...s, next_cursor: nextCursor } : s));
+        } catch (err) {
+            console.error("Failed to load deals", err);
+        }
+    };
+
     const handleMoveDeal = async (dealId, targetStageId) => {
         // Optimistic update
+        const deal = deals.find(d => d.id === dealId);
         setDeals(prev => prev.map(d => d.id === dealId ? { ...d, stage_id: targetStageId } : d));
+        if (deal) {
+            adjustStage(deal.stage_id, -1, -deal.value);
+            adjustStage(targetStageId, 1, deal.value);
+        }
 
         try {
             await moveDeal(dealId, targetStageId);
@@ -109,6 +131,7 @@ export default function Pipeline() {
 
         // Optimistic Update: Remove from UI immediately
         setDeals(prev => prev.filter(d => d.id !== deal.id));
+        adjustStage(deal.stage_id, -1, -deal.value);
         setDisqualifyModal({ isOpen: false, deal: null });
 
         try {
@@ -148,7 +171,7 @@ export default function Pipeline() {
                 <div className="flex gap-4 h-full min-w-max px-1">
                     {stages.map((stage, index) => {
                         const stageDeals = deals.filter(d => d.stage_id === stage.id);
-                        const totalValue = stageDeals.reduce((sum, d) => sum + d.value, 0);
+                        const totalValue = stage.total_value;
                         const nextStage = stages[index + 1];
 
                         return (
@@ -157,7 +180,7 @@ export default function Pipeline() {
                                 <div className={cn("p-4 border-b border-white/5 flex justify-between items-center bg-opacity-10", getStageColor(stage.color).split(' ')[0])}>
                                     <div className="flex items-center gap-2">
                                         <h3 className="font-bold text-gray-200">{stage.name}</h3>
-                                        <span className="px-2 py-0.5 rounded-full bg-black/20 text-xs text-white/70 font-mono">{stageDeals.length}</span>
+                                        <span className="px-2 py-0.5 rounded-full bg-black/20 text-xs text-white/70 font-mono">{stage.deal_count}</span>
                                     </div>
                                     <button className="text-white/50 hover:text-white"><MoreHorizontal className="w-4 h-4" /></button>
                                 </div>
@@ -178,6 +201,14 @@ export default function Pipeline() {
                                             refreshTrigger={refreshTriggers[deal.id]}
                                         />
                                     ))}
+                                    {stage.next_cursor && (
+                                        <button
+                                            onClick={() => loadMoreDeals(stage)}
+                                            className="w-full py-2 text-xs text-gray-400 hover:text-white transition-colors"
+                                        >
+                                            Load more ({stage.deal_count - stageDeals.length} remaining)
+                                        </button>
+                                    )}
                                 </div>
 
                                 {/* Column Footer */}